@@ -0,0 +1,108 @@
+"""Memória e tempo de totalização das representações de NFSe em lote.
+
+Replica as notas do corpus até --notes itens (variando a data de emissão ao
+longo de 12 meses) e mede, com tracemalloc, a memória ocupada por:
+
+    - list[NFSeData]   (dataclasses comuns)
+    - list[NFSeRecord] (NamedTuple, sem __dict__)
+    - NFSeBatch        (colunas em array)
+
+e o tempo dos totais por competência mensal calculados com laço Python
+sobre NFSeData e com NFSeBatch.totals_by_competencia. Termina com código 1
+se os totais divergirem.
+
+Uso:
+    python benchmarks/batch_model.py --notes 50000
+"""
+
+import argparse
+from dataclasses import replace
+from datetime import timedelta
+import math
+from pathlib import Path
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models.nfse import DEFAULT_PRESTADOR, NFSeData, NFSeRecord, ValoresServico  # noqa: E402
+from models.nfse_batch import VALUE_FIELDS, NFSeBatch  # noqa: E402
+from services.parser import ServimaxParser  # noqa: E402
+from services.pdf_reader import PDFInvoiceReader  # noqa: E402
+
+
+def measure(build: Callable[[], object]) -> Tuple[object, float]:
+    """Constrói o objeto e devolve (objeto, MiB alocados e retidos)."""
+    tracemalloc.start()
+    try:
+        value = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, current / (1 << 20)
+
+
+def naive_totals(notes: List[NFSeData]) -> Dict[str, Dict[str, float]]:
+    groups: Dict[str, List[NFSeData]] = {}
+    for note in notes:
+        groups.setdefault(note.data_emissao.strftime("%Y-%m"), []).append(note)
+    result = {}
+    for key in sorted(groups):
+        totals: Dict[str, float] = {"notas": len(groups[key])}
+        for name in VALUE_FIELDS:
+            totals[name] = round(math.fsum(getattr(note.valores, name) for note in groups[key]), 2)
+        result[key] = totals
+    return result
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--corpus", type=Path, default=ROOT / "pdf")
+    arg_parser.add_argument("--notes", type=int, default=50000)
+    args = arg_parser.parse_args()
+
+    reader = PDFInvoiceReader()
+    parser = ServimaxParser(DEFAULT_PRESTADOR)
+    samples = [parser.parse(reader.read_text(pdf)) for pdf in sorted(args.corpus.glob("*.pdf"))]
+    if not samples:
+        print(f"Nenhum PDF encontrado em {args.corpus}")
+        sys.exit(1)
+
+    def build_data() -> List[NFSeData]:
+        notes = []
+        for index in range(args.notes):
+            sample = samples[index % len(samples)]
+            notes.append(replace(
+                sample,
+                numero=str(int(sample.numero) + index),
+                data_emissao=sample.data_emissao + timedelta(days=index % 365),
+                valores=ValoresServico(*(getattr(sample.valores, name) for name in VALUE_FIELDS)),
+            ))
+        return notes
+
+    notes, data_mib = measure(build_data)
+    records, record_mib = measure(lambda: [NFSeRecord.from_data(note) for note in notes])
+    batch, batch_mib = measure(lambda: NFSeBatch.from_notes(notes))
+
+    start = time.perf_counter()
+    expected = naive_totals(notes)
+    naive_time = time.perf_counter() - start
+    start = time.perf_counter()
+    totals = batch.totals_by_competencia()
+    batch_time = time.perf_counter() - start
+
+    print(f"{args.notes} notas")
+    print(f"list[NFSeData]:   {data_mib:8.2f} MiB")
+    print(f"list[NFSeRecord]: {record_mib:8.2f} MiB (alem das NFSeData de origem)")
+    print(f"NFSeBatch:        {batch_mib:8.2f} MiB")
+    print(f"totais por mes: laco {naive_time * 1000:.1f} ms, NFSeBatch {batch_time * 1000:.1f} ms")
+    if totals != expected:
+        print("Divergencia entre os totais por competencia")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark da leitura rápida (read_text_fast) contra a extração completa.
+
+Mede o tempo de extração de cada PDF do corpus de exemplo nos dois modos e
+confere se o NFSeData obtido pelo caminho rápido é idêntico ao da extração
+completa, contabilizando os arquivos que precisariam de fallback.
+
+Uso:
+    python benchmarks/fast_extraction.py [pasta_pdf] [--repeat N]
+"""
+
+import argparse
+from pathlib import Path
+import statistics
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models.nfse import DEFAULT_PRESTADOR  # noqa: E402
+from services.parser import ServimaxParser  # noqa: E402
+from services.pdf_reader import PDFInvoiceReader  # noqa: E402
+
+
+def _best_of(func, pdf_path: Path, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(pdf_path)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(directory: Path, repeat: int) -> int:
+    reader = PDFInvoiceReader()
+    parser = ServimaxParser(DEFAULT_PRESTADOR)
+    pdf_files = sorted(directory.glob("*.pdf"))
+    if not pdf_files:
+        print(f"Nenhum PDF encontrado em {directory}")
+        return 1
+
+    full_times, fast_times = [], []
+    fallbacks = mismatches = 0
+    for pdf in pdf_files:
+        full_times.append(_best_of(reader.read_text, pdf, repeat))
+        fast_times.append(_best_of(reader.read_text_fast, pdf, repeat))
+        fast_text = reader.read_text_fast(pdf)
+        if parser.missing_fields(fast_text):
+            fallbacks += 1
+        elif parser.parse(fast_text) != parser.parse(reader.read_text(pdf)):
+            mismatches += 1
+            print(f"DIVERGENCIA: {pdf.name}")
+
+    total_full, total_fast = sum(full_times), sum(fast_times)
+    print(f"PDFs: {len(pdf_files)} (melhor de {repeat} execucoes por arquivo)")
+    print(f"{'modo':<10}{'total (s)':>12}{'mediana (ms)':>15}{'max (ms)':>12}")
+    for label, times in (("completo", full_times), ("rapido", fast_times)):
+        print(
+            f"{label:<10}{sum(times):>12.3f}"
+            f"{statistics.median(times) * 1000:>15.1f}{max(times) * 1000:>12.1f}"
+        )
+    print(f"Speedup: {total_full / total_fast:.2f}x")
+    print(f"Fallbacks para extracao completa: {fallbacks}")
+    print(f"Divergencias de NFSeData: {mismatches}")
+    return 1 if mismatches else 0
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("directory", nargs="?", type=Path, default=ROOT / "pdf")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+    sys.exit(run(args.directory, max(1, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
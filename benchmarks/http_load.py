@@ -0,0 +1,152 @@
+"""Teste de carga do serviço HTTP local (extrator_pdf.py serve).
+
+Envia os PDFs do corpus para POST /convert com --concurrency clientes
+simultâneos (uma conexão keep-alive por cliente) até completar --requests
+requisições e informa vazão, latência p50/p90/p99/máx e a contagem por
+código HTTP. Sem --url o serviço é iniciado em uma porta livre e encerrado
+ao final. Confere cada resposta 200 com o CompNfse gerado localmente e
+termina com código 1 em caso de divergência ou de erro diferente de 503.
+
+Uso:
+    python benchmarks/http_load.py --workers 4 --concurrency 16 --requests 500
+    python benchmarks/http_load.py --url http://127.0.0.1:8765 --format json
+"""
+
+import argparse
+from collections import Counter
+import http.client
+import json
+from pathlib import Path
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models.nfse import DEFAULT_PRESTADOR  # noqa: E402
+from services.metrics import _percentile  # noqa: E402
+from services.parser import ServimaxParser  # noqa: E402
+from services.pdf_reader import PDFInvoiceReader  # noqa: E402
+from services.xml_builder import AbrasfXmlBuilder  # noqa: E402
+from services.xml_writer import XML_DECLARATION  # noqa: E402
+
+
+def start_service(workers: int, extra: List[str]) -> Tuple[subprocess.Popen, str]:
+    """Inicia o serviço em uma porta livre e espera ele anunciar o endereço."""
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / "extrator_pdf.py"), "serve", "--port", "0", "--workers", str(workers), *extra],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = process.stdout.readline()
+    if "http://" not in line:
+        process.kill()
+        raise RuntimeError(f"Servico nao iniciou: {line!r}")
+    url = line.split()[2]
+    return process, url.rsplit("/convert", 1)[0]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--corpus", type=Path, default=ROOT / "pdf")
+    arg_parser.add_argument("--url", help="Serviço já em execução (senão um é iniciado)")
+    arg_parser.add_argument("--workers", type=int, default=2, help="Workers do serviço iniciado")
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    arg_parser.add_argument("--requests", type=int, default=200)
+    arg_parser.add_argument("--format", choices=("xml", "json"), default="xml")
+    arg_parser.add_argument("--serve-args", default="", help="Opções extras para o serviço iniciado")
+    args = arg_parser.parse_args()
+
+    pdf_files = sorted(args.corpus.glob("*.pdf"))
+    if not pdf_files:
+        print(f"Nenhum PDF encontrado em {args.corpus}")
+        sys.exit(1)
+    bodies = [pdf.read_bytes() for pdf in pdf_files]
+    expected: List[Optional[bytes]] = [None] * len(pdf_files)
+    if args.format == "xml":
+        reader = PDFInvoiceReader()
+        parser = ServimaxParser(DEFAULT_PRESTADOR)
+        builder = AbrasfXmlBuilder()
+        expected = [
+            XML_DECLARATION + builder.build_comp_nfse_bytes(parser.parse(reader.read_text(pdf)))
+            for pdf in pdf_files
+        ]
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_service(args.workers, args.serve_args.split())
+    address = urlsplit(url)
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    mismatches: List[str] = []
+    lock = threading.Lock()
+    counter = iter(range(args.requests))
+
+    def client() -> None:
+        connection = http.client.HTTPConnection(address.hostname, address.port, timeout=120)
+        try:
+            while True:
+                with lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                item = index % len(bodies)
+                start = time.perf_counter()
+                connection.request(
+                    "POST", f"/convert?format={args.format}", body=bodies[item],
+                    headers={"Content-Type": "application/pdf"},
+                )
+                response = connection.getresponse()
+                payload = response.read()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    statuses[response.status] += 1
+                    if response.status == 200:
+                        latencies.append(elapsed)
+                        if args.format == "xml" and payload != expected[item]:
+                            mismatches.append(pdf_files[item].name)
+                        if args.format == "json" and not json.loads(payload):
+                            mismatches.append(pdf_files[item].name)
+        finally:
+            connection.close()
+
+    try:
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        health: Dict[str, int] = {}
+        connection = http.client.HTTPConnection(address.hostname, address.port, timeout=10)
+        connection.request("GET", "/health")
+        health = json.loads(connection.getresponse().read())
+        connection.close()
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    latencies.sort()
+    print(f"{args.requests} requisicoes, {args.concurrency} clientes, formato {args.format}")
+    print(f"vazao: {len(latencies) / elapsed:.1f} req/s em {elapsed:.2f}s")
+    if latencies:
+        print("latencia ms: " + ", ".join(
+            f"{label} {_percentile(latencies, q) * 1000:.1f}"
+            for label, q in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99), ("max", 1.0))
+        ))
+    print("status: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items())))
+    print(f"lotes: {health.get('batches')} para {health.get('requests')} requisicoes aceitas")
+    if mismatches or set(statuses) - {200, 503}:
+        print(f"Falha: {len(mismatches)} resposta(s) divergente(s), status {dict(statuses)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
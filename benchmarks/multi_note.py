@@ -0,0 +1,126 @@
+"""Memória e tempo da conversão de PDFs com várias notas concatenadas.
+
+Gera PDFs sintéticos com N notas (uma página por nota, com o texto das
+notas do corpus) e mede, com tracemalloc, o pico de memória de:
+
+    - texto inteiro: PDFInvoiceReader.read_text + parse de cada nota
+    - streaming: NFSeConverter com multi_note=True gravando o XML por arquivo
+
+No modo streaming o pico deve ficar praticamente constante com N. Também
+confere que as duas abordagens produzem as mesmas notas e termina com código
+1 se divergirem.
+
+Uso:
+    python benchmarks/multi_note.py
+    python benchmarks/multi_note.py --notes 50,200,800
+"""
+
+import argparse
+from pathlib import Path
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from controllers.converter import NFSeConverter  # noqa: E402
+from models.nfse import DEFAULT_PRESTADOR  # noqa: E402
+from services.parser import ServimaxParser, split_notes  # noqa: E402
+from services.pdf_reader import PDFInvoiceReader  # noqa: E402
+from services.xml_builder import AbrasfXmlBuilder  # noqa: E402
+
+PAGE_HEIGHT = 842
+LEADING = 7
+
+
+def write_text_pdf(target: Path, pages: Sequence[str]) -> None:
+    """Grava um PDF mínimo com uma página de texto (Helvetica) por item."""
+    objects: List[bytes] = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                                      b"/Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for text in pages:
+        lines = [line for line in text.splitlines() if line.strip()]
+        ops = [f"BT /F1 6 Tf {LEADING} TL 20 {PAGE_HEIGHT - 20} Td".encode()]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            ops.append(b"(" + escaped.encode("cp1252", "replace") + b") '")
+        ops.append(b"ET")
+        stream = b"\n".join(ops)
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 %d] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (PAGE_HEIGHT, content_ref)
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    with open(target, "wb") as handle:
+        handle.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(handle.tell())
+            handle.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = handle.tell()
+        handle.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            handle.write(b"%010d 00000 n \n" % offset)
+        handle.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def peak_memory(func: Callable[[], object]) -> Tuple[object, float, float]:
+    """Executa func e devolve (resultado, pico em MiB, segundos)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / (1 << 20), elapsed
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--corpus", type=Path, default=ROOT / "pdf")
+    arg_parser.add_argument("--notes", default="10,50,200", help="Quantidades de notas por PDF")
+    args = arg_parser.parse_args()
+
+    reader = PDFInvoiceReader()
+    parser = ServimaxParser(DEFAULT_PRESTADOR)
+    builder = AbrasfXmlBuilder()
+    texts = [reader.read_text(pdf) for pdf in sorted(args.corpus.glob("*.pdf"))]
+    if not texts:
+        print(f"Nenhum PDF encontrado em {args.corpus}")
+        sys.exit(1)
+    converter = NFSeConverter(reader, parser, builder, multi_note=True)
+
+    print(f"{'notas':>6}{'PDF MiB':>9}{'texto MiB':>11}{'texto s':>9}{'stream MiB':>12}{'stream s':>10}")
+    with tempfile.TemporaryDirectory(prefix="nfse_multi_") as tmp:
+        workdir = Path(tmp)
+        for count in sorted({int(item) for item in args.notes.split(",") if item.strip()}):
+            pdf = workdir / f"multi_{count}.pdf"
+            write_text_pdf(pdf, [texts[index % len(texts)] for index in range(count)])
+
+            def whole_text() -> List[bytes]:
+                # read_text termina cada página com "\f".
+                pages = [page + "\f" for page in reader.read_text(pdf).split("\f")[:-1]]
+                return [builder.build_comp_nfse_bytes(parser.parse(note)) for note in split_notes(pages)]
+
+            expected, whole_peak, whole_time = peak_memory(whole_text)
+            output, stream_peak, stream_time = peak_memory(lambda: converter._convert_per_file(pdf, workdir))
+            document = output.read_bytes()
+            if len(expected) != count or b"".join(expected) not in document:
+                print(f"Divergencia com {count} notas: {len(expected)} nota(s) no texto inteiro")
+                sys.exit(1)
+            print(f"{count:>6}{pdf.stat().st_size / (1 << 20):>9.2f}{whole_peak:>11.2f}{whole_time:>9.2f}"
+                  f"{stream_peak:>12.2f}{stream_time:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
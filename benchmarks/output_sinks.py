@@ -0,0 +1,89 @@
+"""Tempo de gravação e arquivos gerados por destino de saída.
+
+Converte os PDFs do corpus uma vez, replica os CompNfse até --notes notas e
+mede só a gravação em:
+
+    - pasta:       um XML por nota (modo por arquivo, ListaNfseWriter)
+    - zip:         ZipArchiveSink com deflate
+    - zip stored:  ZipArchiveSink sem compressão
+    - partes:      RollingListaNfseWriter com --split-notes notas por parte
+    - partes gzip: idem, em gzip
+
+Uso:
+    python benchmarks/output_sinks.py --notes 20000 --split-notes 5000
+"""
+
+import argparse
+from pathlib import Path
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models.nfse import DEFAULT_PRESTADOR  # noqa: E402
+from services.output_sinks import RollingListaNfseWriter, ZipArchiveSink  # noqa: E402
+from services.parser import ServimaxParser  # noqa: E402
+from services.pdf_reader import PDFInvoiceReader  # noqa: E402
+from services.xml_builder import AbrasfXmlBuilder  # noqa: E402
+from services.xml_writer import ListaNfseWriter, OutputSink  # noqa: E402
+
+
+def write_directory(directory: Path, fragments: List[bytes]) -> None:
+    directory.mkdir()
+    for index, fragment in enumerate(fragments):
+        with ListaNfseWriter(directory / f"nota_{index:06d}.xml") as writer:
+            writer.write_bytes(fragment)
+
+
+def write_sink(sink: OutputSink, fragments: List[bytes]) -> None:
+    with sink as writer:
+        for index, fragment in enumerate(fragments):
+            writer.write_bytes(fragment, source=Path(f"nota_{index:06d}.pdf"))
+
+
+def measure(label: str, run: Callable[[Path], None]) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / "saida"
+        start = time.perf_counter()
+        run(target)
+        elapsed = time.perf_counter() - start
+        files = [path for path in Path(tmp).rglob("*") if path.is_file()]
+        size = sum(path.stat().st_size for path in files)
+        print(f"{label:<13}{elapsed * 1000:>12.1f}{len(files):>10}{size / 1024 / 1024:>12.2f}")
+        shutil.rmtree(target, ignore_errors=True)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("directory", nargs="?", type=Path, default=ROOT / "pdf")
+    arg_parser.add_argument("--notes", type=int, default=20000)
+    arg_parser.add_argument("--split-notes", type=int, default=5000)
+    args = arg_parser.parse_args()
+
+    reader = PDFInvoiceReader()
+    parser = ServimaxParser(DEFAULT_PRESTADOR)
+    builder = AbrasfXmlBuilder()
+    corpus = [builder.build_comp_nfse_bytes(parser.parse(reader.read_text(pdf)))
+              for pdf in sorted(args.directory.glob("*.pdf"))]
+    if not corpus:
+        print(f"Nenhum PDF encontrado em {args.directory}")
+        sys.exit(1)
+    fragments = [corpus[index % len(corpus)] for index in range(args.notes)]
+
+    print(f"{args.notes} notas")
+    print(f"{'destino':<13}{'tempo (ms)':>12}{'arquivos':>10}{'MiB':>12}")
+    measure("pasta", lambda target: write_directory(target, fragments))
+    measure("zip", lambda target: write_sink(ZipArchiveSink(target / "notas.zip"), fragments))
+    measure("zip stored", lambda target: write_sink(ZipArchiveSink(target / "notas.zip", None), fragments))
+    measure("partes", lambda target: write_sink(
+        RollingListaNfseWriter(target / "lote.xml", max_notes=args.split_notes), fragments))
+    measure("partes gzip", lambda target: write_sink(
+        RollingListaNfseWriter(target / "lote.xml", max_notes=args.split_notes, compresslevel=6), fragments))
+
+
+if __name__ == "__main__":
+    main()
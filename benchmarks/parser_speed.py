@@ -0,0 +1,88 @@
+"""Micro-benchmark do ServimaxParser contra a implementação anterior.
+
+Extrai uma vez o texto de cada PDF do corpus (completo e leitura rápida) e
+confere o ServimaxParser contra o MultiSearchServimaxParser, cópia do parse
+original: no texto completo os dois devem produzir o mesmo NFSeData; no da
+leitura rápida, que o parse original não conhecia, o ServimaxParser deve
+produzir o mesmo NFSeData que o original produz com o texto completo
+(quando não há campo ausente; senão o conversor recorre ao texto completo).
+Depois mede o tempo médio de parse por documento.
+
+Uso:
+    python benchmarks/parser_speed.py [pasta_pdf] [--number N] [--repeat N]
+"""
+
+import argparse
+from pathlib import Path
+import sys
+import timeit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models.nfse import DEFAULT_PRESTADOR  # noqa: E402
+from services.parser import MultiSearchServimaxParser, ServimaxParser  # noqa: E402
+from services.pdf_reader import PDFInvoiceReader  # noqa: E402
+
+
+def load_texts(directory: Path):
+    """Lista (nome, texto, texto completo do mesmo PDF) por texto extraído."""
+    reader = PDFInvoiceReader()
+    texts = []
+    for pdf in sorted(directory.glob("*.pdf")):
+        full = reader.read_text(pdf)
+        texts.append((pdf.name, full, full))
+        texts.append((f"{pdf.name} (rapido)", reader.read_text_fast(pdf), full))
+    return texts
+
+
+def mismatches(current: ServimaxParser, reference: MultiSearchServimaxParser, texts) -> list:
+    names = []
+    for name, content, full in texts:
+        if content is not full and current.missing_fields(content):
+            continue
+        if current.parse(content) != reference.parse(full):
+            names.append(name)
+    return names
+
+
+def per_document_us(parser: ServimaxParser, texts, number: int, repeat: int) -> float:
+    contents = [content for _, content, _ in texts]
+    best = min(timeit.repeat(lambda: [parser.parse(c) for c in contents], number=number, repeat=repeat))
+    return best / number / len(contents) * 1e6
+
+
+def run(directory: Path, number: int, repeat: int) -> int:
+    texts = load_texts(directory)
+    if not texts:
+        print(f"Nenhum PDF encontrado em {directory}")
+        return 1
+    current = ServimaxParser(DEFAULT_PRESTADOR)
+    reference = MultiSearchServimaxParser(DEFAULT_PRESTADOR)
+
+    divergent = mismatches(current, reference, texts)
+    for name in divergent:
+        print(f"DIVERGENCIA: {name}")
+
+    reference_us = per_document_us(reference, texts, number, repeat)
+    current_us = per_document_us(current, texts, number, repeat)
+    print(f"Textos: {len(texts)} ({number} x {repeat} execucoes)")
+    print(f"{'parser':<28}{'us/documento':>14}")
+    print(f"{'MultiSearchServimaxParser':<28}{reference_us:>14.1f}")
+    print(f"{'ServimaxParser':<28}{current_us:>14.1f}")
+    print(f"Speedup: {reference_us / current_us:.2f}x")
+    print(f"Divergencias de NFSeData: {len(divergent)}")
+    return 1 if divergent else 0
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("directory", nargs="?", type=Path, default=ROOT / "pdf")
+    arg_parser.add_argument("--number", type=int, default=20)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+    sys.exit(run(args.directory, max(1, args.number), max(1, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
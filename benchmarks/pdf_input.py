@@ -0,0 +1,104 @@
+"""Benchmark das origens de PDF do leitor (services.pdf_source).
+
+Compara a leitura por caminho com open() (comportamento anterior) com a
+leitura mapeada em memória, a partir de bytes e de membros de zip
+armazenados e comprimidos, em duas medidas: só a estrutura do PDF (xref,
+objetos e conteúdo das páginas, onde pesa o acesso ao arquivo) e a extração
+completa de texto. Confere que todas as origens produzem o mesmo texto.
+
+Uso:
+    python benchmarks/pdf_input.py [pasta_pdf] [--repeat N]
+"""
+
+import argparse
+from pathlib import Path
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+import zipfile
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services.pdf_reader import PDFInvoiceReader  # noqa: E402
+from services.pdf_source import PDFSource, list_zip_pdfs, open_pdf  # noqa: E402
+
+
+def _page_bytes(fp) -> int:
+    from pdfminer.pdfpage import PDFPage
+
+    return sum(len(stream.get_data()) for page in PDFPage.get_pages(fp) for stream in page.contents)
+
+
+def _structure_open(source: PDFSource) -> int:
+    with open(source, "rb") as fp:
+        return _page_bytes(fp)
+
+
+def _structure(source: PDFSource) -> int:
+    with open_pdf(source) as fp:
+        return _page_bytes(fp)
+
+
+def _total(func: Callable, sources: List[PDFSource], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for source in sources:
+            func(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(directory: Path, repeat: int) -> int:
+    from pdfminer.high_level import extract_text
+
+    pdf_files = sorted(directory.glob("*.pdf"))
+    if not pdf_files:
+        print(f"Nenhum PDF encontrado em {directory}")
+        return 1
+    reader = PDFInvoiceReader()
+    reader.preload()
+    with tempfile.TemporaryDirectory() as tmp:
+        archives = {}
+        for label, compression in (("zip armazenado", zipfile.ZIP_STORED), ("zip comprimido", zipfile.ZIP_DEFLATED)):
+            archive = Path(tmp) / f"{compression}.zip"
+            with zipfile.ZipFile(archive, "w", compression) as zip_file:
+                for pdf in pdf_files:
+                    zip_file.write(pdf, pdf.name)
+            archives[label] = list_zip_pdfs(archive)
+        contents = [pdf.read_bytes() for pdf in pdf_files]
+        inputs: Dict[str, List[PDFSource]] = {"mmap": pdf_files, "bytes": contents, **archives}
+
+        expected = [extract_text(str(pdf), laparams=reader.laparams) for pdf in pdf_files]
+        mismatches = 0
+        for label, sources in inputs.items():
+            for pdf, source, text in zip(pdf_files, sources, expected):
+                if reader.read_text(source) != text:
+                    mismatches += 1
+                    print(f"DIVERGENCIA ({label}): {pdf.name}")
+
+        baseline_structure = _total(_structure_open, pdf_files, repeat)
+        baseline_text = _total(lambda pdf: extract_text(str(pdf), laparams=reader.laparams), pdf_files, repeat)
+        print(f"PDFs: {len(pdf_files)} (melhor de {repeat} execucoes do lote)")
+        print(f"{'origem':<16}{'estrutura (ms)':>16}{'texto (ms)':>12}{'texto/base':>12}")
+        print(f"{'open (base)':<16}{baseline_structure * 1000:>16.1f}{baseline_text * 1000:>12.1f}{1:>12.2f}")
+        for label, sources in inputs.items():
+            structure = _total(_structure, sources, repeat)
+            text = _total(reader.read_text, sources, repeat)
+            print(f"{label:<16}{structure * 1000:>16.1f}{text * 1000:>12.1f}{text / baseline_text:>12.2f}")
+    print(f"Divergencias de texto: {mismatches}")
+    return 1 if mismatches else 0
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("directory", nargs="?", type=Path, default=ROOT / "pdf")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+    sys.exit(run(args.directory, max(1, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Custo de IPC por nota das formas de devolver resultados dos workers.
+
+Um processo filho faz o papel do worker do pool: recebe as notas já
+extraídas (fora da medição), prepara o resultado de cada uma e o envia ao
+processo principal em lotes de --chunk notas. É medido o tempo serial no
+processo principal (recebimento, desserialização e o que falta para a nota
+chegar ao ListaNfse) e o tempo total por nota, além dos bytes transferidos:
+
+    - element:  ET.Element do CompNfse serializado com pickle; o principal
+                ainda precisa gerar o XML (ET.tostring)
+    - fragment: ConvertedNote com o CompNfse já em bytes (transporte atual
+                do modo consolidado); o principal só concatena
+    - shm:      fragmentos copiados para um SharedMemory por lote; pelo pipe
+                seguem só o nome do bloco e os deslocamentos
+    - data:     NFSeData (dataclass) com pickle, como em extract_batch
+    - record:   NFSeRecord (NamedTuple) com pickle
+
+Uso:
+    python benchmarks/result_transport.py --notes 5000 --chunk 16
+"""
+
+import argparse
+from multiprocessing import Pipe, Process, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+import pickle
+import sys
+import time
+from typing import List
+import xml.etree.ElementTree as ET
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models.conversion import ConvertedNote  # noqa: E402
+from models.nfse import DEFAULT_PRESTADOR, NFSeData, NFSeRecord  # noqa: E402
+from services.parser import ServimaxParser  # noqa: E402
+from services.pdf_reader import PDFInvoiceReader  # noqa: E402
+from services.xml_builder import AbrasfXmlBuilder  # noqa: E402
+
+MODES = ("element", "fragment", "shm", "data", "record")
+
+
+def _payloads(mode: str, notes: List[NFSeData]) -> list:
+    builder = AbrasfXmlBuilder()
+    if mode == "element":
+        return [builder.build_comp_nfse(data) for data in notes]
+    if mode in ("fragment", "shm"):
+        return [
+            ConvertedNote(builder.build_comp_nfse_bytes(data), None, (data.prestador.cnpj, data.numero, ""))
+            for data in notes
+        ]
+    if mode == "record":
+        return [NFSeRecord.from_data(data) for data in notes]
+    return list(notes)
+
+
+def _worker(connection, mode: str, notes: List[NFSeData], chunk: int) -> None:
+    # O resultado é preparado antes do sinal de início: em um pool esse
+    # trabalho é paralelo, só o envio e o que vem depois são seriais.
+    payloads = _payloads(mode, notes)
+    connection.send("pronto")
+    connection.recv()
+    sent = 0
+    for start in range(0, len(payloads), chunk):
+        items = payloads[start:start + chunk]
+        if mode == "shm":
+            fragments = [note.fragment for note in items]
+            block = SharedMemory(create=True, size=sum(map(len, fragments)))
+            offsets, position = [], 0
+            for fragment in fragments:
+                block.buf[position:position + len(fragment)] = fragment
+                position += len(fragment)
+                offsets.append(position)
+            message = (block.name, offsets)
+            block.close()
+            # Quem apaga o bloco é o processo principal, depois de copiá-lo.
+            resource_tracker.unregister(block._name, "shared_memory")
+        else:
+            message = items
+        data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        sent += len(data)
+        connection.send_bytes(data)
+    connection.send_bytes(pickle.dumps(None))
+    connection.send(sent)
+
+
+def measure(mode: str, notes: List[NFSeData], chunk: int) -> dict:
+    parent, child = Pipe()
+    process = Process(target=_worker, args=(child, mode, notes, chunk))
+    process.start()
+    parent.recv()
+    output: List[bytes] = []
+    serial = 0.0
+    start = time.perf_counter()
+    parent.send("inicio")
+    while True:
+        data = parent.recv_bytes()
+        step = time.perf_counter()
+        message = pickle.loads(data)
+        if message is None:
+            break
+        if mode == "element":
+            output.extend(ET.tostring(element, encoding="utf-8", xml_declaration=False) for element in message)
+        elif mode == "fragment":
+            output.extend(note.fragment for note in message)
+        elif mode == "shm":
+            name, offsets = message
+            block = SharedMemory(name=name)
+            previous = 0
+            for offset in offsets:
+                output.append(bytes(block.buf[previous:offset]))
+                previous = offset
+            block.close()
+            block.unlink()
+        else:
+            output.extend(message)
+        serial += time.perf_counter() - step
+    elapsed = time.perf_counter() - start
+    sent = parent.recv()
+    process.join()
+    return {"serial": serial, "elapsed": elapsed, "bytes": sent, "items": len(output)}
+
+
+def load_notes(directory: Path, count: int) -> List[NFSeData]:
+    reader = PDFInvoiceReader()
+    parser = ServimaxParser(DEFAULT_PRESTADOR)
+    corpus = [parser.parse(reader.read_text(pdf)) for pdf in sorted(directory.glob("*.pdf"))]
+    if not corpus:
+        raise SystemExit(f"Nenhum PDF encontrado em {directory}")
+    return [corpus[index % len(corpus)] for index in range(count)]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("directory", nargs="?", type=Path, default=ROOT / "pdf")
+    arg_parser.add_argument("--notes", type=int, default=5000)
+    arg_parser.add_argument("--chunk", type=int, default=16, help="Notas por mensagem (lote do pool)")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    notes = load_notes(args.directory, args.notes)
+    print(f"{args.notes} notas, {args.chunk} por mensagem (melhor de {args.repeat})")
+    print(f"{'modo':<10}{'serial us/nota':>16}{'total us/nota':>15}{'bytes/nota':>12}")
+    for mode in MODES:
+        runs = [measure(mode, notes, args.chunk) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["serial"])
+        assert best["items"] == args.notes
+        print(
+            f"{mode:<10}{best['serial'] / args.notes * 1e6:>16.1f}"
+            f"{best['elapsed'] / args.notes * 1e6:>15.1f}{best['bytes'] / args.notes:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
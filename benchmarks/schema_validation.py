@@ -0,0 +1,113 @@
+"""Custo da validação XSD por nota (services.xml_validator, requer lxml).
+
+Mede, para os CompNfse do corpus replicados até --notes notas:
+
+    - compilação do XSD (feita uma vez por processo);
+    - build da nota (build_comp_nfse_bytes), como referência;
+    - validação com o esquema compilado em cache (modo full);
+    - validação compilando o XSD a cada nota (sem cache);
+    - modo sample com --sample-rate (sorteio + validação das sorteadas).
+
+Confere também que todas as notas do corpus passam no XSD.
+
+Uso:
+    python benchmarks/schema_validation.py [pasta_pdf] --notes 5000 --sample-rate 0.05
+"""
+
+import argparse
+from dataclasses import replace
+from pathlib import Path
+import sys
+import time
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models.conversion import ValidationPolicy  # noqa: E402
+from models.nfse import DEFAULT_PRESTADOR, NFSeData  # noqa: E402
+from services import xml_validator  # noqa: E402
+from services.parser import ServimaxParser  # noqa: E402
+from services.pdf_reader import PDFInvoiceReader  # noqa: E402
+from services.xml_builder import AbrasfXmlBuilder  # noqa: E402
+
+
+def _best(func: Callable[[], None], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _compile() -> None:
+    xml_validator._schemas.clear()
+    xml_validator.load_schema()
+
+
+def run(notes: List[NFSeData], sample_rate: float, repeat: int) -> int:
+    builder = AbrasfXmlBuilder()
+    fragments = [builder.build_comp_nfse_bytes(data) for data in notes]
+    keys = [(data.prestador.cnpj, data.numero, data.codigo_verificacao) for data in notes]
+    full = xml_validator.NoteValidator(ValidationPolicy())
+    sample = xml_validator.NoteValidator(ValidationPolicy(mode=ValidationPolicy.SAMPLE, sample_rate=sample_rate))
+
+    invalid = 0
+    for fragment in fragments:
+        try:
+            full.validate(fragment)
+        except xml_validator.SchemaValidationError as exc:
+            invalid += 1
+            print(f"INVALIDA: {exc}")
+
+    def validate_sample() -> None:
+        for key, fragment in zip(keys, fragments):
+            if sample.selects(key):
+                sample.validate(fragment)
+
+    def validate_uncached() -> None:
+        # Só algumas notas, para não alongar a medição.
+        for fragment in fragments[:50]:
+            _compile()
+            xml_validator.NoteValidator(ValidationPolicy()).validate(fragment)
+
+    count = len(notes)
+    compile_time = _best(_compile, repeat)
+    results = [
+        ("build (referencia)", _best(lambda: [builder.build_comp_nfse_bytes(data) for data in notes], repeat), count),
+        ("validate full", _best(lambda: [full.validate(fragment) for fragment in fragments], repeat), count),
+        ("validate sem cache", _best(validate_uncached, 1), min(count, 50)),
+        (f"validate sample {sample_rate:g}", _best(validate_sample, repeat), count),
+    ]
+    selected = sum(map(sample.selects, keys))
+    print(f"{count} notas; compilacao do XSD: {compile_time * 1000:.2f} ms")
+    print(f"{'caminho':<24}{'us/nota':>10}")
+    for label, elapsed, items in results:
+        print(f"{label:<24}{elapsed / items * 1e6:>10.1f}")
+    print(f"Notas sorteadas no modo sample: {selected} ({selected / count:.1%})")
+    print(f"Notas invalidas: {invalid}")
+    return 1 if invalid else 0
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("directory", nargs="?", type=Path, default=ROOT / "pdf")
+    arg_parser.add_argument("--notes", type=int, default=5000)
+    arg_parser.add_argument("--sample-rate", type=float, default=0.05)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    reader = PDFInvoiceReader()
+    parser = ServimaxParser(DEFAULT_PRESTADOR)
+    corpus = [parser.parse(reader.read_text(pdf)) for pdf in sorted(args.directory.glob("*.pdf"))]
+    if not corpus:
+        print(f"Nenhum PDF encontrado em {args.directory}")
+        sys.exit(1)
+    # Números distintos: o sorteio do modo sample depende da chave da nota.
+    notes = [replace(corpus[index % len(corpus)], numero=str(100000 + index)) for index in range(args.notes)]
+    sys.exit(run(notes, args.sample_rate, max(1, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Verificação do tempo de inicialização do conversor.
+
+Executa `python -X importtime -c "import extrator_pdf"` em um processo novo,
+soma o tempo cumulativo de importação do módulo de entrada e confere que
+dependências pesadas (tkinter, pdfminer, lxml, pyarrow, asyncio, sqlite3,
+concurrent.futures, ElementTree) não são carregadas antes do primeiro uso.
+Termina com código 1 se o tempo passar de --budget-ms ou se algum desses
+módulos aparecer.
+
+Uso:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --budget-ms 150 --repeat 5
+"""
+
+import argparse
+from pathlib import Path
+import subprocess
+import sys
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_MODULE = "extrator_pdf"
+DEFERRED_MODULES = (
+    "tkinter",
+    "pdfminer",
+    "lxml",
+    "pyarrow",
+    "asyncio",
+    "sqlite3",
+    "concurrent.futures",
+    "xml.etree.ElementTree",
+    "argparse",
+)
+
+
+def measure_import(module: str) -> Tuple[float, List[str]]:
+    """Importa module em um interpretador novo.
+
+    Returns:
+        Tempo cumulativo de importação em milissegundos e a lista de
+        módulos de DEFERRED_MODULES que foram carregados
+    """
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative = None
+    for line in result.stderr.splitlines():
+        # Formato: "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        fields = [field.strip() for field in line[len("import time:"):].split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            cumulative = int(fields[1])
+    if cumulative is None:
+        raise RuntimeError(f"Tempo de importacao de {module} nao encontrado na saida de -X importtime")
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return cumulative / 1000, loaded
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--budget-ms", type=float, default=150.0,
+                            help="Tempo máximo de importação em ms (padrão 150)")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    timings = []
+    loaded: List[str] = []
+    for _ in range(max(1, args.repeat)):
+        elapsed, loaded = measure_import(ENTRY_MODULE)
+        timings.append(elapsed)
+    best = min(timings)
+    print(f"import {ENTRY_MODULE}: {best:.1f} ms (melhor de {len(timings)}, limite {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if best > args.budget_ms:
+        print(f"Tempo de inicializacao acima do limite: {best:.1f} ms > {args.budget_ms:.0f} ms")
+        failed = True
+    if loaded:
+        print(f"Modulos que deveriam ser adiados foram importados: {', '.join(loaded)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Suíte de benchmarks do conversor sobre o corpus de exemplo.
+
+Mede cada etapa isolada (PDFInvoiceReader.read_text, ServimaxParser.parse,
+AbrasfXmlBuilder.build_comp_nfse e build_comp_nfse_bytes), o cache de texto
+frio e quente e convert_directory completo nos modos por arquivo e
+consolidado com 1..N workers. Opcionalmente replica o corpus até --scale arquivos (links físicos
+quando possível) para medir lotes grandes.
+
+O resultado é gravado em JSON; com --baseline cada medição é comparada ao
+resultado de uma execução anterior e o processo termina com código 1 se
+alguma piorar mais que --threshold.
+
+Uso:
+    python benchmarks/suite.py --output resultado.json
+    python benchmarks/suite.py --baseline resultado.json --threshold 0.25
+    python benchmarks/suite.py --workers 1,2,4 --scale 10000
+"""
+
+import argparse
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pdfminer  # noqa: E402
+
+from controllers.converter import NFSeConverter  # noqa: E402
+from models.nfse import DEFAULT_PRESTADOR  # noqa: E402
+from services.parser import ServimaxParser  # noqa: E402
+from services.pdf_reader import CachedPDFInvoiceReader, PDFInvoiceReader  # noqa: E402
+from services.text_cache import PDFTextCache  # noqa: E402
+from services.xml_builder import AbrasfXmlBuilder  # noqa: E402
+
+RESULT_FORMAT = 1
+
+
+class Suite:
+    """Executa os benchmarks e acumula os resultados por nome."""
+    def __init__(self, corpus: Path, repeat: int) -> None:
+        self.corpus = corpus
+        self.repeat = repeat
+        self.pdf_files = sorted(corpus.glob("*.pdf"))
+        self.results: Dict[str, dict] = {}
+
+    def measure(self, name: str, items: int, func: Callable[[], None], repeat: Optional[int] = None) -> None:
+        """Executa func repetidas vezes e guarda o melhor tempo por item."""
+        timings = []
+        for _ in range(repeat or self.repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        self.results[name] = {"items": items, "seconds": best, "per_item": best / items}
+        print(f"{name:<44}{items:>7}{best:>11.3f}s{best / items * 1000:>11.3f} ms/item", flush=True)
+
+    def run_stages(self) -> None:
+        reader = PDFInvoiceReader()
+        parser = ServimaxParser(DEFAULT_PRESTADOR)
+        builder = AbrasfXmlBuilder()
+        texts = [reader.read_text(pdf) for pdf in self.pdf_files]
+        notes = [parser.parse(text) for text in texts]
+        count = len(self.pdf_files)
+
+        self.measure("read_text", count, lambda: [reader.read_text(pdf) for pdf in self.pdf_files])
+        self.measure("read_text_fast", count, lambda: [reader.read_text_fast(pdf) for pdf in self.pdf_files])
+        self.measure("parse", count, lambda: [parser.parse(text) for text in texts], repeat=self.repeat * 5)
+        self.measure("build_comp_nfse", count, lambda: [builder.build_comp_nfse(n) for n in notes],
+                     repeat=self.repeat * 5)
+        self.measure("build_comp_nfse_bytes", count, lambda: [builder.build_comp_nfse_bytes(n) for n in notes],
+                     repeat=self.repeat * 5)
+
+    def run_cache(self, workdir: Path) -> None:
+        cache_path = workdir / "cache.sqlite"
+        count = len(self.pdf_files)
+
+        def cold() -> None:
+            cache_path.unlink(missing_ok=True)
+            reader = CachedPDFInvoiceReader(PDFTextCache(cache_path))
+            for pdf in self.pdf_files:
+                reader.read_text(pdf)
+
+        self.measure("cache_read_cold", count, cold)
+        warm_reader = CachedPDFInvoiceReader(PDFTextCache(cache_path))
+        self.measure("cache_read_warm", count, lambda: [warm_reader.read_text(pdf) for pdf in self.pdf_files])
+
+    def run_convert(self, label: str, corpus: Path, count: int, workers: Sequence[int], workdir: Path,
+                    repeat: int) -> None:
+        for worker_count in workers:
+            converter = _create_converter()
+            per_file_dir = corpus / "PDF_Convertido"
+            self.measure(
+                f"{label}_per_file_w{worker_count}", count,
+                lambda: converter.convert_directory(corpus, workers=worker_count), repeat=repeat,
+            )
+            shutil.rmtree(per_file_dir, ignore_errors=True)
+            self.measure(
+                f"{label}_consolidated_w{worker_count}", count,
+                lambda: converter.convert_directory(corpus, workdir / "consolidado.xml", workers=worker_count),
+                repeat=repeat,
+            )
+
+        # Cache quente: uma execução de aquecimento e depois a medição.
+        cache_path = workdir / f"{label}_cache.sqlite"
+        cached = _create_converter(cache_path)
+        cached.convert_directory(corpus, workdir / "consolidado.xml", workers=max(workers))
+        self.measure(
+            f"{label}_consolidated_w{max(workers)}_cache_warm", count,
+            lambda: cached.convert_directory(corpus, workdir / "consolidado.xml", workers=max(workers)),
+            repeat=repeat,
+        )
+
+    def run(self, workers: Sequence[int], scale: int) -> None:
+        print(f"{'benchmark':<44}{'itens':>7}{'total':>12}{'por item':>20}")
+        with tempfile.TemporaryDirectory(prefix="nfse_bench_") as tmp:
+            workdir = Path(tmp)
+            self.run_stages()
+            self.run_cache(workdir)
+            corpus = workdir / "corpus"
+            _replicate(self.pdf_files, corpus, len(self.pdf_files))
+            self.run_convert("convert", corpus, len(self.pdf_files), workers, workdir, self.repeat)
+            if scale:
+                scaled = workdir / f"scaled{scale}"
+                _replicate(self.pdf_files, scaled, scale)
+                self.run_convert(f"scaled{scale}", scaled, scale, workers, workdir, repeat=1)
+
+    def to_json(self) -> dict:
+        return {
+            "format": RESULT_FORMAT,
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "pdfminer": pdfminer.__version__,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "corpus_files": len(self.pdf_files),
+            },
+            "results": self.results,
+        }
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Compara o tempo por item com a linha de base.
+
+    Returns:
+        Nomes dos benchmarks que pioraram mais que threshold (fração)
+    """
+    regressions = []
+    print(f"\n{'benchmark':<44}{'base ms':>10}{'atual ms':>10}{'variacao':>10}")
+    for name, result in current.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["per_item"], result["per_item"]
+        change = after / before - 1 if before > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSAO"
+        print(f"{name:<44}{before * 1000:>10.3f}{after * 1000:>10.3f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def _create_converter(cache_path: Optional[Path] = None) -> NFSeConverter:
+    if cache_path:
+        reader = CachedPDFInvoiceReader(PDFTextCache(cache_path))
+    else:
+        reader = PDFInvoiceReader()
+    return NFSeConverter(reader, ServimaxParser(DEFAULT_PRESTADOR), AbrasfXmlBuilder())
+
+
+def _replicate(pdf_files: Sequence[Path], target: Path, count: int) -> None:
+    """Cria count PDFs em target repetindo o corpus, com links físicos se possível."""
+    target.mkdir(parents=True, exist_ok=True)
+    for index in range(count):
+        source = pdf_files[index % len(pdf_files)]
+        destination = target / f"{index:06d} - {source.name}"
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)
+
+
+def _parse_workers(value: str) -> List[int]:
+    workers = sorted({int(item) for item in value.split(",") if item.strip()})
+    if not workers or workers[0] < 1:
+        raise argparse.ArgumentTypeError(f"Lista de workers invalida: {value}")
+    return workers
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--corpus", type=Path, default=ROOT / "pdf")
+    arg_parser.add_argument("--workers", type=_parse_workers, default=[1, os.cpu_count() or 1])
+    arg_parser.add_argument("--scale", type=int, default=0, help="Tamanho do corpus replicado (0 = não gera)")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--output", type=Path, help="Arquivo JSON com os resultados")
+    arg_parser.add_argument("--baseline", type=Path, help="Resultado anterior para comparação")
+    arg_parser.add_argument("--threshold", type=float, default=0.25,
+                            help="Piora máxima tolerada por item (fração, padrão 0.25)")
+    args = arg_parser.parse_args()
+
+    suite = Suite(args.corpus, max(1, args.repeat))
+    if not suite.pdf_files:
+        print(f"Nenhum PDF encontrado em {args.corpus}")
+        sys.exit(1)
+    suite.run(args.workers, max(0, args.scale))
+    payload = suite.to_json()
+    if args.output:
+        args.output.write_text(json.dumps(payload, indent=1, sort_keys=True), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(payload["results"], baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) acima do limite de {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
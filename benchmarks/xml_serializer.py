@@ -0,0 +1,126 @@
+"""Confere e mede o serializador de bytes do AbrasfXmlBuilder.
+
+Para cada PDF do corpus (e para notas sintéticas com caracteres que exigem
+escape, campos vazios, acentos e um segundo prestador) compara
+build_comp_nfse_bytes com a serialização por ElementTree de
+build_comp_nfse, byte a byte, tanto do fragmento isolado quanto do
+ListaNfse completo gravado por ListaNfseWriter. Termina com código 1 se
+alguma saída divergir; depois mede o tempo por nota dos dois caminhos.
+
+Uso:
+    python benchmarks/xml_serializer.py
+    python benchmarks/xml_serializer.py --corpus pdf --repeat 20
+"""
+
+import argparse
+from dataclasses import replace
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+import sys
+import tempfile
+import time
+from typing import Callable, List, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import xml.etree.ElementTree as ET  # noqa: E402
+
+from models.nfse import DEFAULT_PRESTADOR, NFSeData, ValoresServico  # noqa: E402
+from services.parser import ServimaxParser  # noqa: E402
+from services.pdf_reader import PDFInvoiceReader  # noqa: E402
+from services.xml_builder import AbrasfXmlBuilder  # noqa: E402
+from services.xml_writer import ListaNfseWriter  # noqa: E402
+
+
+def synthetic_notes() -> List[NFSeData]:
+    """Notas que exercitam escape, elementos vazios e troca de prestador."""
+    other = replace(
+        DEFAULT_PRESTADOR,
+        cnpj="11222333000181",
+        razao_social='ACME & FILHOS <"LTDA">',
+        complemento="",
+        bairro="SÃO JOSÉ\tCENTRO",
+    )
+    base = NFSeData(
+        numero="298292",
+        codigo_verificacao="AbC123",
+        data_emissao=datetime(2024, 1, 31, 23, 59, 58),
+        valores=ValoresServico(1347.42, 8.76, 40.42, 13.47, 20.21, 0.0, 67.37),
+        prestador=DEFAULT_PRESTADOR,
+    )
+    return [
+        base,
+        replace(base, prestador=other),
+        replace(base, numero='1"2\r\n3\t<&>', discriminacao="Serviços & <taxas> ç ã é 😀"),
+        replace(base, codigo_verificacao="", discriminacao="", serie_rps=""),
+        replace(base, valores=ValoresServico(), prestador=other, natureza_operacao="2"),
+    ]
+
+
+def element_bytes(builder: AbrasfXmlBuilder, note: NFSeData) -> bytes:
+    buffer = BytesIO()
+    ET.ElementTree(builder.build_comp_nfse(note)).write(buffer, encoding="utf-8")
+    return buffer.getvalue()
+
+
+def documents_match(builder: AbrasfXmlBuilder, notes: Sequence[NFSeData]) -> bool:
+    """Compara o ListaNfse completo gravado pelos dois caminhos e por ET.write."""
+    with tempfile.TemporaryDirectory(prefix="nfse_xml_") as tmp:
+        by_element, by_bytes, by_tree = Path(tmp) / "a.xml", Path(tmp) / "b.xml", Path(tmp) / "c.xml"
+        with ListaNfseWriter(by_element) as writer:
+            for note in notes:
+                writer.write(builder.build_comp_nfse(note))
+        with ListaNfseWriter(by_bytes) as writer:
+            for note in notes:
+                writer.write_bytes(builder.build_comp_nfse_bytes(note))
+        root = ET.Element("ListaNfse")
+        root.extend(builder.build_comp_nfse(note) for note in notes)
+        ET.ElementTree(root).write(by_tree, encoding="utf-8", xml_declaration=True)
+        expected = by_tree.read_bytes()
+        return by_element.read_bytes() == expected and by_bytes.read_bytes() == expected
+
+
+def best_time(func: Callable[[], None], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument("--corpus", type=Path, default=ROOT / "pdf")
+    arg_parser.add_argument("--repeat", type=int, default=10)
+    args = arg_parser.parse_args()
+
+    reader = PDFInvoiceReader()
+    parser = ServimaxParser(DEFAULT_PRESTADOR)
+    builder = AbrasfXmlBuilder()
+    notes = [parser.parse(reader.read_text(pdf)) for pdf in sorted(args.corpus.glob("*.pdf"))]
+    notes.extend(synthetic_notes())
+
+    mismatches = [
+        note.numero for note in notes
+        if builder.build_comp_nfse_bytes(note) != element_bytes(builder, note)
+    ]
+    if not documents_match(builder, notes):
+        mismatches.append("<ListaNfse>")
+    print(f"{len(notes)} nota(s) comparada(s), {len(mismatches)} divergencia(s)")
+    if mismatches:
+        print("Divergencias: " + ", ".join(mismatches))
+        sys.exit(1)
+
+    repeat = max(1, args.repeat)
+    tree = best_time(lambda: [element_bytes(builder, note) for note in notes], repeat)
+    template = best_time(lambda: [builder.build_comp_nfse_bytes(note) for note in notes], repeat)
+    per_note = 1e6 / len(notes)
+    print(f"ElementTree:  {tree * per_note:8.1f} us/nota")
+    print(f"template:     {template * per_note:8.1f} us/nota ({tree / template:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""Conversão sob demanda com pool de processos aquecido e micro-lotes.
+
+Usado pelo serviço HTTP: cada requisição entra em uma fila limitada; um
+despachante junta as requisições que chegaram enquanto o pool estava ocupado
+em micro-lotes (uma submissão ao pool por lote) e mantém no máximo um lote
+por worker em andamento. Com a fila cheia a requisição é recusada na hora
+(ServiceBusyError) em vez de acumular latência. Os PDFs seguem em memória
+até os workers (MemoryPDF), sem arquivos temporários.
+"""
+
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+from controllers.converter import NFSeConverter, _crash_outcome, _worker_execute_batch, _worker_preload
+from models.conversion import ConvertedNote, FaultPolicy, FileFailure
+from models.nfse import NFSeData
+from services.pdf_source import MemoryPDF
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# Métodos do NFSeConverter executados para cada formato de resposta.
+METHODS = {"xml": "_convert_notes", "json": "_parse_notes"}
+
+
+class ServiceBusyError(RuntimeError):
+    """A fila de requisições está cheia; o cliente deve tentar mais tarde."""
+
+
+class ConversionFailedError(RuntimeError):
+    """O PDF da requisição não pôde ser convertido."""
+    def __init__(self, failure: FileFailure) -> None:
+        super().__init__(f"{failure.exception}: {failure.message}")
+        self.failure = failure
+
+
+class ConversionService:
+    """Fila de conversões atendida por um pool de processos já iniciado.
+
+    Uso:
+        service = ConversionService(converter, workers=4)
+        await service.start()
+        fragments = await service.convert(pdf_bytes)
+        await service.close()
+
+    Args:
+        converter: Conversor copiado para cada worker
+        workers: Processos do pool (e lotes simultâneos)
+        max_batch: Máximo de requisições por lote
+        batch_window: Segundos que o despachante espera por mais
+            requisições antes de enviar um lote incompleto (0 = envia o que
+            já estiver na fila)
+        queue_size: Requisições aguardando despacho além das em andamento
+        timeout: Limite em segundos por PDF (None = sem limite)
+    """
+    def __init__(
+        self,
+        converter: NFSeConverter,
+        workers: int = 2,
+        max_batch: int = 8,
+        batch_window: float = 0.0,
+        queue_size: int = 64,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if workers < 1:
+            raise ValueError(f"Numero de workers invalido: {workers}")
+        if max_batch < 1 or queue_size < 1:
+            raise ValueError("Tamanho de lote e de fila devem ser positivos")
+        if batch_window < 0:
+            raise ValueError(f"Janela de lote invalida: {batch_window}")
+        self.converter = converter
+        self.workers = workers
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.queue_size = queue_size
+        self.fault_policy = FaultPolicy(timeout=timeout)
+        self.stats: Dict[str, int] = {"requests": 0, "rejected": 0, "failed": 0, "batches": 0}
+        self._queue: Optional["asyncio.Queue[Tuple[MemoryPDF, str, asyncio.Future]]"] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pool: Optional["ProcessPoolExecutor"] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._tasks: set = set()
+        self._sequence = 0
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        """Cria o pool e importa o pdfminer em todos os workers antes de aceitar requisições."""
+        self._pool = self.converter.create_pool(self.workers)
+        await self._preload(self._pool)
+        self._queue = asyncio.Queue(self.queue_size)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def close(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        while self._queue is not None and not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(ServiceBusyError("Servico encerrado"))
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    async def convert(self, pdf: bytes, response_format: str = "xml") -> Union[List[ConvertedNote], List[NFSeData]]:
+        """Converte um PDF recebido em memória.
+
+        Returns:
+            Com "xml", os CompNfse serializados (ConvertedNote) de cada nota;
+            com "json", as NFSeData
+
+        Raises:
+            ValueError: Se o formato não for "xml" nem "json"
+            ServiceBusyError: Se a fila estiver cheia
+            ConversionFailedError: Se o PDF não puder ser convertido
+        """
+        method = METHODS.get(response_format)
+        if method is None:
+            raise ValueError(f"Formato invalido: {response_format}")
+        if self._queue is None:
+            raise RuntimeError("ConversionService.start nao foi chamado")
+        if self._queue.full():
+            self.stats["rejected"] += 1
+            raise ServiceBusyError(f"Fila cheia ({self.queue_size} requisicoes)")
+        self.stats["requests"] += 1
+        # O nome só identifica a requisição em falhas e métricas.
+        self._sequence += 1
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((MemoryPDF(f"requisicao_{self._sequence}.pdf", pdf), method, future))
+        result, failure = await future
+        if failure is not None:
+            self.stats["failed"] += 1
+            raise ConversionFailedError(failure)
+        return result
+
+    async def _dispatch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Um lote só é montado quando há worker livre: sob carga, as
+            # requisições acumuladas nesse intervalo seguem juntas.
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[MemoryPDF, str, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        self.stats["batches"] += 1
+        try:
+            groups: Dict[str, List[Tuple[MemoryPDF, str, asyncio.Future]]] = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+            for method, items in groups.items():
+                task = partial(_worker_execute_batch, method, self.fault_policy)
+                pdfs = [item[0] for item in items]
+                pool = self._pool
+                try:
+                    outcomes = await loop.run_in_executor(pool, task, pdfs)
+                except BrokenProcessPool:
+                    outcomes = await self._isolate_crash(pool, task, pdfs)
+                except Exception as exc:
+                    # Erro fora do isolamento por arquivo.
+                    self.stats["failed"] += len(items)
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+                for (_, _, future), (result, failure, _) in zip(items, outcomes):
+                    if not future.done():
+                        future.set_result((result, failure))
+        finally:
+            self._slots.release()
+
+    async def _isolate_crash(
+        self, broken: "ProcessPoolExecutor", task: partial, pdfs: List[MemoryPDF]
+    ) -> List[Tuple[object, Optional[FileFailure], object]]:
+        """Reexecuta sozinho cada PDF de um lote cujo worker morreu.
+
+        O pool é recriado antes; o PDF que quebrar o pool de novo recebe um
+        FileFailure da etapa "worker" e os demais seguem normalmente.
+        """
+        loop = asyncio.get_running_loop()
+        pool = await self._replace_pool(broken)
+        outcomes = []
+        for pdf in pdfs:
+            start = time.perf_counter()
+            try:
+                outcomes.extend(await loop.run_in_executor(pool, task, [pdf]))
+            except BrokenProcessPool:
+                outcomes.append(_crash_outcome(pdf, start))
+                pool = await self._replace_pool(pool)
+        return outcomes
+
+    async def _replace_pool(self, broken: "ProcessPoolExecutor") -> "ProcessPoolExecutor":
+        # Lotes simultâneos veem o mesmo pool quebrar: só o primeiro o troca.
+        if self._pool is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = self.converter.create_pool(self.workers)
+            await self._preload(self._pool)
+        return self._pool
+
+    async def _preload(self, pool: "ProcessPoolExecutor") -> None:
+        """Importa o pdfminer em todos os workers do pool."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(pool, _worker_preload) for _ in range(self.workers)))
@@ -4,13 +4,52 @@ Orquestra o fluxo completo: leitura de PDF, parsing de dados e geração de XML.
 Implementa padrão MVC separando lógica de negócio da apresentação.
 """
 
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
-import xml.etree.ElementTree as ET
+import signal
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
 
+# asyncio e concurrent.futures só são importados quando usados: a maioria
+# das execuções é síncrona e sequencial, e o custo de importação pesa em
+# processos de vida curta.
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent.futures import Executor, Future, ProcessPoolExecutor
+    import threading
+
+    from services.profiling import ProfileOutlierHook, StageProfiler
+    from services.xml_validator import NoteValidator
+
+from models.conversion import (
+    ConversionEvent,
+    ConversionSummary,
+    ConvertedNote,
+    DuplicatePolicy,
+    FaultPolicy,
+    FileFailure,
+    FileMetrics,
+    PreScanPolicy,
+    ProfilePolicy,
+    ValidationPolicy,
+)
+from models.nfse import NFSeData, NFSeRecord
+from models.nfse_batch import NFSeBatch
+from services.duplicate_index import DuplicateFilter, write_duplicate_report
+from services.error_report import write_error_report
+from services.file_prescan import prescan
+from services.manifest import ConversionManifest
+from services.metrics import MetricsHook
 from services.pdf_reader import PDFInvoiceReader
+from services.pdf_source import PDFSource, as_source, list_zip_pdfs, source_path, source_size
 from services.parser import ServimaxParser
 from services.xml_builder import AbrasfXmlBuilder
+from services.xml_writer import GroupedListaNfseWriter, ListaNfseWriter, OutputSink
+
+ERROR_REPORT_NAME = "erros_conversao.json"
+DUPLICATE_REPORT_NAME = "duplicadas.json"
 
 
 class NFSeConverter:
@@ -24,73 +63,1126 @@ class NFSeConverter:
         reader: PDFInvoiceReader,
         parser: ServimaxParser,
         xml_builder: AbrasfXmlBuilder,
+        fast_extraction: bool = False,
+        group_by_prestador: bool = False,
+        multi_note: bool = False,
     ) -> None:
         self.reader = reader
         self.parser = parser
         self.xml_builder = xml_builder
+        self.fast_extraction = fast_extraction
+        # Separa a saída por CNPJ do prestador: uma subpasta por prestador
+        # no modo por arquivo, um ListaNfse por prestador no consolidado.
+        self.group_by_prestador = group_by_prestador
+        # PDFs com várias notas concatenadas: lidos página a página e
+        # convertidos nota a nota, com memória proporcional a uma nota.
+        self.multi_note = multi_note
+        self.current_stage = ""
+        self.stage_times: Dict[str, float] = {}
+        self._nested_time = 0.0
+        self.bytes_out = 0
+        self.metrics_hooks: List[MetricsHook] = []
+        self._warm_pool: Optional[Tuple[int, "ProcessPoolExecutor"]] = None
+        self._cancel_event: Optional["threading.Event"] = None
+        self.profile_policy: Optional[ProfilePolicy] = None
+        self._profiler: Optional["StageProfiler"] = None
+        self.validation_policy: Optional[ValidationPolicy] = None
+        self._validator: Optional["NoteValidator"] = None
+        self.notes_validated = 0
+        self.last_summary: Optional[ConversionSummary] = None
+
+    def add_metrics_hook(self, hook: MetricsHook) -> None:
+        """Registra um observador das medições por PDF e por execução."""
+        self.metrics_hooks.append(hook)
+
+    def enable_profiling(self, policy: ProfilePolicy) -> "ProfileOutlierHook":
+        """Ativa o perfilamento por PDF e por etapa nas próximas conversões.
+
+        Cada PDF gera, em policy.report_dir, um relatório com as funções mais
+        caras de cada etapa; ao fim de cada execução o hook retornado (já
+        registrado) grava outliers.json com os PDFs de leitura mais lenta.
+        O cProfile deixa a conversão bem mais lenta: use só para diagnóstico.
+
+        Raises:
+            ValueError: Se a política for inválida
+        """
+        from services.profiling import ProfileOutlierHook, validate_profile_policy
+
+        validate_profile_policy(policy)
+        self.profile_policy = policy
+        hook = ProfileOutlierHook(policy)
+        self.add_metrics_hook(hook)
+        return hook
 
-    def convert_directory(self, directory: Path, output_path: Optional[Path] = None) -> List[Path]:
-        """Converte todos os PDFs de um diretório para XML.
+    def enable_validation(self, policy: ValidationPolicy) -> None:
+        """Valida contra o XSD os CompNfse gerados nas próximas conversões.
+
+        A validação acontece onde a nota é gerada (nos workers, com pool),
+        logo após o build, na etapa "validate". O esquema é compilado aqui,
+        para que um XSD ausente ou inválido apareça antes da conversão, e
+        uma vez em cada worker.
+
+        Raises:
+            RuntimeError: Se o pacote lxml não estiver instalado
+            FileNotFoundError: Se o XSD não existir
+            ValueError: Se a política ou o XSD forem inválidos
+        """
+        from services.xml_validator import NoteValidator
+
+        self._validator = NoteValidator(policy)
+        self.validation_policy = policy
+
+    def __getstate__(self) -> dict:
+        # Os hooks e o pool ficam no processo principal; os workers só medem.
+        state = self.__dict__.copy()
+        state["metrics_hooks"] = []
+        state["_warm_pool"] = None
+        state["_cancel_event"] = None
+        state["_profiler"] = None
+        # O esquema compilado não é serializável: cada worker compila o seu.
+        state["_validator"] = None
+        return state
+
+    @property
+    def pipeline_version(self) -> str:
+        """Identifica parser e builder; mudanças invalidam o manifesto incremental."""
+        version = (
+            f"{type(self.parser).__name__}/{self.parser.VERSION};"
+            f"{type(self.xml_builder).__name__}/{self.xml_builder.VERSION}"
+        )
+        if self.multi_note:
+            return f"{version};multi"
+        return f"{version};fast" if self.fast_extraction else version
+
+    def convert_directory(
+        self,
+        directory: Path,
+        output_path: Optional[Path] = None,
+        workers: int = 1,
+        incremental: bool = False,
+        fault_policy: Optional[FaultPolicy] = None,
+        duplicate_policy: Optional[DuplicatePolicy] = None,
+        prescan_policy: Optional[PreScanPolicy] = None,
+        cancel_event: Optional["threading.Event"] = None,
+        output_sink: Optional[OutputSink] = None,
+    ) -> List[Path]:
+        """Converte todos os PDFs de um diretório (ou arquivo zip) para XML.
         
         Args:
-            directory: Diretório contendo os PDFs a converter
-            output_path: Caminho de saída (None = gera pasta PDF_Convertido)
+            directory: Diretório contendo os PDFs a converter ou arquivo .zip,
+                cujos PDFs são lidos sem extração para o disco
+            output_path: Caminho de saída (None = gera pasta PDF_Convertido,
+                ao lado do zip no caso de um arquivo zip)
+            workers: Número de processos paralelos (1 = execução sequencial)
+            incremental: Reconverte apenas PDFs novos ou alterados desde a
+                última execução (somente no modo por arquivo)
+            fault_policy: Ativa o modo tolerante a falhas: PDFs com erro são
+                repetidos conforme a política e, se ainda falharem, entram
+                no relatório de erros sem interromper o lote
+            duplicate_policy: Consulta e atualiza o índice de duplicatas:
+                PDFs já convertidos (mesmo hash) e notas repetidas são
+                tratados conforme a ação da política e listados no
+                relatório de duplicatas
+            prescan_policy: Filtra, divide em partes e ordena os PDFs só
+                pelo nome e tamanho dos arquivos, antes de qualquer leitura
+            cancel_event: Quando sinalizado, nenhum PDF novo é iniciado e os
+                já em andamento terminam (last_summary.cancelled indica a
+                interrupção). No modo por arquivo os XMLs já gravados ficam;
+                no consolidado a saída parcial é descartada, como em um erro,
+                e o arquivo anterior é mantido (outputs vazio, converted 0)
+            output_sink: Destino alternativo das notas (ex.: ZipArchiveSink,
+                RollingListaNfseWriter), usado no lugar de output_path
             
         Returns:
-            Lista de caminhos dos XMLs gerados
+            Lista de caminhos dos XMLs gerados. Os contadores da execução
+            ficam disponíveis em last_summary.
             
         Raises:
             FileNotFoundError: Se nenhum PDF for encontrado no diretório
+            ValueError: Se workers for menor que 1, se o modo incremental
+                for combinado com saída consolidada ou com filtros de
+                pré-seleção ou se a política de falhas ou de pré-seleção
+                for inválida
         """
         directory = Path(directory)
-        pdf_files = sorted(directory.glob("*.pdf"))
+        pdf_files = self._list_pdfs(directory, output_path, workers, incremental, prescan_policy)
+        if output_sink is not None:
+            return self.convert_files(
+                pdf_files, workers=workers, fault_policy=fault_policy, duplicate_policy=duplicate_policy,
+                cancel_event=cancel_event, output_sink=output_sink,
+            )
+        if output_path is None:
+            return self.convert_files(
+                pdf_files, target_dir=self.default_target_dir(directory), workers=workers,
+                incremental=incremental, fault_policy=fault_policy, duplicate_policy=duplicate_policy,
+                cancel_event=cancel_event,
+            )
+        return self.convert_files(
+            pdf_files, output_path=output_path, workers=workers,
+            fault_policy=fault_policy, duplicate_policy=duplicate_policy, cancel_event=cancel_event,
+        )
+
+    def convert_files(
+        self,
+        pdf_files: Sequence[PDFSource],
+        target_dir: Optional[Path] = None,
+        output_path: Optional[Path] = None,
+        workers: int = 1,
+        incremental: bool = False,
+        fault_policy: Optional[FaultPolicy] = None,
+        duplicate_policy: Optional[DuplicatePolicy] = None,
+        cancel_event: Optional["threading.Event"] = None,
+        output_sink: Optional[OutputSink] = None,
+    ) -> List[Path]:
+        """Converte uma lista explícita de PDFs.
+
+        Informe target_dir para gerar um XML por PDF nessa pasta,
+        output_path para um único XML consolidado ou output_sink para outro
+        destino; com output_sink as notas são gravadas no processo principal,
+        na ordem de entrada. Os demais parâmetros, o retorno e last_summary
+        seguem convert_directory.
+
+        Além de caminhos, aceita PDFs em memória (MemoryPDF) e membros de zip
+        (ZipMemberPDF); seus nomes identificam os XMLs gerados e aparecem em
+        relatórios e métricas.
+
+        Raises:
+            ValueError: Se não for informado exatamente um entre target_dir,
+                output_path e output_sink, se o modo incremental receber PDFs que não
+                estão em disco ou um PDF em memória não tiver nome, além dos
+                casos de convert_directory
+        """
+        if sum(option is not None for option in (target_dir, output_path, output_sink)) != 1:
+            raise ValueError("Informe target_dir (por arquivo), output_path (consolidado) ou output_sink")
+        if workers < 1:
+            raise ValueError(f"Numero de workers invalido: {workers}")
+        if incremental and target_dir is None:
+            raise ValueError("Modo incremental disponivel apenas na conversao por arquivo")
+        if fault_policy is not None:
+            _validate_fault_policy(fault_policy)
+        pdf_files = [as_source(pdf) for pdf in pdf_files]
+        if incremental and not all(isinstance(pdf, Path) for pdf in pdf_files):
+            # O manifesto identifica os PDFs pelo tamanho e data do arquivo.
+            raise ValueError("Modo incremental disponivel apenas para PDFs em disco")
+        duplicates = DuplicateFilter(duplicate_policy) if duplicate_policy is not None else None
+        per_file = target_dir is not None
+        workers = max(1, min(workers, len(pdf_files)))
+        summary = ConversionSummary()
+        self.last_summary = summary
+        outputs = summary.outputs
+        start = time.perf_counter()
+        for hook in self.metrics_hooks:
+            hook.on_run_start(len(pdf_files))
+
+        # Modo consolidado cancelado: a saída anterior fica intacta.
+        discarded = False
+        self._cancel_event = cancel_event
+        try:
+            if per_file:
+                target_dir = Path(target_dir)
+                target_dir.mkdir(parents=True, exist_ok=True)
+                if incremental:
+                    self._convert_incremental(pdf_files, target_dir, workers, summary, fault_policy, duplicates)
+                else:
+                    pending = pdf_files
+                    if duplicates is not None:
+                        pending = duplicates.filter_files(pdf_files)
+                        summary.skipped = len(pdf_files) - len(pending)
+                    outputs.extend(self._convert_files(pending, target_dir, workers, summary, fault_policy, duplicates))
+                    summary.converted = len(outputs)
+                report_path = target_dir / ERROR_REPORT_NAME
+                duplicate_report_path = target_dir / DUPLICATE_REPORT_NAME
+            else:
+                if output_sink is None:
+                    output_sink = GroupedListaNfseWriter(self.resolve_output_path(output_path))
+                target = output_sink.target
+                pending = pdf_files
+                if duplicates is not None:
+                    pending = duplicates.filter_files(pdf_files)
+                    summary.skipped = len(pdf_files) - len(pending)
+                try:
+                    with output_sink as writer:
+                        finished = 0
+                        for pdf, notes, failure, metrics in self._run_tasks(
+                            pending, workers, "_convert_notes", (), fault_policy
+                        ):
+                            finished += 1
+                            if failure is not None:
+                                summary.failures.append(failure)
+                                if duplicates is not None:
+                                    duplicates.discard(pdf)
+                            else:
+                                if duplicates is not None:
+                                    admitted = duplicates.admit(pdf, [note.key for note in notes])
+                                    notes = [note for note, kept in zip(notes, admitted) if kept]
+                                # No modo consolidado a gravação acontece aqui, no
+                                # processo principal, e é medida aqui.
+                                write_start = time.perf_counter()
+                                source = source_path(pdf)
+                                metrics.bytes_out = sum(
+                                    writer.write_bytes(note.fragment, note.group, source) for note in notes
+                                )
+                                metrics.stages["write"] = time.perf_counter() - write_start
+                            self._notify_file(metrics)
+                        if finished < len(pending):
+                            # Cancelado antes de iniciar todos os PDFs: a exceção
+                            # faz o destino descartar a saída parcial.
+                            raise _RunCancelled
+                    outputs.extend(writer.outputs)
+                    summary.converted = writer.count
+                except _RunCancelled:
+                    discarded = True
+                report_path = target.with_name(f"{target.stem}_erros.json")
+                duplicate_report_path = target.with_name(f"{target.stem}_duplicadas.json")
+            if duplicates is not None and not discarded:
+                # Só depois de toda a saída gravada: uma execução interrompida
+                # não deixa no índice notas sem XML.
+                duplicates.commit()
+        finally:
+            self._cancel_event = None
+            if duplicates is not None:
+                duplicates.close()
+        summary.cancelled = cancel_event is not None and cancel_event.is_set()
+
+        # Sem saída nova, os relatórios anteriores continuam valendo para ela.
+        if fault_policy is not None and not discarded:
+            write_error_report(fault_policy.report_path or report_path, summary.failures)
+        if duplicates is not None:
+            summary.duplicates = duplicates.duplicates
+            if not discarded:
+                write_duplicate_report(duplicate_policy.report_path or duplicate_report_path, summary.duplicates)
+        elapsed = time.perf_counter() - start
+        for hook in self.metrics_hooks:
+            hook.on_run_end(summary, elapsed)
+        return outputs
+
+    def extract_batch(
+        self,
+        pdf_files: Sequence[PDFSource],
+        workers: int = 1,
+        fault_policy: Optional[FaultPolicy] = None,
+    ) -> NFSeBatch:
+        """Extrai as notas dos PDFs para um lote colunar, sem gerar XML.
+
+        Usado para relatórios e totais por competência. Paralelismo, política
+        de falhas, last_summary (converted = notas extraídas) e hooks de
+        métricas funcionam como em convert_files.
+
+        Raises:
+            ValueError: Se workers for menor que 1 ou a política de falhas
+                for inválida
+        """
+        if workers < 1:
+            raise ValueError(f"Numero de workers invalido: {workers}")
+        if fault_policy is not None:
+            _validate_fault_policy(fault_policy)
+        pdf_files = [as_source(pdf) for pdf in pdf_files]
+        workers = max(1, min(workers, len(pdf_files)))
+        summary = ConversionSummary()
+        self.last_summary = summary
+        batch = NFSeBatch()
+        start = time.perf_counter()
+        for hook in self.metrics_hooks:
+            hook.on_run_start(len(pdf_files))
+        for _, notes, failure, metrics in self._run_tasks(pdf_files, workers, "_parse_records", (), fault_policy):
+            if failure is not None:
+                summary.failures.append(failure)
+            else:
+                batch.extend(notes)
+            self._notify_file(metrics)
+        summary.converted = len(batch)
+        if fault_policy is not None and fault_policy.report_path is not None:
+            write_error_report(fault_policy.report_path, summary.failures)
+        elapsed = time.perf_counter() - start
+        for hook in self.metrics_hooks:
+            hook.on_run_end(summary, elapsed)
+        return batch
+
+    async def convert_directory_async(
+        self,
+        directory: Path,
+        output_path: Optional[Path] = None,
+        workers: int = 1,
+        max_in_flight: Optional[int] = None,
+        incremental: bool = False,
+        prescan_policy: Optional[PreScanPolicy] = None,
+    ) -> AsyncIterator[ConversionEvent]:
+        """Converte os PDFs de um diretório sem bloquear o event loop.
+
+        A extração e a geração de XML rodam em um executor (uma thread quando
+        workers=1, um pool de processos caso contrário) e cada PDF produz um
+        evento STARTED e, ao terminar, um FINISHED ou FAILED. A falha de um
+        arquivo não interrompe os demais; no modo consolidado o ListaNfse
+        contém apenas as notas convertidas, na ordem dos PDFs de entrada.
+
+        Uso:
+            async for event in converter.convert_directory_async(pasta):
+                ...
+
+        Args:
+            directory: Diretório contendo os PDFs a converter
+            output_path: Caminho de saída (None = gera pasta PDF_Convertido)
+            workers: Número de processos paralelos (1 = uma thread auxiliar)
+            max_in_flight: Máximo de PDFs submetidos ao executor ao mesmo
+                tempo (None = workers)
+            incremental: Reconverte apenas PDFs novos ou alterados (somente
+                no modo por arquivo)
+            prescan_policy: Pré-seleção dos PDFs pelo nome (ver convert_directory)
+
+        Raises:
+            FileNotFoundError: Se nenhum PDF for encontrado no diretório
+            ValueError: Se workers ou max_in_flight forem menores que 1 ou se
+                o modo incremental for combinado com saída consolidada
+        """
+        directory = Path(directory)
+        pdf_files = self._list_pdfs(directory, output_path, workers, incremental, prescan_policy)
+        if max_in_flight is None:
+            max_in_flight = workers
+        if max_in_flight < 1:
+            raise ValueError(f"Limite de arquivos em processamento invalido: {max_in_flight}")
+        summary = ConversionSummary()
+        self.last_summary = summary
+
+        if output_path is not None:
+            target = self.resolve_output_path(output_path)
+            with GroupedListaNfseWriter(target) as writer:
+                # Resultados chegam fora de ordem; são gravados assim que
+                # todos os anteriores estiverem prontos.
+                ready: Dict[int, Optional[List[ConvertedNote]]] = {}
+                next_index = 0
+                async for event, notes in self._run_async(
+                    pdf_files, workers, max_in_flight,
+                    self._convert_notes, _worker_convert_notes, (),
+                ):
+                    if event.kind != ConversionEvent.STARTED:
+                        ready[event.index] = notes
+                        while next_index in ready:
+                            for note in ready.pop(next_index) or ():
+                                writer.write_bytes(note.fragment, note.group)
+                            next_index += 1
+                    yield event
+                summary.converted = writer.count
+            summary.outputs.extend(writer.outputs)
+            return
+
+        target_dir = self.default_target_dir(directory)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        manifest = ConversionManifest.load(target_dir) if incremental else None
+        pending = pdf_files
+        if manifest is not None:
+            pipeline = self.pipeline_version
+            pending, up_to_date = manifest.plan(pdf_files, pipeline)
+            summary.pruned = len(manifest.prune(pdf.name for pdf in pdf_files))
+            summary.skipped = len(up_to_date)
+        converted: Dict[Path, Path] = {}
+        try:
+            if pending:
+                async for event, output in self._run_async(
+                    pending, workers, max_in_flight,
+                    self._convert_per_file, _worker_convert_per_file, (target_dir,),
+                ):
+                    if event.kind == ConversionEvent.FINISHED:
+                        converted[event.pdf_path] = output
+                        if manifest is not None:
+                            manifest.record(event.pdf_path, output, pipeline)
+                    yield event
+        finally:
+            if manifest is not None:
+                manifest.save()
+        summary.converted = len(converted)
+        for pdf in pdf_files:
+            if pdf in converted:
+                summary.outputs.append(converted[pdf])
+            elif manifest is not None and pdf not in pending and manifest.output_for(pdf) is not None:
+                summary.outputs.append(manifest.output_for(pdf))
+
+    async def _run_async(
+        self,
+        pdf_files: List[Path],
+        workers: int,
+        max_in_flight: int,
+        local_task: Callable,
+        pool_task: Callable,
+        extra_args: tuple,
+    ) -> AsyncIterator[Tuple[ConversionEvent, object]]:
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        loop = asyncio.get_running_loop()
+        total = len(pdf_files)
+        workers = min(workers, total)
+        if workers > 1:
+            executor: "Executor" = self.create_pool(workers)
+            task = pool_task
+        else:
+            # Thread única no próprio processo: o conversor já está carregado.
+            executor = ThreadPoolExecutor(max_workers=1)
+            task = local_task
+        in_flight: Dict["asyncio.Future", Tuple[int, Path, float]] = {}
+        completed = 0
+        queue = iter(enumerate(pdf_files))
+        try:
+            while True:
+                while len(in_flight) < max_in_flight:
+                    item = next(queue, None)
+                    if item is None:
+                        break
+                    index, pdf = item
+                    future = loop.run_in_executor(executor, task, pdf, *extra_args)
+                    in_flight[future] = (index, pdf, time.perf_counter())
+                    yield ConversionEvent(ConversionEvent.STARTED, pdf, index, total, completed), None
+                if not in_flight:
+                    break
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in sorted(done, key=lambda f: in_flight[f][0]):
+                    index, pdf, started = in_flight.pop(future)
+                    elapsed = time.perf_counter() - started
+                    completed += 1
+                    try:
+                        result = future.result()
+                    except Exception as exc:
+                        yield ConversionEvent(
+                            ConversionEvent.FAILED, pdf, index, total, completed,
+                            elapsed=elapsed, error=f"{type(exc).__name__}: {exc}",
+                        ), None
+                        continue
+                    output = result if isinstance(result, Path) else None
+                    yield ConversionEvent(
+                        ConversionEvent.FINISHED, pdf, index, total, completed,
+                        output=output, elapsed=elapsed,
+                    ), result
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _list_pdfs(
+        self,
+        directory: Path,
+        output_path: Optional[Path],
+        workers: int,
+        incremental: bool,
+        prescan_policy: Optional[PreScanPolicy] = None,
+    ) -> List[PDFSource]:
+        if workers < 1:
+            raise ValueError(f"Numero de workers invalido: {workers}")
+        if incremental and output_path is not None:
+            raise ValueError("Modo incremental disponivel apenas na conversao por arquivo")
+        pdf_files = self.list_pdfs(directory, incremental)
+        if prescan_policy is not None:
+            # Uma seleção vazia (ex.: parte sem arquivos) não é erro.
+            pdf_files = self.select_pdfs(pdf_files, prescan_policy, incremental)
+        return pdf_files
+
+    def list_pdfs(self, directory: Path, incremental: bool = False) -> List[PDFSource]:
+        """PDFs de uma pasta (*.pdf, em ordem de nome) ou de um arquivo zip.
+
+        Os membros de um zip são lidos direto do arquivo, sem extração.
+
+        Raises:
+            FileNotFoundError: Se nenhum PDF for encontrado
+            ValueError: Se o modo incremental for pedido para um zip
+        """
+        directory = Path(directory)
+        if _is_zip(directory):
+            if incremental:
+                raise ValueError("Modo incremental disponivel apenas para PDFs em disco")
+            pdf_files: List[PDFSource] = list_zip_pdfs(directory)
+        else:
+            pdf_files = sorted(directory.glob("*.pdf"))
         if not pdf_files:
             raise FileNotFoundError(f"Nenhum PDF encontrado em {directory}")
+        return pdf_files
 
-        per_file = output_path is None
-        outputs: List[Path] = []
+    def select_pdfs(
+        self, pdf_files: List[PDFSource], prescan_policy: PreScanPolicy, incremental: bool = False
+    ) -> List[PDFSource]:
+        """Aplica a pré-seleção pelo nome (ver services.file_prescan.prescan).
 
-        if per_file:
-            target_dir = directory / "PDF_Convertido"
-            target_dir.mkdir(parents=True, exist_ok=True)
-            for pdf in pdf_files:
-                outputs.append(self._convert_per_file(pdf, target_dir))
-            return outputs
+        Raises:
+            ValueError: Se filtros forem combinados com o modo incremental
+        """
+        if incremental and prescan_policy.filters:
+            # O manifesto apagaria os XMLs dos PDFs deixados de fora.
+            raise ValueError("Filtros de pre-selecao nao podem ser combinados com o modo incremental")
+        return prescan(pdf_files, prescan_policy)
+
+    @staticmethod
+    def default_target_dir(directory: Path) -> Path:
+        """Pasta de saída padrão: PDF_Convertido dentro da pasta ou ao lado do zip."""
+        directory = Path(directory)
+        # A pasta de saída de um zip fica ao lado dele, não "dentro".
+        return (directory.parent if _is_zip(directory) else directory) / "PDF_Convertido"
+
+    def _convert_incremental(
+        self,
+        pdf_files: List[Path],
+        target_dir: Path,
+        workers: int,
+        summary: ConversionSummary,
+        fault_policy: Optional[FaultPolicy],
+        duplicates: Optional[DuplicateFilter] = None,
+    ) -> List[Path]:
+        manifest = ConversionManifest.load(target_dir)
+        pipeline = self.pipeline_version
+        pending, up_to_date = manifest.plan(pdf_files, pipeline)
+        summary.pruned = len(manifest.prune(pdf.name for pdf in pdf_files))
+        omitted = set()
+        if duplicates is not None:
+            # Só os pendentes: os já atualizados continuam com seus XMLs.
+            selected = duplicates.filter_files(pending)
+            omitted.update(set(pending) - set(selected))
+            pending = selected
+
+        converted: Dict[Path, Path] = {}
+        try:
+            if pending:
+                workers = min(workers, len(pending))
+                for pdf, output, failure, metrics in self._run_per_file(
+                    pending, target_dir, workers, fault_policy, duplicates
+                ):
+                    self._notify_file(metrics)
+                    if failure is not None:
+                        summary.failures.append(failure)
+                    elif output is None:
+                        omitted.add(pdf)
+                    else:
+                        converted[pdf] = output
+        finally:
+            for pdf, output in converted.items():
+                manifest.record(pdf, output, pipeline)
+            for pdf in omitted:
+                # Omitido pelo índice de duplicatas: sem registro seria lido
+                # de novo a cada execução. Mantém o XML anterior, se houver.
+                previous = manifest.output_for(pdf)
+                manifest.record(pdf, previous if previous is not None and previous.exists() else None, pipeline)
+            manifest.save()
 
-        consolidated_root = ET.Element("ListaNfse")
+        failed = {failure.pdf_path for failure in summary.failures}
+        summary.converted = len(converted)
+        summary.skipped = len(up_to_date) + len(omitted)
         for pdf in pdf_files:
-            comp_nfse = self._convert_to_element(pdf)
-            consolidated_root.append(comp_nfse)
-        target = self._resolve_output_path(output_path)
-        ET.ElementTree(consolidated_root).write(target, encoding="utf-8", xml_declaration=True)
-        outputs.append(target)
+            output = converted.get(pdf) or manifest.output_for(pdf)
+            if pdf not in failed and pdf not in omitted and output is not None:
+                summary.outputs.append(output)
+        return summary.outputs
+
+    def _convert_files(
+        self,
+        pdf_files: List[Path],
+        target_dir: Path,
+        workers: int,
+        summary: ConversionSummary,
+        fault_policy: Optional[FaultPolicy],
+        duplicates: Optional[DuplicateFilter] = None,
+    ) -> List[Path]:
+        # Cada PDF tem seu XML gravado assim que termina (no worker, quando
+        # em paralelo); a lista retornada mantém a ordem dos PDFs de entrada.
+        outputs: List[Path] = []
+        for _, output, failure, metrics in self._run_per_file(
+            pdf_files, target_dir, workers, fault_policy, duplicates
+        ):
+            self._notify_file(metrics)
+            if failure is not None:
+                summary.failures.append(failure)
+            elif output is None:
+                summary.skipped += 1
+            else:
+                outputs.append(output)
         return outputs
 
-    def _convert_per_file(self, pdf_path: Path, target_dir: Path) -> Path:
-        comp_nfse = self._convert_to_element(pdf_path)
-        root = ET.Element("ListaNfse")
-        root.append(comp_nfse)
-        tree = ET.ElementTree(root)
-        output_path = target_dir / f"{pdf_path.stem}.xml"
-        tree.write(output_path, encoding="utf-8", xml_declaration=True)
+    def _run_per_file(
+        self,
+        pdf_files: List[Path],
+        target_dir: Path,
+        workers: int,
+        fault_policy: Optional[FaultPolicy],
+        duplicates: Optional[DuplicateFilter],
+    ) -> Iterator[Tuple[Path, Optional[Path], Optional[FileFailure], FileMetrics]]:
+        """Gera o XML de cada PDF; output None indica PDF omitido por duplicata."""
+        if duplicates is None:
+            yield from self._run_tasks(pdf_files, workers, "_convert_per_file", (target_dir,), fault_policy)
+            return
+        # Com índice de duplicatas as notas voltam ao processo principal, que
+        # decide o que gravar na ordem dos PDFs de entrada.
+        for pdf, notes, failure, metrics in self._run_tasks(pdf_files, workers, "_convert_notes", (), fault_policy):
+            output = None
+            if failure is not None:
+                duplicates.discard(pdf)
+            else:
+                admitted = duplicates.admit(pdf, [note.key for note in notes])
+                kept = [note for note, ok in zip(notes, admitted) if ok]
+                if kept:
+                    write_start = time.perf_counter()
+                    output = self._write_per_file(pdf, iter(kept), target_dir)
+                    metrics.stages["write"] = time.perf_counter() - write_start
+                    metrics.bytes_out = self.bytes_out
+            yield pdf, output, failure, metrics
+
+    def _run_tasks(
+        self,
+        pdf_files: List[Path],
+        workers: int,
+        method: str,
+        args: tuple,
+        fault_policy: Optional[FaultPolicy],
+    ) -> Iterator[Tuple[Path, object, Optional[FileFailure], FileMetrics]]:
+        """Executa um método do conversor para cada PDF, na ordem de entrada.
+
+        Sem política de falhas a primeira exceção interrompe o lote, como
+        antes; com ela cada PDF produz um resultado ou um FileFailure, mesmo
+        que o worker que o convertia morra (etapa "worker"): o pool é
+        recriado e o lote continua. Em ambos os casos cada PDF vem
+        acompanhado de suas medições.
+        """
+        # O alarme do timeout só funciona na thread principal de um processo,
+        # por isso um timeout força a execução no pool mesmo com workers=1.
+        use_pool = workers > 1 or (fault_policy is not None and fault_policy.timeout)
+        cancel = self._cancel_event
+        if not use_pool:
+            for pdf in pdf_files:
+                if cancel is not None and cancel.is_set():
+                    return
+                yield (pdf, *_execute(self, method, args, fault_policy, pdf))
+            return
+        task = partial(_worker_execute, method, args, fault_policy)
+        with self._pool_scope(workers) as pool:
+            if cancel is not None or fault_policy is not None:
+                yield from self._run_submitted(pool, pdf_files, workers, task, cancel, fault_policy is not None)
+                return
+            # Executor.map devolve os resultados na ordem de submissão,
+            # garantindo um ListaNfse determinístico.
+            chunksize = max(1, len(pdf_files) // (workers * 4))
+            for pdf, outcome in zip(pdf_files, pool.map(task, pdf_files, chunksize=chunksize)):
+                yield (pdf, *outcome)
+
+    def _run_submitted(
+        self,
+        pool: "ProcessPoolExecutor",
+        pdf_files: List[Path],
+        workers: int,
+        task: Callable,
+        cancel: Optional["threading.Event"],
+        isolate_crashes: bool,
+    ) -> Iterator[Tuple[Path, object, Optional[FileFailure], FileMetrics]]:
+        # Executor.map submete todos os PDFs de uma vez; aqui a submissão é
+        # limitada a 2 PDFs por worker, de modo que o cancelamento só espera
+        # os já submetidos e, se um worker morrer, se sabe quais PDFs estavam
+        # em andamento. A ordem de entrada é mantida.
+        from concurrent.futures.process import BrokenProcessPool
+
+        files = iter(pdf_files)
+        unsubmitted: Optional[Path] = None
+        pending: Deque[Tuple[Path, "Future"]] = deque()
+        replaced: List["ProcessPoolExecutor"] = []
+        try:
+            while True:
+                while len(pending) < workers * 2 and not (cancel is not None and cancel.is_set()):
+                    pdf = unsubmitted if unsubmitted is not None else next(files, None)
+                    unsubmitted = None
+                    if pdf is None:
+                        break
+                    try:
+                        pending.append((pdf, pool.submit(task, pdf)))
+                    except BrokenProcessPool:
+                        if not isolate_crashes:
+                            raise
+                        # O pool quebrou entre duas submissões: o PDF volta
+                        # para a fila e os em andamento são tratados abaixo.
+                        unsubmitted = pdf
+                        if pending:
+                            break
+                        pool = self._replace_pool(pool, workers)
+                        replaced.append(pool)
+                if not pending:
+                    return
+                pdf, future = pending[0]
+                try:
+                    outcome = future.result()
+                except BrokenProcessPool:
+                    if not isolate_crashes:
+                        raise
+                    # Um worker morreu (falha de segmentação, falta de
+                    # memória...) e o pool inteiro ficou inutilizável. Os PDFs
+                    # em andamento são refeitos um a um em um pool novo: só o
+                    # que derrubar o worker de novo é registrado como falha.
+                    suspects = list(pending)
+                    pending.clear()
+                    pool = self._replace_pool(pool, workers)
+                    replaced.append(pool)
+                    for pdf, future in suspects:
+                        if future.done() and not future.cancelled() and future.exception() is None:
+                            yield (pdf, *future.result())
+                            continue
+                        start = time.perf_counter()
+                        try:
+                            yield (pdf, *pool.submit(task, pdf).result())
+                        except BrokenProcessPool:
+                            pool = self._replace_pool(pool, workers)
+                            replaced.append(pool)
+                            yield (pdf, *_crash_outcome(pdf, start))
+                    continue
+                pending.popleft()
+                yield (pdf, *outcome)
+        finally:
+            for _, future in pending:
+                future.cancel()
+            for extra in replaced:
+                if self._warm_pool is None or self._warm_pool[1] is not extra:
+                    extra.shutdown(wait=False, cancel_futures=True)
+
+    def _replace_pool(self, pool: "ProcessPoolExecutor", workers: int) -> "ProcessPoolExecutor":
+        """Troca um pool quebrado por um novo (também o pool de warm_pool)."""
+        pool.shutdown(wait=False, cancel_futures=True)
+        replacement = self.create_pool(workers)
+        if self._warm_pool is not None and self._warm_pool[1] is pool:
+            self._warm_pool = (self._warm_pool[0], replacement)
+        return replacement
+
+    def _notify_file(self, metrics: FileMetrics) -> None:
+        if self.last_summary is not None:
+            self.last_summary.validated += metrics.validated
+        for hook in self.metrics_hooks:
+            hook.on_file(metrics)
+
+    @contextmanager
+    def warm_pool(self, workers: int) -> Iterator[None]:
+        """Mantém um pool de processos aberto entre várias conversões.
+
+        Dentro do bloco, as chamadas síncronas com até esse número de workers
+        reaproveitam os processos já iniciados (pdfminer já importado) em vez
+        de criar um pool por chamada. Usado pelo modo --watch da CLI.
+        """
+        self._warm_pool = (workers, self.create_pool(workers))
+        try:
+            yield
+        finally:
+            # O pool pode ter sido trocado por _replace_pool durante o bloco.
+            _, pool = self._warm_pool
+            self._warm_pool = None
+            pool.shutdown()
+
+    @contextmanager
+    def _pool_scope(self, workers: int) -> Iterator["ProcessPoolExecutor"]:
+        if self._warm_pool is not None and self._warm_pool[0] >= workers:
+            yield self._warm_pool[1]
+            return
+        with self.create_pool(workers) as pool:
+            yield pool
+
+    def create_pool(self, workers: int) -> "ProcessPoolExecutor":
+        """Pool de processos com uma cópia deste conversor em cada worker.
+
+        Cabe a quem chama encerrar o pool (shutdown ou bloco with).
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,))
+
+    def _convert_per_file(self, pdf_path: PDFSource, target_dir: Path) -> Path:
+        # Um XML por PDF; no modo multi_note cada nota é gravada assim que
+        # convertida e o XML fica na pasta do prestador da primeira nota.
+        notes = self._iter_notes(pdf_path) if self.multi_note else iter((self._convert_note(pdf_path),))
+        return self._write_per_file(pdf_path, notes, target_dir)
+
+    def _write_per_file(self, pdf_path: PDFSource, notes: Iterator[ConvertedNote], target_dir: Path) -> Path:
+        first = next(notes, None)
+        if first is None:
+            raise ValueError("Nenhuma NFSe encontrada no PDF")
+        if first.group is not None:
+            target_dir = target_dir / first.group
+            target_dir.mkdir(exist_ok=True)
+        output_path = target_dir / f"{source_path(pdf_path).stem}.xml"
+        with self._stage("write"):
+            with ListaNfseWriter(output_path) as writer:
+                writer.write_bytes(first.fragment)
+                for note in notes:
+                    writer.write_bytes(note.fragment)
+            self.bytes_out = output_path.stat().st_size
         return output_path
 
-    def _convert_to_element(self, pdf_path: Path) -> ET.Element:
-        xml_tree = self._convert_pdf(pdf_path)
-        comp_nfse = xml_tree.getroot().find("CompNfse")
-        if comp_nfse is None:
-            raise ValueError("Estrutura XML invalida: CompNfse nao encontrado")
-        return comp_nfse
+    def _convert_notes(self, pdf_path: PDFSource) -> List[ConvertedNote]:
+        """Converte todas as notas de um PDF; ver _convert_note."""
+        if self.multi_note:
+            return list(self._iter_notes(pdf_path))
+        return [self._convert_note(pdf_path)]
+
+    def _convert_note(self, pdf_path: PDFSource) -> ConvertedNote:
+        """Converte um PDF no CompNfse já serializado em UTF-8.
+
+        O grupo da nota é o CNPJ do prestador com group_by_prestador e None
+        caso contrário.
+        """
+        return self._build_note(self._parse_note(pdf_path))
+
+    def _iter_notes(self, pdf_path: PDFSource) -> Iterator[ConvertedNote]:
+        """Converte as notas de um PDF multi-nota à medida que as páginas são lidas."""
+        for data in self._iter_data(pdf_path):
+            yield self._build_note(data)
+
+    def _build_note(self, data: NFSeData) -> ConvertedNote:
+        # O CompNfse sai do worker já serializado: o processo principal só
+        # concatena bytes. Devolver o ET.Element custaria centenas de vezes
+        # mais por nota (pickle da árvore e serialização serial no
+        # principal); ver benchmarks/result_transport.py.
+        with self._stage("build"):
+            fragment = self.xml_builder.build_comp_nfse_bytes(data)
+        cnpj = data.prestador.cnpj
+        key = (cnpj, data.numero, data.codigo_verificacao)
+        if self.validation_policy is not None:
+            validator = self._note_validator()
+            if validator.selects(key):
+                with self._stage("validate"):
+                    validator.validate(fragment)
+                self.notes_validated += 1
+        return ConvertedNote(fragment, cnpj if self.group_by_prestador else None, key)
+
+    def _note_validator(self) -> "NoteValidator":
+        if self._validator is None:
+            from services.xml_validator import NoteValidator
+
+            self._validator = NoteValidator(self.validation_policy)
+        return self._validator
+
+    def _parse_notes(self, pdf_path: PDFSource) -> List[NFSeData]:
+        """Extrai as notas de um PDF sem gerar XML."""
+        if self.multi_note:
+            return list(self._iter_data(pdf_path))
+        return [self._parse_note(pdf_path)]
+
+    def _parse_records(self, pdf_path: PDFSource) -> List[NFSeRecord]:
+        """Como _parse_notes, em NFSeRecord: menor e mais rápido de enviar do worker."""
+        return [NFSeRecord.from_data(data) for data in self._parse_notes(pdf_path)]
+
+    def _parse_note(self, pdf_path: PDFSource) -> NFSeData:
+        with self._stage("read"):
+            content = self._read_content(pdf_path)
+        with self._stage("parse"):
+            return self.parser.parse(content)
+
+    def _iter_data(self, pdf_path: PDFSource) -> Iterator[NFSeData]:
+        notes = self.parser.parse_stream(self._iter_pages(pdf_path))
+        while True:
+            # O tempo de leitura das páginas puxadas pelo parser é
+            # descontado da etapa "parse" por _stage.
+            with self._stage("parse"):
+                data = next(notes, None)
+            if data is None:
+                return
+            yield data
+
+    def _iter_pages(self, pdf_path: PDFSource) -> Iterator[str]:
+        pages = self.reader.iter_pages(pdf_path)
+        while True:
+            with self._stage("read"):
+                page = next(pages, None)
+            if page is None:
+                return
+            yield page
+
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        # Em caso de exceção current_stage continua apontando para a etapa
+        # que falhou; o modo tolerante a falhas a registra no relatório.
+        # Etapas aninhadas (leitura de páginas durante o parse) têm o tempo
+        # descontado da etapa externa e, ao terminar, devolvem a ela o
+        # current_stage.
+        previous = self.current_stage
+        self.current_stage = name
+        outer_nested, self._nested_time = self._nested_time, 0.0
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.enter(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.leave()
+            self.stage_times[name] = self.stage_times.get(name, 0.0) + elapsed - self._nested_time
+            self._nested_time = outer_nested + elapsed
+        self.current_stage = previous
 
-    def _convert_pdf(self, pdf_path: Path) -> ET.ElementTree:
-        content = self.reader.read_text(pdf_path)
-        data = self.parser.parse(content)
-        return self.xml_builder.build_tree(data)
+    def _read_content(self, pdf_path: PDFSource) -> str:
+        if self.fast_extraction:
+            content = self.reader.read_text_fast(pdf_path)
+            if not self.parser.missing_fields(content):
+                return content
+        return self.reader.read_text(pdf_path)
 
-    def _resolve_output_path(self, output: Path) -> Path:
+    def resolve_output_path(self, output: Path) -> Path:
+        """Arquivo do XML consolidado: output ou, se for uma pasta, o nome padrão dentro dela."""
         output = Path(output)
         if output.is_dir():
             output.mkdir(parents=True, exist_ok=True)
             return output / "nfse_comp_abrasf_CONSOLIDADO_vX.xml"
         output.parent.mkdir(parents=True, exist_ok=True)
         return output
+
+
+def _is_zip(path: Path) -> bool:
+    return path.suffix.lower() == ".zip" and path.is_file()
+
+
+# Estado dos processos do pool: cada worker recebe uma cópia do conversor
+# uma única vez na inicialização, evitando serializá-lo a cada arquivo.
+_worker_converter: Optional[NFSeConverter] = None
+
+
+def _init_worker(converter: NFSeConverter) -> None:
+    global _worker_converter
+    _worker_converter = converter
+
+
+def _worker_convert_per_file(pdf_path: PDFSource, target_dir: Path) -> Path:
+    return _worker_converter._convert_per_file(pdf_path, target_dir)
+
+
+def _worker_convert_notes(pdf_path: PDFSource) -> List[ConvertedNote]:
+    return _worker_converter._convert_notes(pdf_path)
+
+
+def _worker_execute(
+    method: str,
+    args: tuple,
+    fault_policy: Optional[FaultPolicy],
+    pdf_path: PDFSource,
+) -> Tuple[object, Optional[FileFailure], FileMetrics]:
+    return _execute(_worker_converter, method, args, fault_policy, pdf_path)
+
+
+def _worker_execute_batch(
+    method: str,
+    fault_policy: FaultPolicy,
+    pdf_paths: List[PDFSource],
+) -> List[Tuple[object, Optional[FileFailure], FileMetrics]]:
+    # Várias requisições por submissão: uma ida e volta ao worker por lote.
+    return [_execute(_worker_converter, method, (), fault_policy, pdf) for pdf in pdf_paths]
+
+
+def _worker_preload() -> None:
+    import xml.etree.ElementTree  # noqa: F401
+
+    _worker_converter.reader.preload()
+    if _worker_converter.validation_policy is not None:
+        _worker_converter._note_validator()
+
+
+class _RunCancelled(Exception):
+    """Interrompe o bloco do OutputSink para descartar a saída de uma execução cancelada."""
+
+
+class FileTimeoutError(TimeoutError):
+    """Tentativa de conversão de um PDF excedeu FaultPolicy.timeout."""
+
+
+def _execute(
+    converter: NFSeConverter,
+    method: str,
+    args: tuple,
+    fault_policy: Optional[FaultPolicy],
+    pdf_path: PDFSource,
+) -> Tuple[object, Optional[FileFailure], FileMetrics]:
+    """Converte um PDF isolando falhas conforme a política e o mede.
+
+    Returns:
+        Tupla (resultado, None, medições) em caso de sucesso ou
+        (None, FileFailure, medições) depois de esgotadas as tentativas
+    """
+    task = getattr(converter, method)
+    start = time.perf_counter()
+    attempts = fault_policy.retries + 1 if fault_policy is not None else 1
+    policy = converter.profile_policy
+    if policy is not None:
+        from services.profiling import StageProfiler
+
+        # Um perfil por PDF, acumulando as tentativas; o relatório é gravado
+        # aqui, no processo que converteu o PDF, mesmo em caso de falha.
+        converter._profiler = StageProfiler()
+    try:
+        for attempt in range(1, attempts + 1):
+            converter.current_stage = "read"
+            converter.stage_times = {}
+            converter.bytes_out = 0
+            converter.notes_validated = 0
+            try:
+                if fault_policy is None:
+                    result = task(pdf_path, *args)
+                else:
+                    with _time_limit(fault_policy.timeout):
+                        result = task(pdf_path, *args)
+            except Exception as exc:
+                if fault_policy is None:
+                    raise
+                error = exc
+            else:
+                return result, None, _file_metrics(converter, pdf_path, start, ok=True)
+    finally:
+        if policy is not None:
+            profiler, converter._profiler = converter._profiler, None
+            profiler.write(
+                Path(policy.report_dir), source_path(pdf_path), converter.stage_times, policy.top, policy.sort
+            )
+    failure = FileFailure(
+        pdf_path=source_path(pdf_path),
+        stage=converter.current_stage,
+        exception=type(error).__name__,
+        message=str(error),
+        elapsed=time.perf_counter() - start,
+        attempts=attempts,
+    )
+    return None, failure, _file_metrics(converter, pdf_path, start, ok=False)
+
+
+def _crash_outcome(pdf_path: PDFSource, start: float) -> Tuple[None, FileFailure, FileMetrics]:
+    elapsed = time.perf_counter() - start
+    failure = FileFailure(
+        pdf_path=source_path(pdf_path),
+        stage="worker",
+        exception="BrokenProcessPool",
+        message="Processo do worker encerrado de forma anormal (ex.: falha de segmentacao ou falta de memoria)",
+        elapsed=elapsed,
+        attempts=1,
+    )
+    return None, failure, FileMetrics(pdf_path=source_path(pdf_path), elapsed=elapsed, ok=False)
+
+
+def _file_metrics(converter: NFSeConverter, pdf_path: PDFSource, start: float, ok: bool) -> FileMetrics:
+    return FileMetrics(
+        pdf_path=source_path(pdf_path),
+        stages=dict(converter.stage_times),
+        bytes_in=source_size(pdf_path) if ok else 0,
+        bytes_out=converter.bytes_out,
+        validated=converter.notes_validated,
+        elapsed=time.perf_counter() - start,
+        ok=ok,
+    )
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]) -> Iterator[None]:
+    if not seconds:
+        yield
+        return
+
+    def expire(signum, frame) -> None:
+        raise FileTimeoutError(f"Tempo limite de {seconds}s excedido")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _validate_fault_policy(fault_policy: FaultPolicy) -> None:
+    if fault_policy.retries < 0:
+        raise ValueError(f"Numero de tentativas invalido: {fault_policy.retries}")
+    if fault_policy.timeout is not None:
+        if fault_policy.timeout <= 0:
+            raise ValueError(f"Timeout invalido: {fault_policy.timeout}")
+        if not hasattr(signal, "setitimer"):
+            raise ValueError("Timeout por arquivo indisponivel nesta plataforma (requer sinais POSIX)")
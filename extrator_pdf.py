@@ -7,42 +7,159 @@ Arquitetura:
     - Models: Estruturas de dados de domínio (NFSeData, Prestador, etc.)
     - Services: Lógica de negócio (PDF reader, parser, XML builder)
     - Controllers: Orquestração do fluxo de conversão
-    - Views: Interface gráfica Tkinter
+    - Views: Interface gráfica Tkinter, linha de comando e serviço HTTP local
 
 Uso:
-    python extrator_pdf.py
+    python extrator_pdf.py                         (interface gráfica)
+    python extrator_pdf.py PASTA [opções]          (linha de comando)
+    python extrator_pdf.py ARQUIVO.zip [opções]    (PDFs lidos direto do zip)
+    python extrator_pdf.py SPOOL --watch [opções]  (monitoramento contínuo)
+    python extrator_pdf.py serve [opções]          (serviço HTTP local)
 """
 
 from pathlib import Path
-from typing import Optional, Sequence
+import sys
+from typing import TYPE_CHECKING, Optional, Sequence
 
 from controllers.converter import NFSeConverter
+from models.conversion import DuplicatePolicy, FaultPolicy, ProfilePolicy
 from models.nfse import DEFAULT_PRESTADOR
-from services.pdf_reader import PDFInvoiceReader
+from services.pdf_reader import CachedPDFInvoiceReader, PDFInvoiceReader
+from services.metrics import MetricsCollector, MetricsHook
 from services.parser import ServimaxParser
+from services.prestador_registry import PrestadorRegistry, RegistryParser
+from services.text_cache import DEFAULT_MAX_BYTES, PDFTextCache
 from services.xml_builder import AbrasfXmlBuilder
-from views.gui import ConverterGUI
 
+if TYPE_CHECKING:
+    import threading
 
-def create_converter() -> NFSeConverter:
-    reader = PDFInvoiceReader()
-    parser = ServimaxParser(DEFAULT_PRESTADOR)
+
+def create_converter(
+    cache_path: Optional[str] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    fast_extraction: bool = False,
+    prestadores_path: Optional[str] = None,
+    group_by_prestador: bool = False,
+    multi_note: bool = False,
+) -> NFSeConverter:
+    """Monta o conversor.
+
+    Sem prestadores_path todas as notas saem com os dados da Servimex. Com
+    ele, o JSON (lista de objetos com os campos de Prestador) deve trazer
+    todos os emissores esperados: cada nota recebe o prestador cujo CNPJ
+    aparece no PDF e notas de emissores fora da lista são rejeitadas.
+    multi_note trata cada PDF como uma sequência de notas concatenadas,
+    lidas página a página.
+    """
+    if cache_path:
+        reader = CachedPDFInvoiceReader(PDFTextCache(Path(cache_path), cache_max_bytes))
+    else:
+        reader = PDFInvoiceReader()
+    if prestadores_path:
+        parser = RegistryParser(PrestadorRegistry.from_json(Path(prestadores_path)))
+    else:
+        parser = ServimaxParser(DEFAULT_PRESTADOR)
     builder = AbrasfXmlBuilder()
-    return NFSeConverter(reader, parser, builder)
+    return NFSeConverter(
+        reader, parser, builder, fast_extraction=fast_extraction,
+        group_by_prestador=group_by_prestador, multi_note=multi_note,
+    )
 
 
-def converter_nfse_servimax(diretorio_pdf: str, saida_xml: Optional[str] = None) -> int:
-    """Converte PDFs para XML e retorna o número de arquivos gerados."""
+def converter_nfse_servimax(
+    diretorio_pdf: str,
+    saida_xml: Optional[str] = None,
+    workers: int = 1,
+    cache_path: Optional[str] = None,
+    cache_max_bytes: int = DEFAULT_MAX_BYTES,
+    incremental: bool = False,
+    fast_extraction: bool = False,
+    fault_tolerant: bool = False,
+    retries: int = 0,
+    timeout: Optional[float] = None,
+    metrics_path: Optional[str] = None,
+    prestadores_path: Optional[str] = None,
+    group_by_prestador: bool = False,
+    multi_note: bool = False,
+    duplicate_index: Optional[str] = None,
+    duplicate_action: str = "dedupe",
+    progress_hook: Optional[MetricsHook] = None,
+    cancel_event: Optional["threading.Event"] = None,
+    profile_dir: Optional[str] = None,
+) -> int:
+    """Converte PDFs para XML e retorna o número de arquivos gerados.
+
+    Quando cache_path é informado, o texto extraído de cada PDF fica salvo
+    nesse arquivo SQLite e reexecuções pulam o pdfminer para PDFs já vistos;
+    cache_max_bytes limita o tamanho do cache (descarte LRU).
+    Com incremental=True (modo por arquivo), apenas PDFs novos ou alterados
+    são reconvertidos e XMLs de PDFs removidos são apagados.
+    fast_extraction lê só a primeira página com layout simplificado, voltando
+    à extração completa quando algum campo obrigatório não é encontrado.
+    Com fault_tolerant=True, PDFs com erro são repetidos até retries vezes
+    (cada tentativa limitada a timeout segundos) e, se ainda falharem, vão
+    para o relatório de erros sem interromper o lote.
+    metrics_path grava ao final o tempo por etapa (p50/p95/max), a vazão e
+    os bytes lidos/gravados: em formato Prometheus se terminar em ".prom",
+    senão em JSON.
+    prestadores_path, group_by_prestador e multi_note seguem
+    create_converter; com group_by_prestador a saída é separada por CNPJ do
+    prestador.
+    duplicate_index aponta o arquivo SQLite com os PDFs e notas já
+    convertidos; duplicate_action define o que fazer com repetições:
+    "dedupe" remove as notas repetidas, "skip" ignora o PDF inteiro e
+    "report" só as lista no relatório de duplicatas.
+    progress_hook recebe o início, cada PDF concluído e o resumo final da
+    execução (usado pela interface gráfica para exibir o progresso);
+    sinalizar cancel_event encerra a conversão sem iniciar novos PDFs.
+    Com profile_dir, cada PDF é perfilado com cProfile por etapa e os
+    relatórios (top funções por PDF e outliers.json) ficam nessa pasta.
+    """
     directory = Path(diretorio_pdf)
-    converter = create_converter()
+    converter = create_converter(
+        cache_path, cache_max_bytes, fast_extraction=fast_extraction,
+        prestadores_path=prestadores_path, group_by_prestador=group_by_prestador,
+        multi_note=multi_note,
+    )
+    if metrics_path:
+        export_format = "prometheus" if metrics_path.endswith(".prom") else "json"
+        converter.add_metrics_hook(MetricsCollector(Path(metrics_path), export_format))
+    if progress_hook is not None:
+        converter.add_metrics_hook(progress_hook)
+    if profile_dir:
+        converter.enable_profiling(ProfilePolicy(report_dir=Path(profile_dir)))
+    fault_policy = FaultPolicy(retries=retries, timeout=timeout) if fault_tolerant else None
+    duplicate_policy = None
+    if duplicate_index:
+        duplicate_policy = DuplicatePolicy(index_path=Path(duplicate_index), action=duplicate_action)
     if saida_xml:
-        outputs = converter.convert_directory(directory, Path(saida_xml))
+        outputs = converter.convert_directory(
+            directory, Path(saida_xml), workers=workers,
+            fault_policy=fault_policy, duplicate_policy=duplicate_policy, cancel_event=cancel_event,
+        )
     else:
-        outputs = converter.convert_directory(directory)
+        outputs = converter.convert_directory(
+            directory, workers=workers, incremental=incremental,
+            fault_policy=fault_policy, duplicate_policy=duplicate_policy, cancel_event=cancel_event,
+        )
     return len(outputs)
 
 
-def main() -> None:
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Sem argumentos abre a interface gráfica; "serve" inicia o serviço HTTP; com argumentos roda a CLI."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == "serve":
+        from views.http_service import serve
+
+        sys.exit(serve(argv[1:], create_converter))
+    if argv:
+        from views.cli import CommandLineInterface
+
+        sys.exit(CommandLineInterface(create_converter).run(argv))
+    # Importado aqui para que a CLI funcione em servidores sem Tkinter.
+    from views.gui import ConverterGUI
+
     gui = ConverterGUI()
     gui.set_converter_callback(converter_nfse_servimax)
     gui.run()
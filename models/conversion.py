@@ -0,0 +1,274 @@
+"""Modelos de resultado de execução da conversão em lote."""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+@dataclass
+class ConversionSummary:
+    """Resumo de uma execução de convert_directory.
+
+    Attributes:
+        outputs: Caminhos dos XMLs resultantes (gerados ou já atualizados)
+        converted: PDFs efetivamente convertidos nesta execução
+        skipped: PDFs ignorados por já possuírem XML atualizado
+        pruned: XMLs removidos porque o PDF de origem deixou de existir
+        failures: PDFs que falharam no modo tolerante a falhas
+        duplicates: PDFs e notas já conhecidos pelo índice de duplicatas
+        cancelled: Se a execução foi cancelada antes de iniciar todos os PDFs
+        validated: Notas validadas contra o XSD (ver ValidationPolicy)
+    """
+    outputs: List[Path] = field(default_factory=list)
+    converted: int = 0
+    skipped: int = 0
+    pruned: int = 0
+    failures: List["FileFailure"] = field(default_factory=list)
+    duplicates: List["DuplicateEntry"] = field(default_factory=list)
+    cancelled: bool = False
+    validated: int = 0
+
+
+class ConvertedNote(NamedTuple):
+    """CompNfse de uma nota serializado em UTF-8.
+
+    Attributes:
+        fragment: Bytes do CompNfse
+        group: Grupo de saída (CNPJ do prestador com group_by_prestador)
+        key: Identidade da nota: (CNPJ do prestador, número, código de verificação)
+    """
+    fragment: bytes
+    group: Optional[str]
+    key: Tuple[str, str, str]
+
+
+@dataclass(frozen=True)
+class FaultPolicy:
+    """Configuração do modo em lote tolerante a falhas.
+
+    Com uma FaultPolicy a falha de um PDF é registrada e a conversão segue
+    com os demais; os XMLs dos PDFs convertidos são gravados normalmente.
+
+    Attributes:
+        retries: Novas tentativas após a primeira falha de um PDF
+        timeout: Limite em segundos de cada tentativa (None = sem limite).
+            Exige sinais POSIX; a conversão passa a rodar em processos
+            separados mesmo com workers=1
+        report_path: Relatório JSON de erros (None = ao lado da saída)
+    """
+    retries: int = 0
+    timeout: Optional[float] = None
+    report_path: Optional[Path] = None
+
+
+@dataclass(frozen=True)
+class ProfilePolicy:
+    """Configuração do modo de perfilamento (cProfile) da conversão.
+
+    Cada PDF é perfilado separadamente, com um perfil por etapa (read,
+    parse, build, write), e gera um relatório com as funções mais caras.
+    Ao final da execução, os PDFs cuja leitura (etapa read) passou de
+    outlier_factor vezes a mediana do lote são listados em outliers.json.
+
+    Attributes:
+        report_dir: Pasta dos relatórios (<pdf>.txt, <pdf>.pstats e outliers.json)
+        top: Quantidade de funções listadas por etapa
+        sort: Critério de ordenação do pstats ("cumulative", "tottime", ...)
+        outlier_factor: Múltiplo da mediana a partir do qual um PDF é destacado
+    """
+    report_dir: Path
+    top: int = 20
+    sort: str = "cumulative"
+    outlier_factor: float = 3.0
+
+
+@dataclass(frozen=True)
+class DuplicatePolicy:
+    """Configuração da detecção de notas repetidas entre execuções.
+
+    O índice guarda o hash de cada PDF convertido e a chave (CNPJ do
+    prestador, número, código de verificação) de cada nota. PDFs cujo hash
+    já está no índice são reconhecidos antes da extração.
+
+    Attributes:
+        index_path: Arquivo SQLite do índice
+        action: DEDUPE omite as notas repetidas (o PDF segue com as demais);
+            SKIP omite o PDF inteiro se alguma nota dele for repetida;
+            REPORT converte tudo e apenas relata as repetições
+        report_path: Relatório JSON de duplicatas (None = ao lado da saída)
+    """
+    DEDUPE = "dedupe"
+    SKIP = "skip"
+    REPORT = "report"
+
+    index_path: Path
+    action: str = "dedupe"
+    report_path: Optional[Path] = None
+
+
+@dataclass(frozen=True)
+class PreScanPolicy:
+    """Seleção e ordenação dos PDFs de entrada só pelo nome e tamanho.
+
+    Nenhum byte dos PDFs é lido: o número da nota e a retenção saem do nome
+    do arquivo (ex.: "NFS 298292 - SERVIMEX (COM RETENÇÃO).pdf").
+
+    Attributes:
+        patterns: Expressões regulares aplicadas ao nome do arquivo, na
+            ordem; o grupo "numero" dá o número da nota e o grupo
+            "retencao" ("COM" ou "SEM") a retenção. Vazio = padrão ServiMax
+        numero_min: Menor número de nota aceito (None = sem limite)
+        numero_max: Maior número de nota aceito (None = sem limite)
+        retencao: True só com retenção, False só sem retenção, None = ambos
+        shard_index: Parte desta execução, de 0 a shard_count - 1
+        shard_count: Quantidade de partes em que a pasta é dividida; a parte
+            de cada arquivo depende só do nome, então máquinas diferentes
+            chegam à mesma divisão
+        largest_first: Agenda primeiro os PDFs maiores (no modo consolidado
+            as notas saem nessa ordem)
+    """
+    patterns: Tuple[str, ...] = ()
+    numero_min: Optional[int] = None
+    numero_max: Optional[int] = None
+    retencao: Optional[bool] = None
+    shard_index: int = 0
+    shard_count: int = 1
+    largest_first: bool = False
+
+    @property
+    def filters(self) -> bool:
+        """True se a política pode deixar PDFs de fora (e não só reordená-los)."""
+        return (
+            self.numero_min is not None or self.numero_max is not None
+            or self.retencao is not None or self.shard_count > 1
+        )
+
+
+@dataclass(frozen=True)
+class ValidationPolicy:
+    """Validação de cada CompNfse gerado contra o XSD, no próprio worker.
+
+    O esquema é compilado uma vez por processo e reaproveitado em todas as
+    notas. Uma nota inválida faz o PDF falhar na etapa "validate" (com
+    FaultPolicy, o PDF entra no relatório de erros). Requer o pacote lxml.
+
+    Attributes:
+        mode: FULL valida todas as notas; SAMPLE valida só uma amostra
+        sample_rate: Fração das notas validadas no modo SAMPLE (0 < taxa <= 1).
+            A amostra depende só da chave da nota, então a mesma nota é
+            sempre sorteada (ou não), com qualquer número de workers
+        schema_path: XSD usado (None = esquema incluído em services/schemas)
+    """
+    FULL = "full"
+    SAMPLE = "sample"
+
+    mode: str = "full"
+    sample_rate: float = 0.05
+    schema_path: Optional[Path] = None
+
+
+@dataclass(frozen=True)
+class DuplicateEntry:
+    """PDF ou nota já vista em uma execução anterior ou na atual.
+
+    Attributes:
+        pdf_path: PDF em que a repetição foi encontrada
+        first_source: PDF em que o arquivo ou a nota apareceu primeiro
+        action: "skipped" (PDF omitido), "dropped" (nota omitida) ou "reported"
+        key: Chave da nota repetida; None quando o PDF inteiro foi reconhecido pelo hash
+        sha256: Hash do PDF reconhecido pelo hash
+    """
+    pdf_path: Path
+    first_source: str
+    action: str
+    key: Optional[Tuple[str, str, str]] = None
+    sha256: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        entry = {"file": str(self.pdf_path), "first_source": self.first_source, "action": self.action}
+        if self.key is not None:
+            entry.update(zip(("prestador_cnpj", "numero", "codigo_verificacao"), self.key))
+        if self.sha256 is not None:
+            entry["sha256"] = self.sha256
+        return entry
+
+
+@dataclass(frozen=True)
+class FileFailure:
+    """Falha definitiva de um PDF após todas as tentativas.
+
+    Attributes:
+        pdf_path: PDF que falhou
+        stage: Etapa da última falha (read, parse, build, validate ou write;
+            worker quando o processo do pool morreu durante o PDF)
+        exception: Nome da classe da exceção
+        message: Mensagem da exceção
+        elapsed: Segundos gastos no PDF somando todas as tentativas
+        attempts: Quantidade de tentativas realizadas
+    """
+    pdf_path: Path
+    stage: str
+    exception: str
+    message: str
+    elapsed: float
+    attempts: int
+
+    def to_dict(self) -> dict:
+        return {
+            "file": str(self.pdf_path),
+            "stage": self.stage,
+            "exception": self.exception,
+            "message": self.message,
+            "elapsed": round(self.elapsed, 6),
+            "attempts": self.attempts,
+        }
+
+
+@dataclass(frozen=True)
+class ConversionEvent:
+    """Evento de progresso de um PDF durante a conversão assíncrona.
+
+    Attributes:
+        kind: STARTED, FINISHED ou FAILED
+        pdf_path: PDF ao qual o evento se refere
+        index: Posição do PDF na lista de entrada (ordem alfabética)
+        total: Quantidade de PDFs a converter nesta execução
+        completed: PDFs concluídos (com sucesso ou falha) até este evento
+        output: XML gerado (FINISHED no modo por arquivo)
+        elapsed: Segundos entre o início e o fim do arquivo (FINISHED/FAILED)
+        error: Descrição da exceção (FAILED)
+    """
+    STARTED = "started"
+    FINISHED = "finished"
+    FAILED = "failed"
+
+    kind: str
+    pdf_path: Path
+    index: int
+    total: int
+    completed: int
+    output: Optional[Path] = None
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class FileMetrics:
+    """Medições de um PDF em uma execução de convert_directory.
+
+    Attributes:
+        pdf_path: PDF medido
+        stages: Segundos gastos em cada etapa (read, parse, build, validate, write)
+        bytes_in: Tamanho do PDF
+        bytes_out: Bytes de XML gravados para a nota
+        validated: Notas do PDF validadas contra o XSD
+        elapsed: Segundos totais no PDF, incluindo novas tentativas
+        ok: Se a conversão terminou com sucesso
+    """
+    pdf_path: Path
+    stages: Dict[str, float] = field(default_factory=dict)
+    bytes_in: int = 0
+    bytes_out: int = 0
+    validated: int = 0
+    elapsed: float = 0.0
+    ok: bool = True
@@ -4,8 +4,9 @@ Este módulo contém as classes de domínio que representam os dados
 extraídos de PDFs de NFSe e utilizados na geração de XML ABRASF.
 """
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from typing import NamedTuple
 
 
 @dataclass(frozen=True)
@@ -106,3 +107,69 @@ class NFSeData:
     @property
     def data_iso(self) -> str:
         return self.data_emissao.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def to_dict(self) -> dict:
+        """Dicionário serializável em JSON (data de emissão em ISO 8601)."""
+        data = asdict(self)
+        data["data_emissao"] = self.data_iso
+        return data
+
+
+class ValoresServicoRecord(NamedTuple):
+    """Variante imutável e compacta (sem __dict__) de ValoresServico."""
+    valor_servicos: float = 0.0
+    pis: float = 0.0
+    cofins: float = 0.0
+    csll: float = 0.0
+    irrf: float = 0.0
+    inss: float = 0.0
+    iss: float = 0.0
+
+    @classmethod
+    def from_valores(cls, valores: ValoresServico) -> "ValoresServicoRecord":
+        return cls(
+            valores.valor_servicos, valores.pis, valores.cofins, valores.csll,
+            valores.irrf, valores.inss, valores.iss,
+        )
+
+    def to_valores(self) -> ValoresServico:
+        return ValoresServico(*self)
+
+
+class NFSeRecord(NamedTuple):
+    """Variante imutável e compacta (sem __dict__) de NFSeData.
+
+    Indicada para manter muitas notas em memória (relatórios, conciliação);
+    o Prestador é compartilhado entre as notas, não copiado.
+    """
+    numero: str
+    codigo_verificacao: str
+    data_emissao: datetime
+    valores: ValoresServicoRecord
+    prestador: Prestador
+    discriminacao: str = "Servicos conforme NFSe"
+    natureza_operacao: str = "1"
+    optante_simples: str = "2"
+    incentivador_cultural: str = "2"
+    serie_rps: str = "U"
+    tipo_rps: str = "1"
+
+    @classmethod
+    def from_data(cls, data: NFSeData) -> "NFSeRecord":
+        return cls(
+            data.numero, data.codigo_verificacao, data.data_emissao,
+            ValoresServicoRecord.from_valores(data.valores), data.prestador,
+            data.discriminacao, data.natureza_operacao, data.optante_simples,
+            data.incentivador_cultural, data.serie_rps, data.tipo_rps,
+        )
+
+    def to_data(self) -> NFSeData:
+        return NFSeData(*self[:3], self.valores.to_valores(), *self[4:])
+
+    @property
+    def competencia(self) -> str:
+        return self.data_emissao.strftime("%Y-%m-%d")
+
+    @property
+    def data_iso(self) -> str:
+        return self.data_emissao.strftime("%Y-%m-%dT%H:%M:%S")
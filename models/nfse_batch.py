@@ -0,0 +1,133 @@
+"""Lote colunar de NFSe para relatórios e totalizações.
+
+Guarda cada campo em uma coluna própria: valores em array("d"), data de
+emissão em array("q") no formato aaaammddhhmmss e o prestador como índice
+para uma tabela de prestadores. Dezenas de milhares de notas ocupam poucos
+megabytes. O ganho é de memória: as totalizações por competência ainda
+agrupam as notas em Python, índice a índice.
+"""
+
+from array import array
+from datetime import datetime
+import math
+from typing import Dict, Iterable, Iterator, List, Union
+
+from models.nfse import NFSeData, NFSeRecord, Prestador
+
+VALUE_FIELDS = ("valor_servicos", "pis", "cofins", "csll", "irrf", "inss", "iss")
+
+# Divisor de data_emissao (aaaammddhhmmss) que produz a chave de cada período.
+PERIODS = {"month": 10 ** 8, "day": 10 ** 6}
+
+
+class NFSeBatch:
+    """Coleção colunar de notas; mantém somente os campos usados em relatórios.
+
+    Attributes:
+        numero: Número de cada nota
+        codigo_verificacao: Código de verificação de cada nota
+        emissao: Data e hora de emissão como inteiro aaaammddhhmmss
+        prestador_index: Posição do prestador de cada nota em prestadores
+        prestadores: Prestadores distintos, na ordem em que apareceram
+        values: Uma coluna por campo de VALUE_FIELDS
+    """
+    def __init__(self) -> None:
+        self.numero: List[str] = []
+        self.codigo_verificacao: List[str] = []
+        self.emissao = array("q")
+        self.prestador_index = array("I")
+        self.prestadores: List[Prestador] = []
+        self.values: Dict[str, array] = {name: array("d") for name in VALUE_FIELDS}
+        self._prestador_ids: Dict[Prestador, int] = {}
+
+    @classmethod
+    def from_notes(cls, notes: Iterable[Union[NFSeData, NFSeRecord]]) -> "NFSeBatch":
+        batch = cls()
+        batch.extend(notes)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.numero)
+
+    def append(self, note: Union[NFSeData, NFSeRecord]) -> None:
+        prestador_id = self._prestador_ids.get(note.prestador)
+        if prestador_id is None:
+            prestador_id = len(self.prestadores)
+            self.prestadores.append(note.prestador)
+            self._prestador_ids[note.prestador] = prestador_id
+        emitted = note.data_emissao
+        self.numero.append(note.numero)
+        self.codigo_verificacao.append(note.codigo_verificacao)
+        self.emissao.append(
+            ((emitted.year * 100 + emitted.month) * 100 + emitted.day) * 1000000
+            + (emitted.hour * 100 + emitted.minute) * 100 + emitted.second
+        )
+        self.prestador_index.append(prestador_id)
+        valores = note.valores
+        for name in VALUE_FIELDS:
+            self.values[name].append(getattr(valores, name))
+
+    def extend(self, notes: Iterable[Union[NFSeData, NFSeRecord]]) -> None:
+        for note in notes:
+            self.append(note)
+
+    def emitted_at(self, index: int) -> datetime:
+        return datetime.strptime(str(self.emissao[index]), "%Y%m%d%H%M%S")
+
+    def totals(self) -> Dict[str, float]:
+        """Soma de cada campo de valor sobre todas as notas."""
+        return {name: round(math.fsum(column), 2) for name, column in self.values.items()}
+
+    def totals_by_competencia(self, period: str = "month") -> Dict[str, Dict[str, float]]:
+        """Soma de cada campo de valor por competência.
+
+        As notas são agrupadas por um laço sobre emissao (uma lista de índices
+        por competência) e cada campo é somado com math.fsum sobre esses
+        índices.
+
+        Args:
+            period: "month" (chave "aaaa-mm") ou "day" (chave "aaaa-mm-dd")
+
+        Returns:
+            Dicionário ordenado por competência; cada item traz a quantidade
+            de notas ("notas") e a soma de cada campo de VALUE_FIELDS
+
+        Raises:
+            ValueError: Se o período não for suportado
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Periodo invalido: {period}")
+        divisor = PERIODS[period]
+        groups: Dict[int, List[int]] = {}
+        for index, emitted in enumerate(self.emissao):
+            groups.setdefault(emitted // divisor, []).append(index)
+
+        result: Dict[str, Dict[str, float]] = {}
+        for key in sorted(groups):
+            indexes = groups[key]
+            totals: Dict[str, float] = {"notas": len(indexes)}
+            for name, column in self.values.items():
+                totals[name] = round(math.fsum(column[i] for i in indexes), 2)
+            result[self._period_label(key, period)] = totals
+        return result
+
+    def rows(self) -> Iterator[dict]:
+        """Uma linha plana por nota, na ordem de inclusão."""
+        for index in range(len(self)):
+            emitted = self.emitted_at(index)
+            row = {
+                "numero": self.numero[index],
+                "codigo_verificacao": self.codigo_verificacao[index],
+                "data_emissao": emitted.strftime("%Y-%m-%dT%H:%M:%S"),
+                "competencia": emitted.strftime("%Y-%m-%d"),
+                "prestador_cnpj": self.prestadores[self.prestador_index[index]].cnpj,
+            }
+            for name, column in self.values.items():
+                row[name] = column[index]
+            yield row
+
+    def _period_label(self, key: int, period: str) -> str:
+        text = str(key)
+        if period == "month":
+            return f"{text[:4]}-{text[4:6]}"
+        return f"{text[:4]}-{text[4:6]}-{text[6:8]}"
@@ -0,0 +1,104 @@
+"""Exportação de lotes de NFSe para arquivos planos.
+
+Gera CSV (sempre disponível) ou Parquet (requer o pacote opcional pyarrow)
+diretamente a partir de um NFSeBatch, sem passar pelo XML. Os arquivos são
+gravados em um temporário e renomeados ao final.
+"""
+
+import csv
+import os
+from pathlib import Path
+from typing import Dict
+
+from models.nfse_batch import VALUE_FIELDS, NFSeBatch
+
+NOTE_COLUMNS = ("numero", "codigo_verificacao", "data_emissao", "competencia", "prestador_cnpj") + VALUE_FIELDS
+
+
+def export_batch(batch: NFSeBatch, path: Path) -> Path:
+    """Exporta uma linha por nota; o formato segue a extensão (.parquet ou CSV)."""
+    path = Path(path)
+    if path.suffix.lower() == ".parquet":
+        write_parquet(batch, path)
+    else:
+        write_csv(batch, path)
+    return path
+
+
+def write_csv(batch: NFSeBatch, path: Path) -> None:
+    """Grava as notas em CSV (UTF-8, separador ";", valores com duas casas)."""
+    tmp_path = _tmp_path(path)
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle, delimiter=";")
+            writer.writerow(NOTE_COLUMNS)
+            for row in batch.rows():
+                writer.writerow([_format(row[column]) for column in NOTE_COLUMNS])
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_totals_csv(totals: Dict[str, Dict[str, float]], path: Path) -> None:
+    """Grava o resultado de NFSeBatch.totals_by_competencia em CSV."""
+    tmp_path = _tmp_path(path)
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as handle:
+            writer = csv.writer(handle, delimiter=";")
+            writer.writerow(("competencia", "notas") + VALUE_FIELDS)
+            for competencia, values in totals.items():
+                writer.writerow(
+                    [competencia, values["notas"]] + [_format(values[name]) for name in VALUE_FIELDS]
+                )
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_parquet(batch: NFSeBatch, path: Path) -> None:
+    """Grava as notas em Parquet com as colunas de NOTE_COLUMNS, como o CSV.
+
+    Raises:
+        RuntimeError: Se o pacote pyarrow não estiver instalado
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Exportacao Parquet requer o pacote pyarrow") from exc
+
+    emitted = [batch.emitted_at(i) for i in range(len(batch))]
+    data = {
+        "numero": batch.numero,
+        "codigo_verificacao": batch.codigo_verificacao,
+        "data_emissao": emitted,
+        "competencia": [moment.date() for moment in emitted],
+        "prestador_cnpj": [batch.prestadores[i].cnpj for i in batch.prestador_index],
+    }
+    data.update(batch.values)
+    types = {
+        "numero": pa.string(),
+        "codigo_verificacao": pa.string(),
+        "data_emissao": pa.timestamp("s"),
+        "competencia": pa.date32(),
+        "prestador_cnpj": pa.string(),
+    }
+    # Mesmas colunas e na mesma ordem do CSV; os campos de valor são float64.
+    columns = {name: pa.array(data[name], type=types.get(name, pa.float64())) for name in NOTE_COLUMNS}
+    tmp_path = _tmp_path(path)
+    try:
+        pq.write_table(pa.table(columns), str(tmp_path))
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _format(value: object) -> str:
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def _tmp_path(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp")
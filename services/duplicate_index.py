@@ -0,0 +1,180 @@
+"""Índice persistente de PDFs e notas já convertidos.
+
+Guarda em SQLite o hash SHA-256 de cada PDF convertido e a chave (CNPJ do
+prestador, número, código de verificação) de cada nota, com o PDF em que
+apareceram primeiro. As consultas são por chave primária; as inclusões de
+uma execução ficam pendentes e só são gravadas, em uma única transação,
+depois que a saída foi escrita, para que uma execução interrompida não
+marque como conhecidas notas sem XML.
+"""
+
+import json
+import os
+from pathlib import Path
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from models.conversion import DuplicateEntry, DuplicatePolicy
+from services.pdf_source import PDFSource, source_path, source_sha256
+
+if TYPE_CHECKING:
+    import sqlite3
+
+NoteKey = Tuple[str, str, str]
+
+REPORT_FORMAT = 1
+
+
+class DuplicateIndex:
+    """Índice em SQLite consultado pelo processo principal da conversão."""
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._connection: Optional["sqlite3.Connection"] = None
+
+    def file_source(self, sha256: str) -> Optional[str]:
+        """PDF em que o conteúdo com esse hash foi convertido, ou None."""
+        row = self._connect().execute("SELECT source FROM files WHERE sha256 = ?", (sha256,)).fetchone()
+        return row[0] if row else None
+
+    def note_source(self, key: NoteKey) -> Optional[str]:
+        """PDF em que a nota apareceu primeiro, ou None."""
+        row = self._connect().execute(
+            "SELECT source FROM notes WHERE cnpj = ? AND numero = ? AND codigo = ?", key
+        ).fetchone()
+        return row[0] if row else None
+
+    def add(self, files: Dict[str, str], notes: Dict[NoteKey, str]) -> None:
+        """Grava hashes de PDFs e chaves de notas com o PDF de origem."""
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR IGNORE INTO files (sha256, source, seen) VALUES (?, ?, ?)",
+                [(sha256, source, now) for sha256, source in files.items()],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO notes (cnpj, numero, codigo, source, seen) VALUES (?, ?, ?, ?, ?)",
+                [(*key, source, now) for key, source in notes.items()],
+            )
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self) -> "sqlite3.Connection":
+        if self._connection is not None:
+            return self._connection
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        import sqlite3
+
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "sha256 TEXT PRIMARY KEY, source TEXT NOT NULL, seen REAL NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            "cnpj TEXT NOT NULL, numero TEXT NOT NULL, codigo TEXT NOT NULL, "
+            "source TEXT NOT NULL, seen REAL NOT NULL, "
+            "PRIMARY KEY (cnpj, numero, codigo)) WITHOUT ROWID"
+        )
+        self._connection = conn
+        return conn
+
+
+class DuplicateFilter:
+    """Aplica uma DuplicatePolicy aos PDFs e notas de uma execução.
+
+    As decisões seguem a ordem dos PDFs de entrada, de modo que em
+    repetições dentro da mesma execução o primeiro PDF é sempre o mantido.
+    """
+    def __init__(self, policy: DuplicatePolicy) -> None:
+        if policy.action not in (DuplicatePolicy.DEDUPE, DuplicatePolicy.SKIP, DuplicatePolicy.REPORT):
+            raise ValueError(f"Acao de duplicata invalida: {policy.action}")
+        self.policy = policy
+        self.index = DuplicateIndex(policy.index_path)
+        self.duplicates: List[DuplicateEntry] = []
+        self._hashes: Dict[PDFSource, str] = {}
+        self._pending_files: Dict[str, str] = {}
+        self._pending_notes: Dict[NoteKey, str] = {}
+
+    def filter_files(self, pdf_files: Sequence[PDFSource]) -> List[PDFSource]:
+        """Descarta, antes da extração, PDFs cujo conteúdo já é conhecido.
+
+        Com REPORT nenhum PDF é descartado; os conhecidos são só relatados.
+        """
+        selected = []
+        for pdf in pdf_files:
+            sha256 = source_sha256(pdf)
+            self._hashes[pdf] = sha256
+            source = self._pending_files.get(sha256) or self.index.file_source(sha256)
+            if source is None:
+                self._pending_files[sha256] = str(source_path(pdf))
+                selected.append(pdf)
+                continue
+            report_only = self.policy.action == DuplicatePolicy.REPORT
+            self.duplicates.append(DuplicateEntry(
+                pdf_path=source_path(pdf), first_source=source, action="reported" if report_only else "skipped",
+                sha256=sha256,
+            ))
+            if report_only:
+                selected.append(pdf)
+        return selected
+
+    def admit(self, pdf_path: PDFSource, keys: Sequence[NoteKey]) -> List[bool]:
+        """Decide quais notas do PDF entram na saída e reserva as novas.
+
+        Returns:
+            Um booleano por nota, na ordem de keys
+        """
+        sources = [self._pending_notes.get(key) or self.index.note_source(key) for key in keys]
+        action = self.policy.action
+        if action == DuplicatePolicy.REPORT:
+            admitted = [True] * len(keys)
+        elif action == DuplicatePolicy.SKIP and any(sources):
+            admitted = [False] * len(keys)
+        else:
+            admitted = [source is None for source in sources]
+        outcome = {DuplicatePolicy.REPORT: "reported", DuplicatePolicy.SKIP: "skipped"}.get(action, "dropped")
+        for key, source in zip(keys, sources):
+            if source is not None:
+                self.duplicates.append(DuplicateEntry(
+                    pdf_path=source_path(pdf_path), first_source=source, action=outcome, key=key,
+                ))
+        if any(admitted):
+            for key, source, kept in zip(keys, sources, admitted):
+                if kept and source is None:
+                    self._pending_notes[key] = str(source_path(pdf_path))
+        else:
+            # Nada do PDF foi gravado: o hash não deve marcá-lo como convertido.
+            self._pending_files.pop(self._hashes.get(pdf_path, ""), None)
+        return admitted
+
+    def discard(self, pdf_path: PDFSource) -> None:
+        """Esquece o hash de um PDF que falhou na conversão."""
+        self._pending_files.pop(self._hashes.get(pdf_path, ""), None)
+
+    def commit(self) -> None:
+        """Grava no índice os PDFs e notas admitidos nesta execução."""
+        self.index.add(self._pending_files, self._pending_notes)
+        self._pending_files = {}
+        self._pending_notes = {}
+
+    def close(self) -> None:
+        self.index.close()
+
+
+def write_duplicate_report(path: Path, duplicates: Sequence[DuplicateEntry]) -> None:
+    """Grava as duplicatas em JSON de forma atômica; sem duplicatas remove o relatório anterior."""
+    path = Path(path)
+    if not duplicates:
+        path.unlink(missing_ok=True)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"format": REPORT_FORMAT, "duplicates": [entry.to_dict() for entry in duplicates]}
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(payload, indent=1, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
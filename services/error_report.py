@@ -0,0 +1,27 @@
+"""Relatório de erros do modo em lote tolerante a falhas."""
+
+import json
+import os
+from pathlib import Path
+from typing import Sequence
+
+from models.conversion import FileFailure
+
+REPORT_FORMAT = 1
+
+
+def write_error_report(path: Path, failures: Sequence[FileFailure]) -> None:
+    """Grava as falhas em JSON de forma atômica (arquivo temporário + rename).
+
+    Sem falhas, remove o relatório de uma execução anterior para que o
+    arquivo nunca descreva erros que já não existem.
+    """
+    path = Path(path)
+    if not failures:
+        path.unlink(missing_ok=True)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"format": REPORT_FORMAT, "failures": [failure.to_dict() for failure in failures]}
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps(payload, indent=1, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
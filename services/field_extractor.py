@@ -0,0 +1,109 @@
+"""Extração dos campos da NFSe com padrões pré-compilados.
+
+O texto é convertido para minúsculas uma única vez; a partir daí cada rótulo
+é localizado por um padrão sem IGNORECASE, o que permite ao motor de regex
+saltar direto para o prefixo literal em vez de testar cada posição. Os
+valores são lidos logo após o rótulo, sem o retrocesso de `.*?` com DOTALL
+sobre o documento inteiro.
+"""
+
+from dataclasses import dataclass
+import re
+from typing import Dict, Optional, Tuple
+
+NUMERO = re.compile(r"nfse\s*(\d+)")
+# Leitura rápida: sem ordenação de caixas o número da NFSe vem logo após o
+# valor da Competência e antes do rótulo da RPS. Na extração completa o que
+# precede o rótulo é a própria Competência; ancorar no bloco evita tomar os
+# segundos da hora como número (o campo fica ausente e missing_fields aciona
+# a extração completa).
+NUMERO_RPS = re.compile(
+    r"compet\S*ncia\s*\d{2}/\d{2}/\d{4}(?:\s*\d{2}:\d{2}:\d{2})?\s*(\d+)\s*n\S*mero da rps"
+)
+CODIGO = re.compile(r"c[oó]digo de verifica[cç][aã]o\s*([\w\d]+)")
+DATA_EMISSAO = re.compile(r"(\d{2}/\d{2}/\d{4})\s*(\d{2}:\d{2}:\d{2})")
+VALOR_SERVICOS = re.compile(r"valor\s*(?:de|dos)\s*servi\S*os\s*r\$[: ]*")
+NUMBER = re.compile(r"[\d\.,]+")
+AMOUNT = re.compile(r"r\$[: ]*([\d\.,]+)")
+
+# Rótulo de cada tributo; o valor é o primeiro "R$ <número>" depois dele.
+TAX_LABELS: Tuple[Tuple[str, str], ...] = (
+    ("pis", "pis"),
+    ("cofins", "cofins"),
+    ("csll", "csll"),
+    ("irrf", "irrf"),
+    ("inss", "inss"),
+    ("iss", "valor iss"),
+)
+
+
+@dataclass
+class ExtractedFields:
+    """Valores brutos encontrados no texto; None quando o campo não existe.
+
+    Attributes:
+        numero: Número da NFSe
+        codigo_verificacao: Código de verificação
+        data_emissao: Data e hora no formato "dd/mm/aaaa hh:mm:ss"
+        valor_servicos: Valor dos serviços como aparece no PDF ("1.347,42")
+        impostos: Valor de cada tributo de TAX_LABELS como aparece no PDF
+    """
+    numero: Optional[str] = None
+    codigo_verificacao: Optional[str] = None
+    data_emissao: Optional[str] = None
+    valor_servicos: Optional[str] = None
+    impostos: Optional[Dict[str, Optional[str]]] = None
+
+
+def lower_aligned(content: str) -> str:
+    """content em minúsculas com o mesmo comprimento, posição a posição.
+
+    Raros caracteres mudam de tamanho ao virar minúsculos (ex.: "İ"); eles
+    são mantidos como estão para que as posições encontradas no texto em
+    minúsculas continuem valendo no texto original.
+    """
+    text = content.lower()
+    if len(text) != len(content):
+        text = "".join(char if len(char.lower()) != 1 else char.lower() for char in content)
+    return text
+
+
+class NFSeFieldExtractor:
+    """Localiza todos os campos da NFSe com buscas ancoradas em rótulos."""
+    def extract(self, content: str) -> ExtractedFields:
+        text = lower_aligned(content)
+
+        return ExtractedFields(
+            numero=self._numero(text),
+            codigo_verificacao=self._codigo(content, text),
+            data_emissao=self._data_emissao(content),
+            valor_servicos=self._valor_servicos(text),
+            impostos={name: self._imposto(text, label) for name, label in TAX_LABELS},
+        )
+
+    def _numero(self, text: str) -> Optional[str]:
+        match = NUMERO.search(text) or NUMERO_RPS.search(text)
+        return match.group(1) if match else None
+
+    def _codigo(self, content: str, text: str) -> Optional[str]:
+        # O código diferencia maiúsculas: lê do texto original.
+        match = CODIGO.search(text)
+        return content[match.start(1):match.end(1)] if match else None
+
+    def _data_emissao(self, content: str) -> Optional[str]:
+        match = DATA_EMISSAO.search(content)
+        return f"{match.group(1)} {match.group(2)}" if match else None
+
+    def _valor_servicos(self, text: str) -> Optional[str]:
+        label = VALOR_SERVICOS.search(text)
+        match = NUMBER.search(text, label.end()) if label else None
+        return match.group() if match else None
+
+    def _imposto(self, text: str, label: str) -> Optional[str]:
+        # Se não há valor após a primeira ocorrência do rótulo, também não
+        # há após as seguintes: basta procurar a partir da primeira.
+        position = text.find(label)
+        if position < 0:
+            return None
+        match = AMOUNT.search(text, position + len(label))
+        return match.group(1) if match else None
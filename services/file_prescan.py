@@ -0,0 +1,105 @@
+"""Pré-seleção dos PDFs de entrada pelo nome do arquivo.
+
+Os PDFs da ServiMax trazem no nome o número da nota e se há retenção
+("NFS 298292 - SERVIMEX (COM RETENÇÃO).pdf"). Antes de qualquer leitura de
+conteúdo, os nomes são interpretados com expressões regulares configuráveis
+para filtrar por faixa de número e retenção, dividir a pasta em partes
+determinísticas (uma por máquina) e ordenar os maiores arquivos primeiro.
+"""
+
+from pathlib import Path
+import re
+from typing import List, NamedTuple, Optional, Pattern, Sequence
+import zlib
+
+from models.conversion import PreScanPolicy
+from services.pdf_source import PDFSource, source_path, source_size
+
+DEFAULT_NAME_PATTERNS = (
+    r"^NFS\s*(?P<numero>\d+)\s*-.*\((?P<retencao>COM|SEM)\s+RETEN[CÇ][AÃ]O\)",
+    r"^NFS\s*(?P<numero>\d+)",
+)
+
+
+class FileNameInfo(NamedTuple):
+    """Campos extraídos do nome de um PDF (None quando ausentes)."""
+    path: Path
+    numero: Optional[int]
+    retencao: Optional[bool]
+
+
+def compile_patterns(patterns: Sequence[str]) -> List[Pattern[str]]:
+    """Compila os padrões de nome (sem distinção de maiúsculas).
+
+    Raises:
+        ValueError: Se algum padrão não for uma expressão regular válida
+    """
+    compiled = []
+    for pattern in patterns or DEFAULT_NAME_PATTERNS:
+        try:
+            compiled.append(re.compile(pattern, re.IGNORECASE))
+        except re.error as exc:
+            raise ValueError(f"Padrao de nome invalido: {pattern} ({exc})") from exc
+    return compiled
+
+
+def parse_file_name(path: Path, patterns: Sequence[Pattern[str]]) -> FileNameInfo:
+    """Aplica o primeiro padrão que casar com o nome (sem extensão)."""
+    for pattern in patterns:
+        match = pattern.search(path.stem)
+        if match is None:
+            continue
+        groups = match.groupdict()
+        numero = groups.get("numero")
+        retencao = groups.get("retencao")
+        return FileNameInfo(
+            path,
+            int(numero) if numero else None,
+            retencao.upper() == "COM" if retencao else None,
+        )
+    return FileNameInfo(path, None, None)
+
+
+def shard_of(path: Path, shard_count: int) -> int:
+    """Parte de um arquivo: CRC32 do nome, estável entre processos e máquinas."""
+    return zlib.crc32(path.name.encode("utf-8")) % shard_count
+
+
+def prescan(pdf_files: Sequence[PDFSource], policy: PreScanPolicy) -> List[PDFSource]:
+    """Seleciona e ordena os PDFs conforme a política, sem abrir os arquivos.
+
+    Membros de zip e PDFs em memória são avaliados pelo nome do membro ou
+    do MemoryPDF. Com filtro de número ou de retenção, PDFs cujo nome não
+    informa o campo filtrado ficam de fora. A ordem de entrada é mantida, exceto com
+    largest_first (tamanho decrescente; empates na ordem de entrada).
+
+    Raises:
+        ValueError: Se a faixa de números, a parte ou algum padrão for inválido
+    """
+    if policy.shard_count < 1 or not 0 <= policy.shard_index < policy.shard_count:
+        raise ValueError(f"Parte invalida: {policy.shard_index}/{policy.shard_count}")
+    if policy.numero_min is not None and policy.numero_max is not None and policy.numero_min > policy.numero_max:
+        raise ValueError(f"Faixa de numeros invalida: {policy.numero_min}-{policy.numero_max}")
+    patterns = compile_patterns(policy.patterns)
+    filter_numero = policy.numero_min is not None or policy.numero_max is not None
+
+    selected = []
+    for pdf in pdf_files:
+        pdf = Path(pdf) if isinstance(pdf, str) else pdf
+        name = source_path(pdf)
+        if policy.shard_count > 1 and shard_of(name, policy.shard_count) != policy.shard_index:
+            continue
+        if filter_numero or policy.retencao is not None:
+            info = parse_file_name(name, patterns)
+            if filter_numero and (
+                info.numero is None
+                or (policy.numero_min is not None and info.numero < policy.numero_min)
+                or (policy.numero_max is not None and info.numero > policy.numero_max)
+            ):
+                continue
+            if policy.retencao is not None and info.retencao != policy.retencao:
+                continue
+        selected.append(pdf)
+    if policy.largest_first:
+        selected.sort(key=source_size, reverse=True)
+    return selected
@@ -0,0 +1,106 @@
+"""Manifesto da conversão incremental.
+
+Registra, para cada XML gerado na pasta de saída, os metadados do PDF de
+origem (mtime, tamanho e hash) e a versão do pipeline que o produziu. PDFs
+processados sem XML próprio (todas as notas omitidas pelo índice de
+duplicatas) também entram, com output None, para não serem relidos a cada
+execução.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.pdf_reader import file_sha256
+
+MANIFEST_NAME = ".conversao_manifest.json"
+MANIFEST_FORMAT = 1
+
+
+class ConversionManifest:
+    """Manifesto persistido em JSON dentro da pasta de saída."""
+    def __init__(self, target_dir: Path, entries: Dict[str, dict]) -> None:
+        self.target_dir = target_dir
+        self.entries = entries
+
+    @classmethod
+    def load(cls, target_dir: Path) -> "ConversionManifest":
+        path = target_dir / MANIFEST_NAME
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return cls(target_dir, {})
+        if payload.get("format") != MANIFEST_FORMAT:
+            return cls(target_dir, {})
+        return cls(target_dir, payload.get("entries", {}))
+
+    def save(self) -> None:
+        """Grava o manifesto de forma atômica (arquivo temporário + rename)."""
+        path = self.target_dir / MANIFEST_NAME
+        tmp_path = path.with_name(path.name + ".tmp")
+        payload = {"format": MANIFEST_FORMAT, "entries": self.entries}
+        tmp_path.write_text(json.dumps(payload, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def plan(self, pdf_files: Iterable[Path], pipeline: str) -> Tuple[List[Path], List[Path]]:
+        """Separa os PDFs entre pendentes de conversão e já atualizados.
+
+        Returns:
+            Tupla (pendentes, atualizados)
+        """
+        pending: List[Path] = []
+        up_to_date: List[Path] = []
+        for pdf in pdf_files:
+            if self._is_up_to_date(pdf, pipeline):
+                up_to_date.append(pdf)
+            else:
+                pending.append(pdf)
+        return pending, up_to_date
+
+    def record(self, pdf: Path, output: Optional[Path], pipeline: str) -> None:
+        """Registra o PDF como atualizado; output None = sem XML próprio."""
+        stat = pdf.stat()
+        self.entries[pdf.name] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": file_sha256(pdf),
+            "output": output.relative_to(self.target_dir).as_posix() if output is not None else None,
+            "pipeline": pipeline,
+        }
+
+    def prune(self, existing_names: Iterable[str]) -> List[Path]:
+        """Remove XMLs e entradas cujo PDF de origem não existe mais."""
+        existing = set(existing_names)
+        removed: List[Path] = []
+        for name in sorted(set(self.entries) - existing):
+            relative = self.entries.pop(name)["output"]
+            if relative is None:
+                continue
+            output = self.target_dir / relative
+            if output.exists():
+                output.unlink()
+                removed.append(output)
+        return removed
+
+    def output_for(self, pdf: Path) -> Optional[Path]:
+        """XML registrado para o PDF (None se não houver entrada ou XML próprio)."""
+        entry = self.entries.get(pdf.name)
+        if entry is None or entry["output"] is None:
+            return None
+        return self.target_dir / entry["output"]
+
+    def _is_up_to_date(self, pdf: Path, pipeline: str) -> bool:
+        entry = self.entries.get(pdf.name)
+        if entry is None or entry.get("pipeline") != pipeline:
+            return False
+        if entry["output"] is not None and not (self.target_dir / entry["output"]).exists():
+            return False
+        stat = pdf.stat()
+        if stat.st_mtime_ns == entry["mtime_ns"] and stat.st_size == entry["size"]:
+            return True
+        # Metadados mudaram (ex.: cópia ou touch): confirma pelo conteúdo.
+        if stat.st_size != entry["size"] or file_sha256(pdf) != entry["sha256"]:
+            return False
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
@@ -0,0 +1,151 @@
+"""Coleta e exportação de métricas de desempenho da conversão.
+
+O NFSeConverter mede cada etapa (read, parse, build, validate, write) de
+cada PDF, inclusive dentro dos processos do pool, e entrega as medições aos
+hooks registrados no processo principal. O MetricsCollector agrega essas medições
+e, ao fim da execução, pode gravá-las em JSON ou no formato texto do
+Prometheus.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from models.conversion import ConversionSummary, FileMetrics
+
+STAGES = ("read", "parse", "build", "validate", "write")
+EXPORT_FORMATS = ("json", "prometheus")
+
+
+class MetricsHook:
+    """Interface dos observadores de métricas; os métodos padrão não fazem nada."""
+    def on_run_start(self, total_files: int) -> None:
+        """Chamado antes do primeiro PDF de uma execução."""
+
+    def on_file(self, metrics: FileMetrics) -> None:
+        """Chamado no processo principal quando um PDF termina (ou falha)."""
+
+    def on_run_end(self, summary: ConversionSummary, elapsed: float) -> None:
+        """Chamado ao final da execução com o resumo e o tempo total."""
+
+
+class MetricsCollector(MetricsHook):
+    """Agrega as medições por etapa e exporta o resultado ao fim da execução.
+
+    Args:
+        export_path: Arquivo gravado em on_run_end (None = não exporta)
+        export_format: "json" ou "prometheus"
+    """
+    def __init__(self, export_path: Optional[Path] = None, export_format: str = "json") -> None:
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Formato de metricas invalido: {export_format}")
+        self.export_path = Path(export_path) if export_path else None
+        self.export_format = export_format
+        self.files: List[FileMetrics] = []
+        self.elapsed = 0.0
+
+    def on_run_start(self, total_files: int) -> None:
+        self.files = []
+        self.elapsed = 0.0
+
+    def on_file(self, metrics: FileMetrics) -> None:
+        self.files.append(metrics)
+
+    def on_run_end(self, summary: ConversionSummary, elapsed: float) -> None:
+        self.elapsed = elapsed
+        if self.export_path is None:
+            return
+        if self.export_format == "prometheus":
+            self.write_prometheus(self.export_path)
+        else:
+            self.write_json(self.export_path)
+
+    def aggregate(self) -> dict:
+        """Calcula p50/p95/max por etapa, vazão e volume de bytes.
+
+        As estatísticas por etapa consideram apenas os PDFs convertidos;
+        os que falharam entram somente na contagem de falhas.
+        """
+        converted = [metrics for metrics in self.files if metrics.ok]
+        stages: Dict[str, dict] = {}
+        for stage in STAGES:
+            values = sorted(m.stages[stage] for m in converted if stage in m.stages)
+            if values:
+                stages[stage] = {
+                    "count": len(values),
+                    "sum": sum(values),
+                    "p50": _percentile(values, 0.50),
+                    "p95": _percentile(values, 0.95),
+                    "max": values[-1],
+                }
+        return {
+            "files": len(converted),
+            "failed": len(self.files) - len(converted),
+            "elapsed": self.elapsed,
+            "files_per_second": len(converted) / self.elapsed if self.elapsed > 0 else 0.0,
+            "bytes_in": sum(m.bytes_in for m in converted),
+            "bytes_out": sum(m.bytes_out for m in converted),
+            "notes_validated": sum(m.validated for m in converted),
+            "stages": stages,
+        }
+
+    def write_json(self, path: Path) -> None:
+        _write_atomic(Path(path), json.dumps(self.aggregate(), indent=1, sort_keys=True))
+
+    def write_prometheus(self, path: Path) -> None:
+        _write_atomic(Path(path), self.to_prometheus())
+
+    def to_prometheus(self) -> str:
+        """Formata as métricas agregadas no formato texto do Prometheus."""
+        data = self.aggregate()
+        lines = [
+            "# HELP nfse_stage_seconds Tempo por PDF em cada etapa da conversao.",
+            "# TYPE nfse_stage_seconds summary",
+        ]
+        for stage, stats in data["stages"].items():
+            lines.append(f'nfse_stage_seconds{{stage="{stage}",quantile="0.5"}} {stats["p50"]:.6f}')
+            lines.append(f'nfse_stage_seconds{{stage="{stage}",quantile="0.95"}} {stats["p95"]:.6f}')
+            lines.append(f'nfse_stage_seconds_sum{{stage="{stage}"}} {stats["sum"]:.6f}')
+            lines.append(f'nfse_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        lines += [
+            "# HELP nfse_stage_seconds_max Maior tempo por PDF em cada etapa.",
+            "# TYPE nfse_stage_seconds_max gauge",
+        ]
+        for stage, stats in data["stages"].items():
+            lines.append(f'nfse_stage_seconds_max{{stage="{stage}"}} {stats["max"]:.6f}')
+        lines += [
+            "# HELP nfse_files_total PDFs processados por resultado.",
+            "# TYPE nfse_files_total counter",
+            f'nfse_files_total{{status="converted"}} {data["files"]}',
+            f'nfse_files_total{{status="failed"}} {data["failed"]}',
+            "# HELP nfse_files_per_second Vazao da execucao em PDFs convertidos por segundo.",
+            "# TYPE nfse_files_per_second gauge",
+            f'nfse_files_per_second {data["files_per_second"]:.6f}',
+            "# HELP nfse_run_seconds Duracao total da execucao.",
+            "# TYPE nfse_run_seconds gauge",
+            f'nfse_run_seconds {data["elapsed"]:.6f}',
+            "# HELP nfse_bytes_total Bytes lidos (PDF) e gravados (XML).",
+            "# TYPE nfse_bytes_total counter",
+            f'nfse_bytes_total{{direction="in"}} {data["bytes_in"]}',
+            f'nfse_bytes_total{{direction="out"}} {data["bytes_out"]}',
+            "# HELP nfse_notes_validated_total Notas validadas contra o XSD.",
+            "# TYPE nfse_notes_validated_total counter",
+            f'nfse_notes_validated_total {data["notes_validated"]}',
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    """Percentil com interpolação linear sobre valores já ordenados."""
+    position = (len(values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
@@ -0,0 +1,273 @@
+"""Destinos de saída alternativos do NFSeConverter.
+
+Dezenas de milhares de XMLs pequenos pesam em compartilhamentos de rede e
+rotinas de backup, e um único consolidado pode passar do limite de upload do
+portal. Os destinos daqui são usados no lugar da pasta por arquivo ou do
+consolidado único (ver OutputSink em services.xml_writer):
+
+- ZipArchiveSink: um XML por PDF, com o mesmo conteúdo do modo por arquivo,
+  como membros de um único zip gravado com buffer grande;
+- RollingListaNfseWriter: o ListaNfse consolidado dividido em partes de até
+  N notas ou M bytes, opcionalmente em gzip.
+
+Os nomes gerados dependem só do destino e da ordem de entrada. Como nos
+demais escritores, a saída é gravada em temporários e só aparece no destino
+ao fim de uma execução sem erro.
+"""
+
+from dataclasses import dataclass
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Dict, List, Optional, Set
+
+from services.xml_writer import XML_DECLARATION, ListaNfseWriter, OutputSink
+
+if TYPE_CHECKING:
+    import zipfile
+
+DEFAULT_BUFFER_SIZE = 1 << 20
+# Data fixa dos membros do zip (a menor do formato): execuções iguais geram
+# arquivos idênticos, como o mtime=0 do gzip.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# Declaração e raiz de um ListaNfse com notas; contam no limite de bytes.
+_DOCUMENT_OVERHEAD = len(XML_DECLARATION) + len(b"<ListaNfse></ListaNfse>")
+
+
+class ZipArchiveSink(OutputSink):
+    """Um XML por PDF como membro de um único arquivo zip.
+
+    Cada membro é "<pdf>.xml" (ou "<grupo>/<pdf>.xml" com grupo), com as
+    notas do PDF em um ListaNfse idêntico ao do modo por arquivo. Membros
+    com nome repetido recebem o sufixo "_2", "_3"...
+
+    Args:
+        target: Arquivo .zip gerado
+        compresslevel: Nível do deflate (None = membros sem compressão)
+        buffer_size: Buffer de escrita do arquivo em bytes
+    """
+    def __init__(
+        self,
+        target: Path,
+        compresslevel: Optional[int] = 6,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ) -> None:
+        self.target = Path(target)
+        self.compresslevel = compresslevel
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._tmp_path = self.target.with_name(f".{self.target.name}.{os.getpid()}.tmp")
+        self._handle: Optional[BinaryIO] = None
+        self._zip: Optional["zipfile.ZipFile"] = None
+        self._names: Set[str] = set()
+        self._source: Optional[Path] = None
+        self._member: Optional[str] = None
+        self._fragments: List[bytes] = []
+
+    @property
+    def outputs(self) -> List[Path]:
+        return [self.target]
+
+    def __enter__(self) -> "ZipArchiveSink":
+        import zipfile
+
+        self.target.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = open(self._tmp_path, "wb", buffering=self.buffer_size)
+        compression = zipfile.ZIP_STORED if self.compresslevel is None else zipfile.ZIP_DEFLATED
+        self._zip = zipfile.ZipFile(self._handle, "w", compression, compresslevel=self.compresslevel)
+        return self
+
+    def write_bytes(self, fragment: bytes, group: Optional[str] = None, source: Optional[Path] = None) -> int:
+        if self._zip is None:
+            raise RuntimeError("ZipArchiveSink deve ser usado como context manager")
+        if source is None or source != self._source:
+            # Notas de um mesmo PDF formam um membro; o grupo é o da primeira.
+            self._flush()
+            self._source = source
+            self._member = self._member_name(source, group)
+        self._fragments.append(fragment)
+        self.count += 1
+        return len(fragment)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        zip_file, handle = self._zip, self._handle
+        try:
+            if exc_type is None:
+                self._flush()
+            zip_file.close()
+            handle.close()
+            if exc_type is None:
+                os.replace(self._tmp_path, self.target)
+                return
+        except BaseException:
+            handle.close()
+            self._tmp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            self._zip = self._handle = None
+            self._fragments = []
+        self._tmp_path.unlink(missing_ok=True)
+
+    def _member_name(self, source: Optional[Path], group: Optional[str]) -> str:
+        stem = source.stem if source is not None else f"nota_{self.count + 1:06d}"
+        base = f"{group}/{stem}" if group is not None else stem
+        name, suffix = f"{base}.xml", 1
+        while name in self._names:
+            suffix += 1
+            name = f"{base}_{suffix}.xml"
+        self._names.add(name)
+        return name
+
+    def _flush(self) -> None:
+        if not self._fragments:
+            return
+        import zipfile
+
+        info = zipfile.ZipInfo(self._member, ZIP_DATE_TIME)
+        info.compress_type = self._zip.compression
+        self._zip.writestr(
+            info, b"".join([XML_DECLARATION, b"<ListaNfse>", *self._fragments, b"</ListaNfse>"]),
+            compresslevel=self.compresslevel,
+        )
+        self._fragments = []
+
+
+@dataclass
+class _Part:
+    writer: ListaNfseWriter
+    size: int = _DOCUMENT_OVERHEAD
+
+
+class RollingListaNfseWriter(OutputSink):
+    """ListaNfse consolidado dividido em arquivos de tamanho limitado.
+
+    Uma nova parte começa quando a atual chegaria a max_notes notas ou a
+    max_bytes bytes (XML sem compressão; uma nota maior que o limite fica
+    sozinha em sua parte). As partes se chamam "<stem>_0001<suffix>",
+    "<stem>_0002<suffix>"... e, com grupo, "<stem>_<grupo>_0001<suffix>";
+    sem limites o arquivo é o próprio target, como no consolidado único. Com
+    compresslevel as partes são gravadas em gzip e ganham o sufixo ".gz".
+
+    Todas as partes ficam em temporários até o fim do bloco sem erro e só
+    então são renomeadas para o destino; em caso de erro nenhuma parte da
+    execução anterior é tocada. Depois de publicadas as novas partes, as de
+    uma execução anterior com o mesmo target que esta não regravou (números
+    maiores ou, ao ligar ou desligar a divisão, a outra forma de nome) são
+    removidas.
+
+    Args:
+        target: Caminho base das partes
+        max_notes: Máximo de notas por parte (None = sem limite)
+        max_bytes: Máximo de bytes por parte (None = sem limite)
+        compresslevel: Nível do gzip (None = XML sem compressão)
+    """
+    def __init__(
+        self,
+        target: Path,
+        max_notes: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        compresslevel: Optional[int] = None,
+    ) -> None:
+        if max_notes is not None and max_notes < 1:
+            raise ValueError(f"Limite de notas por arquivo invalido: {max_notes}")
+        if max_bytes is not None and max_bytes <= _DOCUMENT_OVERHEAD:
+            raise ValueError(f"Limite de bytes por arquivo invalido: {max_bytes}")
+        self.target = Path(target)
+        self.max_notes = max_notes
+        self.max_bytes = max_bytes
+        self.compresslevel = compresslevel
+        self.count = 0
+        self._parts: Dict[Optional[str], _Part] = {}
+        self._last: Dict[Optional[str], int] = {}
+        # Partes fechadas e abertas desta execução, na ordem de criação.
+        self._writers: List[ListaNfseWriter] = []
+        self._entered = False
+
+    @property
+    def rolling(self) -> bool:
+        return self.max_notes is not None or self.max_bytes is not None
+
+    @property
+    def outputs(self) -> List[Path]:
+        return [writer.target for writer in self._writers]
+
+    def part_path(self, group: Optional[str], number: int) -> Path:
+        """Caminho da parte number (a partir de 1) do grupo."""
+        return self._path(group, number if self.rolling else None)
+
+    def __enter__(self) -> "RollingListaNfseWriter":
+        self.target.parent.mkdir(parents=True, exist_ok=True)
+        self._entered = True
+        return self
+
+    def write_bytes(self, fragment: bytes, group: Optional[str] = None, source: Optional[Path] = None) -> int:
+        if not self._entered:
+            raise RuntimeError("RollingListaNfseWriter deve ser usado como context manager")
+        part = self._parts.get(group)
+        if part is not None and part.writer.count and (
+            (self.max_notes is not None and part.writer.count >= self.max_notes)
+            or (self.max_bytes is not None and part.size + len(fragment) > self.max_bytes)
+        ):
+            # A parte cheia é só fechada: continua no temporário até o fim.
+            self._parts.pop(group).writer.close()
+            part = None
+        if part is None:
+            part = self._open(group)
+        part.writer.write_bytes(fragment)
+        part.size += len(fragment)
+        self.count += 1
+        return len(fragment)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._entered = False
+        if exc_type is not None:
+            self._discard()
+            return
+        try:
+            if not self._writers:
+                self._open(None)
+            for part in self._parts.values():
+                part.writer.close()
+            self._parts = {}
+            for writer in self._writers:
+                writer.commit()
+        except BaseException:
+            self._discard()
+            raise
+        self._remove_stale()
+
+    def _open(self, group: Optional[str]) -> _Part:
+        number = self._last.get(group, 0) + 1
+        self._last[group] = number
+        writer = ListaNfseWriter(self.part_path(group, number), self.compresslevel)
+        self._writers.append(writer)
+        writer.__enter__()
+        part = _Part(writer)
+        self._parts[group] = part
+        return part
+
+    def _discard(self) -> None:
+        # Temporários já renomeados (falha no meio dos commits) não existem
+        # mais e são ignorados por discard.
+        self._parts = {}
+        for writer in self._writers:
+            writer.discard()
+
+    def _path(self, group: Optional[str], number: Optional[int]) -> Path:
+        stem = self.target.stem if group is None else f"{self.target.stem}_{group}"
+        if number is not None:
+            stem = f"{stem}_{number:04d}"
+        name = f"{stem}{self.target.suffix}"
+        if self.compresslevel is not None:
+            name += ".gz"
+        return self.target.with_name(name)
+
+    def _remove_stale(self) -> None:
+        for group, last in self._last.items():
+            if self.rolling:
+                self._path(group, None).unlink(missing_ok=True)
+                number = last + 1
+            else:
+                number = 1
+            while self._path(group, number).exists():
+                self._path(group, number).unlink()
+                number += 1
@@ -6,25 +6,51 @@ da Prefeitura de Santos/SP usando expressões regulares.
 
 import re
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Iterator, List, Optional
 
 from models.nfse import NFSeData, Prestador, ValoresServico
+from services.field_extractor import ExtractedFields, NFSeFieldExtractor
+
+# Cabeçalho impresso na primeira página de cada nota.
+NOTE_HEADER = re.compile(r"nota fiscal eletr\S*nica de servi\S*o", re.IGNORECASE)
+
+
+def split_notes(pages: Iterable[str]) -> Iterator[str]:
+    """Agrupa o texto das páginas em notas, à medida que as páginas chegam.
+
+    Cada página com o cabeçalho da NFS-e inicia uma nova nota; as demais
+    continuam a anterior. Só as páginas da nota corrente ficam em memória.
+    """
+    buffer: List[str] = []
+    for page in pages:
+        if buffer and NOTE_HEADER.search(page):
+            yield "".join(buffer)
+            buffer = []
+        buffer.append(page)
+    content = "".join(buffer)
+    if content.strip():
+        yield content
 
 
 class ServimaxParser:
     """Parser especializado para NFSe do sistema ServiMax.
     
     Utiliza regex tolerante a variações de encoding e layout multi-coluna
-    para extrair campos obrigatórios da NFSe.
+    para extrair campos obrigatórios da NFSe. Os campos são localizados pelo
+    NFSeFieldExtractor: uma busca ancorada por campo, com padrões
+    pré-compilados, sobre uma única cópia do texto em minúsculas.
     """
-    VALOR_SERVICO_PATTERN = re.compile(
-        r"Valor\s*(?:de|dos)\s*Servi\S*os\s*R\$[: ]*.*?([\d\.,]+)",
-        flags=re.IGNORECASE | re.DOTALL,
-    )
+    VERSION = "2"
 
-    def __init__(self, prestador: Prestador, discriminacao: str = "Servicos conforme NFSe") -> None:
+    def __init__(
+        self,
+        prestador: Prestador,
+        discriminacao: str = "Servicos conforme NFSe",
+        extractor: Optional[NFSeFieldExtractor] = None,
+    ) -> None:
         self.prestador = prestador
         self.discriminacao = discriminacao
+        self.extractor = extractor or NFSeFieldExtractor()
 
     def parse(self, content: str) -> NFSeData:
         """Extrai dados estruturados de NFSe a partir do texto do PDF.
@@ -35,6 +61,77 @@ class ServimaxParser:
         Returns:
             Objeto NFSeData com todos os campos preenchidos
         """
+        fields = self.extractor.extract(content)
+        impostos = fields.impostos or {}
+        valores = ValoresServico(
+            valor_servicos=self._to_float(fields.valor_servicos),
+            pis=self._to_float(impostos.get("pis")),
+            cofins=self._to_float(impostos.get("cofins")),
+            csll=self._to_float(impostos.get("csll")),
+            irrf=self._to_float(impostos.get("irrf")),
+            inss=self._to_float(impostos.get("inss")),
+            iss=self._to_float(impostos.get("iss")),
+        )
+
+        return NFSeData(
+            numero=fields.numero or "0",
+            codigo_verificacao=fields.codigo_verificacao or "XXXXXX",
+            data_emissao=self._to_datetime(fields.data_emissao),
+            valores=valores,
+            prestador=self.prestador,
+            discriminacao=self.discriminacao,
+        )
+
+    def parse_stream(self, pages: Iterable[str]) -> Iterator[NFSeData]:
+        """Extrai uma NFSe por nota de um PDF com várias notas concatenadas.
+
+        Args:
+            pages: Texto de cada página, na ordem do documento
+        """
+        for content in split_notes(pages):
+            yield self.parse(content)
+
+    def missing_fields(self, content: str) -> List[str]:
+        """Lista os campos obrigatórios que não puderam ser localizados no texto.
+
+        Usado para decidir se o texto da leitura rápida é suficiente ou se é
+        preciso recorrer à extração completa do PDF.
+        """
+        fields = self.extractor.extract(content)
+        return self._missing(fields)
+
+    def _missing(self, fields: ExtractedFields) -> List[str]:
+        required = ("numero", "codigo_verificacao", "data_emissao", "valor_servicos")
+        return [name for name in required if not getattr(fields, name)]
+
+    def _to_float(self, value: Optional[str]) -> float:
+        if value is None:
+            return 0.0
+        value = value.strip()
+        if not value:
+            return 0.0
+        return float(value.replace(".", "").replace(",", "."))
+
+    def _to_datetime(self, value: Optional[str]) -> datetime:
+        if value is None:
+            return datetime.now()
+        return datetime.strptime(value, "%d/%m/%Y %H:%M:%S")
+
+
+class MultiSearchServimaxParser(ServimaxParser):
+    """Implementação anterior do parse, com uma busca no texto inteiro por campo.
+
+    Mantida como referência: reproduz o ServimaxParser.parse original (antes
+    da leitura rápida e do NFSeFieldExtractor), sem nenhuma das regras
+    acrescentadas depois, para conferir que o parser atual produz o mesmo
+    NFSeData e como base de comparação nos benchmarks.
+    """
+    VALOR_SERVICO_PATTERN = re.compile(
+        r"Valor\s*(?:de|dos)\s*Servi\S*os\s*R\$[: ]*.*?([\d\.,]+)",
+        flags=re.IGNORECASE | re.DOTALL,
+    )
+
+    def parse(self, content: str) -> NFSeData:
         numero = self._search(r"NFSe\s*(\d+)", content, fallback="0")
         codigo = self._search(r"C[oó]digo de Verifica[cç][aã]o\s*([\w\d]+)", content, fallback="XXXXXX")
         data_emissao = self._parse_data_emissao(content)
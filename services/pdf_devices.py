@@ -0,0 +1,20 @@
+"""Dispositivos pdfminer usados pela leitura rápida.
+
+Fica em módulo próprio para que o pdfminer só seja importado quando o
+primeiro PDF for lido (ver services.pdf_reader).
+"""
+
+from pdfminer.converter import TextConverter
+
+
+class TextOnlyConverter(TextConverter):
+    """TextConverter que descarta caminhos vetoriais e imagens.
+
+    Linhas e retângulos do formulário não contribuem para o texto, mas geram
+    objetos que a análise de layout teria que percorrer.
+    """
+    def paint_path(self, gstate, stroke, fill, evenodd, path) -> None:
+        return None
+
+    def render_image(self, name, stream) -> None:
+        return None
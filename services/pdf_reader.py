@@ -1,19 +1,79 @@
 """Serviço de leitura de arquivos PDF.
 
-Extrai texto de PDFs de notas fiscais eletrônicas usando pdfminer.
+Extrai texto de PDFs de notas fiscais eletrônicas usando pdfminer. O pdfminer
+é importado apenas na primeira leitura, o que mantém rápida a inicialização
+de processos que só configuram o conversor. Os PDFs podem vir de caminhos,
+de memória ou de arquivos zip (ver services.pdf_source).
 """
 
+import hashlib
+from io import StringIO
 from pathlib import Path
-from pdfminer.high_level import extract_text
+from typing import TYPE_CHECKING, Iterator, Optional, Sequence
+
+from services.pdf_source import PDFSource, open_pdf, source_exists, source_sha256
+
+if TYPE_CHECKING:
+    from pdfminer.layout import LAParams
+
+    from services.text_cache import PDFTextCache
+
+# Todos os campos usados pelo ServimaxParser ficam na primeira página.
+FAST_PAGES = (0,)
+
+
+def file_sha256(path: Path) -> str:
+    """Calcula o hash SHA-256 do conteúdo de um arquivo em blocos de 1 MiB."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fast_laparams() -> "LAParams":
+    """LAParams do modo rápido: sem ordenação hierárquica de caixas (boxes_flow).
+
+    A ordenação hierárquica é a etapa mais cara da análise de layout; sem ela
+    as caixas saem em ordem de leitura de cima para baixo.
+    """
+    from pdfminer.layout import LAParams
+
+    return LAParams(boxes_flow=None)
 
 
 class PDFInvoiceReader:
     """Leitor de PDFs de notas fiscais."""
-    def read_text(self, pdf_path: Path) -> str:
+    def __init__(
+        self,
+        laparams: Optional["LAParams"] = None,
+        fast_pages: Sequence[int] = FAST_PAGES,
+        fast_params: Optional["LAParams"] = None,
+    ) -> None:
+        self._laparams = laparams
+        self.fast_pages = tuple(fast_pages)
+        self._fast_params = fast_params
+
+    @property
+    def laparams(self) -> "LAParams":
+        if self._laparams is None:
+            from pdfminer.layout import LAParams
+
+            self._laparams = LAParams()
+        return self._laparams
+
+    @property
+    def fast_params(self) -> "LAParams":
+        if self._fast_params is None:
+            self._fast_params = fast_laparams()
+        return self._fast_params
+
+    def read_text(self, pdf_path: PDFSource) -> str:
         """Extrai texto completo de um arquivo PDF.
         
         Args:
-            pdf_path: Caminho para o arquivo PDF
+            pdf_path: Caminho do PDF, seu conteúdo (bytes, memoryview ou
+                stream binário) ou um MemoryPDF/ZipMemberPDF
             
         Returns:
             Texto completo extraído do PDF
@@ -21,6 +81,117 @@ class PDFInvoiceReader:
         Raises:
             FileNotFoundError: Se o PDF não existir
         """
-        if not pdf_path.exists():
+        if not source_exists(pdf_path):
+            raise FileNotFoundError(f"PDF nao encontrado: {pdf_path}")
+        return self._extract(pdf_path, fast=False)
+
+    def read_text_fast(self, pdf_path: PDFSource) -> str:
+        """Extrai apenas as páginas com os campos da NFSe, com layout simplificado.
+
+        O texto pode diferir do obtido por read_text na ordem dos blocos;
+        quem chama deve validar os campos e recorrer a read_text se faltar algum.
+
+        Raises:
+            FileNotFoundError: Se o PDF não existir
+        """
+        if not source_exists(pdf_path):
+            raise FileNotFoundError(f"PDF nao encontrado: {pdf_path}")
+        return self._extract(pdf_path, fast=True)
+
+    def iter_pages(self, pdf_path: PDFSource) -> Iterator[str]:
+        """Extrai o texto página a página, sem manter o documento inteiro.
+
+        Cada página é liberada assim que seu texto é entregue; concatenar
+        todas as páginas resulta no mesmo texto de read_text. Não usa o
+        cache de texto, que guardaria o documento inteiro.
+
+        Raises:
+            FileNotFoundError: Se o PDF não existir
+        """
+        if not source_exists(pdf_path):
             raise FileNotFoundError(f"PDF nao encontrado: {pdf_path}")
-        return extract_text(str(pdf_path))
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+
+        from services.pdf_devices import TextOnlyConverter
+
+        with open_pdf(pdf_path) as fp, StringIO() as output:
+            rsrcmgr = PDFResourceManager(caching=True)
+            device = TextOnlyConverter(rsrcmgr, output, laparams=self.laparams)
+            interpreter = PDFPageInterpreter(rsrcmgr, device)
+            # Sem cache de objetos no PDFDocument: com centenas de páginas
+            # ele reteria os objetos de todas as páginas já lidas.
+            for page in PDFPage.get_pages(fp, caching=False):
+                interpreter.process_page(page)
+                text = output.getvalue()
+                output.seek(0)
+                output.truncate()
+                yield text
+            device.close()
+
+    def preload(self) -> None:
+        """Importa o pdfminer e prepara os LAParams antes da primeira leitura.
+
+        Usado por processos de longa duração (serviço HTTP) para que a
+        primeira requisição não pague o custo de importação.
+        """
+        import pdfminer.high_level  # noqa: F401
+        import pdfminer.pdfinterp  # noqa: F401
+        import pdfminer.pdfpage  # noqa: F401
+
+        import services.pdf_devices  # noqa: F401
+
+        self.laparams
+        self.fast_params
+
+    def signature(self, fast: bool = False) -> str:
+        """Identifica versão do pdfminer e parâmetros de layout usados na extração."""
+        import pdfminer
+
+        if fast:
+            return f"pdfminer={pdfminer.__version__};fast;pages={self.fast_pages};laparams={self.fast_params!r}"
+        return f"pdfminer={pdfminer.__version__};laparams={self.laparams!r}"
+
+    def _extract(self, pdf_path: PDFSource, fast: bool) -> str:
+        if not fast:
+            from pdfminer.high_level import extract_text
+
+            with open_pdf(pdf_path) as fp:
+                return extract_text(fp, laparams=self.laparams)
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+
+        from services.pdf_devices import TextOnlyConverter
+
+        with open_pdf(pdf_path) as fp, StringIO() as output:
+            rsrcmgr = PDFResourceManager(caching=True)
+            device = TextOnlyConverter(rsrcmgr, output, laparams=self.fast_params)
+            interpreter = PDFPageInterpreter(rsrcmgr, device)
+            for page in PDFPage.get_pages(fp, self.fast_pages, maxpages=max(self.fast_pages) + 1):
+                interpreter.process_page(page)
+            device.close()
+            return output.getvalue()
+
+
+class CachedPDFInvoiceReader(PDFInvoiceReader):
+    """Leitor que consulta um cache em disco antes de acionar o pdfminer.
+
+    A chave combina o hash SHA-256 do conteúdo do PDF com a assinatura do
+    leitor, de modo que trocar a versão do pdfminer ou os LAParams invalida
+    as entradas antigas.
+    """
+    def __init__(self, cache: "PDFTextCache", laparams: Optional["LAParams"] = None, **kwargs) -> None:
+        super().__init__(laparams, **kwargs)
+        self.cache = cache
+
+    def cache_key(self, pdf_path: PDFSource, fast: bool = False) -> str:
+        signature = hashlib.sha256(self.signature(fast).encode("utf-8")).hexdigest()[:16]
+        return f"{source_sha256(pdf_path)}:{signature}"
+
+    def _extract(self, pdf_path: PDFSource, fast: bool) -> str:
+        key = self.cache_key(pdf_path, fast)
+        text = self.cache.get(key)
+        if text is None:
+            text = super()._extract(pdf_path, fast)
+            self.cache.put(key, text)
+        return text
@@ -0,0 +1,299 @@
+"""Origens dos PDFs lidos pelo PDFInvoiceReader.
+
+Além de caminhos em disco, o leitor aceita PDFs já em memória (bytes,
+bytearray, memoryview ou streams binários, ex.: anexos de e-mail e corpos
+HTTP) e membros de arquivos zip, sem gravar arquivos temporários. O pdfminer
+só usa read/seek/tell do arquivo, então cada origem é aberta como um objeto
+com essas operações:
+
+- arquivos em disco são mapeados em memória (mmap): as leituras do parser
+  viram cópias de memória, sem uma chamada de sistema por bloco;
+- bytes são lidos sem cópia (BytesIO compartilha o buffer) e bytearray e
+  memoryview por uma visão somente leitura;
+- membros de zip armazenados sem compressão são fatias do mmap do arquivo
+  zip; os comprimidos são descompactados em memória. Nos dois casos o CRC
+  do diretório central é conferido antes da leitura.
+
+MemoryPDF e ZipMemberPDF dão a essas origens o nome usado em relatórios,
+métricas e nos XMLs gerados, e podem ser passados ao NFSeConverter no lugar
+de caminhos.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+import hashlib
+from io import BytesIO, IOBase, RawIOBase
+import mmap
+import os
+from pathlib import Path
+import struct
+from typing import BinaryIO, Iterator, List, Union
+import zlib
+
+PDFData = Union[bytes, bytearray, memoryview, BinaryIO]
+
+# Cabeçalho local de um membro de zip: assinatura e tamanhos do nome e do
+# campo extra, que precedem os dados.
+_LOCAL_HEADER = struct.Struct("<4s22xHH")
+_LOCAL_SIGNATURE = b"PK\x03\x04"
+
+
+@dataclass(frozen=True, eq=False)
+class MemoryPDF:
+    """PDF em memória, identificado por um nome de arquivo.
+
+    Ao ser enviado a um processo do pool, o conteúdo segue como bytes (um
+    stream é lido por inteiro nesse momento).
+    """
+    name: str
+    data: PDFData
+
+    @property
+    def path(self) -> Path:
+        return Path(self.name)
+
+    def __reduce__(self):
+        return MemoryPDF, (self.name, read_bytes(self.data))
+
+
+@dataclass(frozen=True)
+class ZipMemberPDF:
+    """PDF dentro de um arquivo zip, lido sem extração para o disco.
+
+    Os campos de posição vêm do diretório central, lido uma única vez por
+    list_zip_pdfs; cada worker acessa o membro direto pelo deslocamento.
+    """
+    archive: Path
+    member: str
+    offset: int
+    compress_type: int
+    compress_size: int
+    size: int
+    crc: int
+
+    @property
+    def path(self) -> Path:
+        return self.archive / self.member
+
+
+PDFSource = Union[Path, str, PDFData, MemoryPDF, ZipMemberPDF]
+
+
+class BufferReader(RawIOBase):
+    """Arquivo somente leitura sobre um buffer, sem copiá-lo por inteiro."""
+    def __init__(self, buffer: Union[bytes, bytearray, memoryview, mmap.mmap]) -> None:
+        super().__init__()
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def getbuffer(self) -> memoryview:
+        return self._view
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(self._pos + size, len(self._view))
+        data = self._view[self._pos:end].tobytes()
+        self._pos = max(self._pos, end)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError(f"Posicao invalida: {offset}")
+        self._pos = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._pos
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self._view.release()
+        super().close()
+
+
+def as_source(pdf: PDFSource) -> Union[Path, MemoryPDF, ZipMemberPDF]:
+    """Normaliza uma entrada do conversor: texto vira Path.
+
+    Raises:
+        ValueError: Para PDFs em memória sem nome (use MemoryPDF)
+    """
+    if isinstance(pdf, (Path, MemoryPDF, ZipMemberPDF)):
+        return pdf
+    if isinstance(pdf, str):
+        return Path(pdf)
+    raise ValueError(f"PDF em memoria sem nome: use MemoryPDF (recebido {type(pdf).__name__})")
+
+
+def source_path(source: PDFSource) -> Path:
+    """Caminho que identifica a origem em relatórios e nomes de saída."""
+    if isinstance(source, Path):
+        return source
+    if isinstance(source, (MemoryPDF, ZipMemberPDF)):
+        return source.path
+    if isinstance(source, str):
+        return Path(source)
+    return Path(getattr(source, "name", "<memoria>.pdf"))
+
+
+def source_size(source: PDFSource) -> int:
+    """Tamanho do PDF em bytes (descompactado, para membros de zip)."""
+    if isinstance(source, (Path, str)):
+        return os.stat(source).st_size
+    if isinstance(source, ZipMemberPDF):
+        return source.size
+    data = source.data if isinstance(source, MemoryPDF) else source
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return memoryview(data).nbytes
+    position = data.tell()
+    size = data.seek(0, os.SEEK_END)
+    data.seek(position)
+    return size
+
+
+def source_exists(source: PDFSource) -> bool:
+    if isinstance(source, (Path, str)):
+        return os.path.exists(source)
+    if isinstance(source, ZipMemberPDF):
+        return source.archive.exists()
+    return True
+
+
+def source_sha256(source: PDFSource) -> str:
+    """Hash SHA-256 do conteúdo; buffers e arquivos mapeados são lidos sem cópias."""
+    data = source.data if isinstance(source, MemoryPDF) else source
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(data).hexdigest()
+    with open_pdf(source) as fp:
+        if isinstance(fp, BufferReader):
+            return hashlib.sha256(fp.getbuffer()).hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: fp.read(1 << 20), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+def read_bytes(data: PDFData) -> bytes:
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, (bytearray, memoryview)):
+        return bytes(data)
+    if getattr(data, "seekable", lambda: False)():
+        data.seek(0)
+    return data.read()
+
+
+@contextmanager
+def open_pdf(source: PDFSource) -> Iterator[BinaryIO]:
+    """Abre a origem como arquivo binário com read/seek/tell.
+
+    Streams seekable são lidos a partir da posição 0 e não são fechados;
+    os demais são lidos por inteiro (streams sem seek, portanto, uma vez só).
+    """
+    if isinstance(source, (Path, str)):
+        with _open_mapped(source) as fp:
+            yield fp
+        return
+    if isinstance(source, ZipMemberPDF):
+        with _open_zip_member(source) as fp:
+            yield fp
+        return
+    data = source.data if isinstance(source, MemoryPDF) else source
+    if isinstance(data, bytes):
+        yield BytesIO(data)
+    elif isinstance(data, (bytearray, memoryview)):
+        reader = BufferReader(data)
+        try:
+            yield reader
+        finally:
+            reader.close()
+    elif isinstance(data, IOBase) and data.seekable():
+        data.seek(0)
+        yield data
+    else:
+        yield BytesIO(read_bytes(data))
+
+
+@contextmanager
+def _open_mapped(path: Union[Path, str]) -> Iterator[BinaryIO]:
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            # Arquivo vazio não pode ser mapeado; o pdfminer relata o erro.
+            yield handle
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            reader = BufferReader(mapped)
+            try:
+                yield reader
+            finally:
+                reader.close()
+
+
+@contextmanager
+def _open_zip_member(member: ZipMemberPDF) -> Iterator[BinaryIO]:
+    import zipfile
+
+    with open(member.archive, "rb") as handle:
+        handle.seek(member.offset)
+        signature, name_size, extra_size = _LOCAL_HEADER.unpack(handle.read(_LOCAL_HEADER.size))
+        if signature != _LOCAL_SIGNATURE:
+            raise zipfile.BadZipFile(f"Cabecalho local invalido: {member.path}")
+        start = member.offset + _LOCAL_HEADER.size + name_size + extra_size
+        if member.compress_type == zipfile.ZIP_STORED and member.size:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                reader = BufferReader(memoryview(mapped)[start:start + member.size])
+                try:
+                    # O CRC é calculado sobre a fatia do mmap, sem cópia.
+                    if zlib.crc32(reader.getbuffer()) != member.crc:
+                        raise zipfile.BadZipFile(f"CRC invalido: {member.path}")
+                    yield reader
+                finally:
+                    reader.close()
+            return
+        if member.compress_type == zipfile.ZIP_DEFLATED:
+            handle.seek(start)
+            data = zlib.decompress(handle.read(member.compress_size), -zlib.MAX_WBITS)
+        else:
+            # bzip2/lzma e membros vazios: decodificação do zipfile.
+            with zipfile.ZipFile(handle) as archive:
+                data = archive.read(member.member)
+    if zlib.crc32(data) != member.crc:
+        raise zipfile.BadZipFile(f"CRC invalido: {member.path}")
+    yield BytesIO(data)
+
+
+def list_zip_pdfs(archive: Path) -> List[ZipMemberPDF]:
+    """PDFs de um arquivo zip (inclusive em subpastas), ordenados pelo nome.
+
+    Raises:
+        zipfile.BadZipFile: Se o arquivo não for um zip válido
+        ValueError: Se algum PDF estiver criptografado
+    """
+    import zipfile
+
+    archive = Path(archive)
+    members = []
+    with zipfile.ZipFile(archive) as zip_file:
+        for info in zip_file.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(".pdf"):
+                continue
+            if info.flag_bits & 0x1:
+                raise ValueError(f"PDF criptografado no zip: {info.filename}")
+            members.append(ZipMemberPDF(
+                archive, info.filename, info.header_offset, info.compress_type,
+                info.compress_size, info.file_size, info.CRC,
+            ))
+    members.sort(key=lambda member: member.member)
+    return members
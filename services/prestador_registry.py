@@ -0,0 +1,165 @@
+"""Cadastro de prestadores e roteamento de cada NFSe ao prestador emissor.
+
+O emissor é identificado pelo CNPJ impresso na seção "Dados do Prestador":
+cada CNPJ encontrado no trecho é consultado em um índice (dicionário) por
+CNPJ, de modo que o custo da detecção não cresce com o número de
+prestadores cadastrados. Sem CNPJ reconhecido, a inscrição municipal do
+mesmo trecho é consultada em um segundo índice.
+"""
+
+from dataclasses import asdict
+import hashlib
+import json
+from pathlib import Path
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from models.nfse import NFSeData, Prestador
+from services.field_extractor import lower_aligned
+from services.parser import ServimaxParser, split_notes
+
+CNPJ = re.compile(r"\b(\d{2})\.?(\d{3})\.?(\d{3})/?(\d{4})-?(\d{2})\b")
+INSCRICAO_MUNICIPAL = re.compile(r"inscri\S*o municipal:?\s*(\d[\d./-]*)")
+PRESTADOR_SECTION = "dados do prestador"
+TOMADOR_SECTION = "dados do tomador"
+
+
+def _digits(value: str) -> str:
+    return "".join(char for char in value if char.isdigit())
+
+
+class PrestadorRegistry:
+    """Prestadores conhecidos indexados por CNPJ e inscrição municipal.
+
+    Args:
+        prestadores: Prestadores cadastrados
+        default: Prestador usado quando o emissor não é reconhecido
+            (None = documento de emissor desconhecido é rejeitado)
+    """
+    def __init__(self, prestadores: Iterable[Prestador] = (), default: Optional[Prestador] = None) -> None:
+        self.default = default
+        self._by_cnpj: Dict[str, Prestador] = {}
+        self._by_inscricao: Dict[str, Prestador] = {}
+        for prestador in prestadores:
+            self.register(prestador)
+        if default is not None and _digits(default.cnpj) not in self._by_cnpj:
+            self.register(default)
+
+    @classmethod
+    def from_json(cls, path: Path, default: Optional[Prestador] = None) -> "PrestadorRegistry":
+        """Carrega uma lista de prestadores (campos de Prestador) de um JSON.
+
+        Raises:
+            ValueError: Se o arquivo não contiver uma lista de prestadores válida
+        """
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        if not isinstance(payload, list):
+            raise ValueError(f"Cadastro de prestadores deve ser uma lista: {path}")
+        try:
+            prestadores = [Prestador(**entry) for entry in payload]
+        except TypeError as exc:
+            raise ValueError(f"Prestador invalido em {path}: {exc}") from exc
+        return cls(prestadores, default)
+
+    @property
+    def prestadores(self) -> List[Prestador]:
+        return list(self._by_cnpj.values())
+
+    def register(self, prestador: Prestador) -> None:
+        """Cadastra um prestador; um CNPJ já cadastrado é substituído."""
+        cnpj = _digits(prestador.cnpj)
+        if len(cnpj) != 14:
+            raise ValueError(f"CNPJ invalido para {prestador.razao_social}: {prestador.cnpj}")
+        previous = self._by_cnpj.get(cnpj)
+        if previous is not None:
+            # A inscrição antiga não pode continuar levando ao cadastro substituído.
+            old_inscricao = _digits(previous.inscricao_municipal)
+            if self._by_inscricao.get(old_inscricao) is previous:
+                del self._by_inscricao[old_inscricao]
+        self._by_cnpj[cnpj] = prestador
+        inscricao = _digits(prestador.inscricao_municipal)
+        if inscricao:
+            self._by_inscricao[inscricao] = prestador
+
+    def fingerprint(self) -> str:
+        """Resumo do cadastro; muda quando qualquer prestador é alterado."""
+        entries = sorted(json.dumps(asdict(p), sort_keys=True) for p in self.prestadores)
+        if self.default is not None:
+            entries.append(f"default={_digits(self.default.cnpj)}")
+        return hashlib.sha256("\n".join(entries).encode("utf-8")).hexdigest()[:12]
+
+    def detect(self, content: str) -> Optional[Prestador]:
+        """Identifica o prestador emissor a partir do texto do PDF.
+
+        Returns:
+            Prestador cadastrado, o prestador padrão ou None
+        """
+        # As posições do trecho valem no texto em minúsculas: todas as
+        # buscas são feitas nele (os dígitos não mudam).
+        text = lower_aligned(content)
+        start = max(text.find(PRESTADOR_SECTION), 0)
+        end = text.find(TOMADOR_SECTION, start)
+        if end < 0:
+            end = len(text)
+        for match in CNPJ.finditer(text, start, end):
+            prestador = self._by_cnpj.get("".join(match.groups()))
+            if prestador is not None:
+                return prestador
+        match = INSCRICAO_MUNICIPAL.search(text, start, end)
+        if match:
+            prestador = self._by_inscricao.get(_digits(match.group(1)))
+            if prestador is not None:
+                return prestador
+        return self.default
+
+
+class RegistryParser:
+    """Parser que encaminha cada documento ao parser do prestador emissor.
+
+    Mantém um ServimaxParser por prestador, criado no primeiro documento
+    dele e indexado pelos dados do prestador (não só pelo CNPJ), de modo que
+    um prestador substituído no cadastro com register() passa a ter um
+    parser novo; o AbrasfXmlBuilder, por sua vez, guarda os fragmentos estáticos de
+    cada prestador. Oferece a mesma interface de ServimaxParser.
+    """
+    def __init__(self, registry: PrestadorRegistry, discriminacao: str = "Servicos conforme NFSe") -> None:
+        self.registry = registry
+        self.discriminacao = discriminacao
+        self._parsers: Dict[Prestador, ServimaxParser] = {}
+
+    @property
+    def VERSION(self) -> str:
+        # O cadastro entra na versão para que o modo incremental reconverta
+        # as notas quando os dados de algum prestador mudarem.
+        return f"{ServimaxParser.VERSION}+{self.registry.fingerprint()}"
+
+    def parse(self, content: str) -> NFSeData:
+        """Extrai a NFSe com os dados do prestador emissor.
+
+        Raises:
+            ValueError: Se o emissor não for reconhecido e não houver
+                prestador padrão
+        """
+        prestador = self.registry.detect(content)
+        if prestador is None:
+            raise ValueError("Prestador emissor nao cadastrado")
+        return self._parser_for(prestador).parse(content)
+
+    def parse_stream(self, pages: Iterable[str]) -> Iterator[NFSeData]:
+        """Extrai uma NFSe por nota; cada nota pode ter um emissor diferente."""
+        for content in split_notes(pages):
+            yield self.parse(content)
+
+    def missing_fields(self, content: str) -> List[str]:
+        prestador = self.registry.detect(content)
+        if prestador is None:
+            # Na leitura rápida, força a extração completa antes de rejeitar.
+            return ["prestador"]
+        return self._parser_for(prestador).missing_fields(content)
+
+    def _parser_for(self, prestador: Prestador) -> ServimaxParser:
+        parser = self._parsers.get(prestador)
+        if parser is None:
+            parser = ServimaxParser(prestador, self.discriminacao)
+            self._parsers[prestador] = parser
+        return parser
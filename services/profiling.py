@@ -0,0 +1,128 @@
+"""Perfilamento da conversão por PDF e por etapa.
+
+O StageProfiler mantém um cProfile por etapa do NFSeConverter e troca o
+perfil ativo quando uma etapa começa ou termina, de modo que o tempo de
+cada função fica com a etapa em que ela rodou (leitura de páginas dentro do
+parse conta como read). O relatório de cada PDF é gravado pelo próprio
+processo que o converteu; o ProfileOutlierHook, no processo principal,
+destaca os PDFs cuja leitura foge da mediana do lote.
+"""
+
+import cProfile
+from io import StringIO
+import json
+import os
+from pathlib import Path
+import pstats
+import statistics
+from typing import Dict, List
+
+from models.conversion import ConversionSummary, FileMetrics, ProfilePolicy
+from services.metrics import MetricsHook
+
+OUTLIERS_NAME = "outliers.json"
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls", "time", "cumtime")
+
+
+class StageProfiler:
+    """Um cProfile por etapa; só um deles fica ativo por vez."""
+    def __init__(self) -> None:
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self._stack: List[str] = []
+
+    def enter(self, stage: str) -> None:
+        if self._stack:
+            self.profiles[self._stack[-1]].disable()
+        self._stack.append(stage)
+        self.profiles.setdefault(stage, cProfile.Profile()).enable()
+
+    def leave(self) -> None:
+        self.profiles[self._stack.pop()].disable()
+        if self._stack:
+            self.profiles[self._stack[-1]].enable()
+
+    def report(self, pdf_path: Path, stage_times: Dict[str, float], top: int, sort: str) -> str:
+        """Texto com as top funções de cada etapa, na ordem em que as etapas rodaram."""
+        lines = [f"{pdf_path}"]
+        for stage, profile in self.profiles.items():
+            stream = StringIO()
+            pstats.Stats(profile, stream=stream).sort_stats(sort).print_stats(top)
+            lines.append(f"\n== {stage}: {stage_times.get(stage, 0.0):.6f} s ==")
+            lines.append(stream.getvalue().strip("\n"))
+        return "\n".join(lines) + "\n"
+
+    def write(self, report_dir: Path, pdf_path: Path, stage_times: Dict[str, float], top: int, sort: str) -> Path:
+        """Grava <pdf>.txt (top funções por etapa) e <pdf>.pstats (todas as etapas)."""
+        report_dir.mkdir(parents=True, exist_ok=True)
+        report_path = report_dir / f"{pdf_path.stem}.txt"
+        report_path.write_text(self.report(pdf_path, stage_times, top, sort), encoding="utf-8")
+        if self.profiles:
+            profiles = list(self.profiles.values())
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(str(report_dir / f"{pdf_path.stem}.pstats"))
+        return report_path
+
+
+class ProfileOutlierHook(MetricsHook):
+    """Destaca os PDFs com leitura acima de outlier_factor vezes a mediana.
+
+    Attributes:
+        outliers: Itens de outliers.json da última execução, do mais lento
+            para o mais rápido
+    """
+    def __init__(self, policy: ProfilePolicy) -> None:
+        self.policy = policy
+        self.files: List[FileMetrics] = []
+        self.outliers: List[dict] = []
+
+    def on_run_start(self, total_files: int) -> None:
+        self.files = []
+        self.outliers = []
+
+    def on_file(self, metrics: FileMetrics) -> None:
+        if metrics.ok:
+            self.files.append(metrics)
+
+    def on_run_end(self, summary: ConversionSummary, elapsed: float) -> None:
+        times = [metrics.stages.get("read", 0.0) for metrics in self.files]
+        median = statistics.median(times) if times else 0.0
+        threshold = median * self.policy.outlier_factor
+        self.outliers = sorted(
+            (
+                {
+                    "file": str(metrics.pdf_path),
+                    "read": round(read, 6),
+                    "ratio": round(read / median, 2),
+                    "elapsed": round(metrics.elapsed, 6),
+                    "report": f"{metrics.pdf_path.stem}.txt",
+                }
+                for metrics, read in zip(self.files, times)
+                if median > 0 and read > threshold
+            ),
+            key=lambda item: item["read"],
+            reverse=True,
+        )
+        payload = {
+            "files": len(times),
+            "median_read": round(median, 6),
+            "outlier_factor": self.policy.outlier_factor,
+            "outliers": self.outliers,
+        }
+        path = Path(self.policy.report_dir) / OUTLIERS_NAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(payload, indent=1, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+def validate_profile_policy(policy: ProfilePolicy) -> None:
+    """Raises ValueError se top, sort ou outlier_factor forem inválidos."""
+    if policy.top < 1:
+        raise ValueError(f"Quantidade de funcoes invalida: {policy.top}")
+    if policy.sort not in SORT_KEYS:
+        raise ValueError(f"Ordenacao de perfil invalida: {policy.sort}")
+    if policy.outlier_factor <= 0:
+        raise ValueError(f"Fator de outlier invalido: {policy.outlier_factor}")
+
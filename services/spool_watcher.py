@@ -0,0 +1,121 @@
+"""Monitoramento de uma pasta de entrada (spool) de PDFs.
+
+Detecta PDFs novos por varredura periódica, espera que cada arquivo pare de
+crescer (cópia concluída) e os entrega em lotes: um lote sai quando atinge
+batch_size arquivos ou quando o PDF pronto mais antigo já esperou
+max_latency segundos. Após o processamento os PDFs são movidos para as
+subpastas "processados" ou "erros", de modo que nunca são lidos duas vezes.
+"""
+
+import os
+from pathlib import Path
+import shutil
+import threading
+import time
+from typing import Callable, Collection, Dict, List, Optional, Tuple
+
+PROCESSED_DIR = "processados"
+FAILED_DIR = "erros"
+
+BatchHandler = Callable[[List[Path]], Collection[Path]]
+
+
+class SpoolWatcher:
+    """Agrupa PDFs que chegam em uma pasta e os entrega a um handler.
+
+    O handler recebe a lista de PDFs do lote e devolve os que falharam;
+    esses vão para a subpasta de erros e os demais para a de processados.
+
+    Args:
+        spool_dir: Pasta monitorada
+        handler: Função chamada com cada lote
+        batch_size: Máximo de PDFs por lote
+        max_latency: Segundos máximos entre um PDF ficar pronto e seu lote sair
+        poll_interval: Intervalo entre varreduras da pasta
+    """
+    def __init__(
+        self,
+        spool_dir: Path,
+        handler: BatchHandler,
+        batch_size: int = 100,
+        max_latency: float = 5.0,
+        poll_interval: float = 1.0,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError(f"Tamanho de lote invalido: {batch_size}")
+        if max_latency < 0 or poll_interval <= 0:
+            raise ValueError("Latencia e intervalo de varredura devem ser positivos")
+        self.spool_dir = Path(spool_dir)
+        self.handler = handler
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.poll_interval = poll_interval
+        self.processed_dir = self.spool_dir / PROCESSED_DIR
+        self.failed_dir = self.spool_dir / FAILED_DIR
+        # Arquivos ainda sendo copiados: caminho -> (tamanho, mtime_ns).
+        self._pending: Dict[Path, Tuple[int, int]] = {}
+        # Arquivos estáveis aguardando lote: caminho -> instante em que ficaram prontos.
+        self._ready: Dict[Path, float] = {}
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """Monitora a pasta até stop ser sinalizado; entrega o que estiver pronto ao sair."""
+        stop = stop or threading.Event()
+        self.processed_dir.mkdir(parents=True, exist_ok=True)
+        self.failed_dir.mkdir(parents=True, exist_ok=True)
+        while not stop.is_set():
+            self.poll()
+            stop.wait(self.poll_interval)
+        self.poll(flush=True)
+
+    def poll(self, flush: bool = False) -> int:
+        """Faz uma varredura e processa os lotes vencidos.
+
+        Args:
+            flush: Entrega todos os PDFs prontos, sem esperar a latência
+
+        Returns:
+            Quantidade de PDFs entregues ao handler
+        """
+        now = time.monotonic()
+        self._scan(now)
+        delivered = 0
+        while self._ready:
+            oldest = min(self._ready.values())
+            if not flush and len(self._ready) < self.batch_size and now - oldest < self.max_latency:
+                break
+            batch = sorted(self._ready, key=self._ready.get)[:self.batch_size]
+            for pdf in batch:
+                del self._ready[pdf]
+            self._dispatch(batch)
+            delivered += len(batch)
+        return delivered
+
+    def _scan(self, now: float) -> None:
+        seen = set()
+        with os.scandir(self.spool_dir) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.lower().endswith(".pdf"):
+                    continue
+                path = Path(entry.path)
+                seen.add(path)
+                if path in self._ready:
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_size, stat.st_mtime_ns)
+                # Pronto quando tamanho e mtime não mudaram desde a varredura anterior.
+                if self._pending.get(path) == signature and stat.st_size > 0:
+                    del self._pending[path]
+                    self._ready[path] = now
+                else:
+                    self._pending[path] = signature
+        for path in set(self._pending) - seen:
+            del self._pending[path]
+        for path in set(self._ready) - seen:
+            del self._ready[path]
+
+    def _dispatch(self, batch: List[Path]) -> None:
+        failed = set(self.handler(batch))
+        for pdf in batch:
+            if pdf.exists():
+                destination = self.failed_dir if pdf in failed else self.processed_dir
+                shutil.move(str(pdf), str(destination / pdf.name))
@@ -0,0 +1,128 @@
+"""Cache persistente do texto extraído de PDFs.
+
+Armazena em SQLite o texto produzido pelo pdfminer, com limite de tamanho e
+descarte LRU. O SQLite garante o acesso concorrente seguro entre os processos
+do pool de conversão.
+"""
+
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import time
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import sqlite3
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Contadores acumulados do cache.
+
+    Attributes:
+        hits: Leituras atendidas pelo cache
+        misses: Leituras que exigiram extração pelo pdfminer
+        entries: Quantidade de textos armazenados
+        size_bytes: Tamanho total dos textos armazenados
+        evictions: Entradas descartadas por limite de tamanho
+    """
+    hits: int
+    misses: int
+    entries: int
+    size_bytes: int
+    evictions: int
+
+
+class PDFTextCache:
+    """Cache em disco de texto extraído, indexado por hash de conteúdo."""
+    def __init__(self, path: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        if max_bytes <= 0:
+            raise ValueError(f"Limite de cache invalido: {max_bytes}")
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._connection: Optional["sqlite3.Connection"] = None
+        self._pid: Optional[int] = None
+
+    def get(self, key: str) -> Optional[str]:
+        """Retorna o texto armazenado para a chave ou None se ausente."""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT text FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                conn.execute("UPDATE stats SET misses = misses + 1")
+                return None
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            conn.execute("UPDATE stats SET hits = hits + 1")
+        return row[0]
+
+    def put(self, key: str, text: str) -> None:
+        """Armazena o texto e descarta as entradas menos usadas se necessário."""
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, text, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, text, size, time.time()),
+            )
+            self._evict(conn)
+
+    def stats(self) -> CacheStats:
+        conn = self._connect()
+        hits, misses, evictions = conn.execute("SELECT hits, misses, evictions FROM stats").fetchone()
+        entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return CacheStats(hits=hits, misses=misses, entries=entries, size_bytes=size, evictions=evictions)
+
+    def clear(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM entries")
+            conn.execute("UPDATE stats SET hits = 0, misses = 0, evictions = 0")
+
+    def _evict(self, conn: "sqlite3.Connection") -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        removed = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            removed.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE key = ?", removed)
+        conn.execute("UPDATE stats SET evictions = evictions + ?", (len(removed),))
+
+    def _connect(self) -> "sqlite3.Connection":
+        # Conexões SQLite não podem atravessar fork; cada processo abre a sua.
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        import sqlite3
+
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        conn.execute("CREATE TABLE IF NOT EXISTS stats (hits INTEGER, misses INTEGER, evictions INTEGER)")
+        conn.execute(
+            "INSERT INTO stats (hits, misses, evictions) "
+            "SELECT 0, 0, 0 WHERE NOT EXISTS (SELECT 1 FROM stats)"
+        )
+        self._connection = conn
+        self._pid = os.getpid()
+        return conn
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_pid"] = None
+        return state
@@ -4,17 +4,31 @@ Gera XML compatível com o padrão da Associação Brasileira das Secretarias
 de Finanças das Capitais (ABRASF) versão 2.x.
 """
 
-import xml.etree.ElementTree as ET
-from models.nfse import NFSeData
+from typing import TYPE_CHECKING, Dict, Tuple
+
+from models.nfse import NFSeData, Prestador
+
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
 
 
 class AbrasfXmlBuilder:
-    """Constrói estrutura XML ABRASF a partir de dados de NFSe."""
+    """Constrói estrutura XML ABRASF a partir de dados de NFSe.
+
+    build_comp_nfse_bytes gera o mesmo CompNfse que build_comp_nfse
+    serializado por ElementTree, byte a byte, sem criar elementos: o trecho
+    final (Servico a partir de ItemListaServico e PrestadorServico), que só
+    depende do prestador e da discriminação, é montado e escapado uma única
+    vez e reaproveitado nas notas seguintes.
+    """
+    VERSION = "1"
+
     def __init__(self) -> None:
         self.namespace = "http://www.abrasf.org.br/nfse.xsd"
-        ET.register_namespace("", self.namespace)
+        self._namespace_registered = False
+        self._tails: Dict[Tuple[Prestador, str], bytes] = {}
 
-    def build_tree(self, data: NFSeData) -> ET.ElementTree:
+    def build_tree(self, data: NFSeData) -> "ET.ElementTree":
         """Constrói árvore XML completa para uma NFSe.
         
         Args:
@@ -23,11 +37,20 @@ class AbrasfXmlBuilder:
         Returns:
             ElementTree com estrutura XML ABRASF completa
         """
+        import xml.etree.ElementTree as ET
+
         root = ET.Element("ListaNfse")
         root.append(self.build_comp_nfse(data))
         return ET.ElementTree(root)
 
-    def build_comp_nfse(self, data: NFSeData) -> ET.Element:
+    def build_comp_nfse(self, data: NFSeData) -> "ET.Element":
+        # ElementTree é importado no primeiro uso para não pesar na
+        # inicialização de processos que não chegam a gerar XML.
+        import xml.etree.ElementTree as ET
+
+        if not self._namespace_registered:
+            ET.register_namespace("", self.namespace)
+            self._namespace_registered = True
         comp_nfse = ET.Element("CompNfse")
         nfse = ET.SubElement(comp_nfse, "Nfse")
         inf = ET.SubElement(nfse, "InfNfse", Id=f"NFS{data.numero}")
@@ -78,5 +101,94 @@ class AbrasfXmlBuilder:
 
         return comp_nfse
 
+    def build_comp_nfse_bytes(self, data: NFSeData) -> bytes:
+        """Serializa o CompNfse da nota diretamente em UTF-8.
+
+        Returns:
+            Mesmos bytes que ElementTree.write(encoding="utf-8") produz para
+            o elemento de build_comp_nfse
+        """
+        tail = self._tails.get((data.prestador, data.discriminacao))
+        if tail is None:
+            tail = self._static_tail(data.prestador, data.discriminacao)
+            self._tails[(data.prestador, data.discriminacao)] = tail
+        valores = data.valores
+        numero = _element("Numero", data.numero)
+        head = "".join((
+            '<CompNfse><Nfse><InfNfse Id="', _escape_attrib(f"NFS{data.numero}"), '">',
+            numero,
+            _element("CodigoVerificacao", data.codigo_verificacao),
+            _element("DataEmissao", data.data_iso),
+            "<IdentificacaoRps>",
+            numero,
+            _element("Serie", data.serie_rps),
+            _element("Tipo", data.tipo_rps),
+            "</IdentificacaoRps>",
+            _element("NaturezaOperacao", data.natureza_operacao),
+            _element("OptanteSimplesNacional", data.optante_simples),
+            _element("IncentivadorCultural", data.incentivador_cultural),
+            _element("Competencia", data.competencia),
+            "<Servico><Valores><ValorServicos>", self._fmt(valores.valor_servicos),
+            "</ValorServicos><IssRetido>2</IssRetido><ValorPis>", self._fmt(valores.pis),
+            "</ValorPis><ValorCofins>", self._fmt(valores.cofins),
+            "</ValorCofins><ValorIr>", self._fmt(valores.irrf),
+            "</ValorIr><ValorInss>", self._fmt(valores.inss),
+            "</ValorInss><ValorCsll>", self._fmt(valores.csll),
+            "</ValorCsll></Valores>",
+        ))
+        return head.encode("utf-8", "xmlcharrefreplace") + tail
+
+    def _static_tail(self, prestador: Prestador, discriminacao: str) -> bytes:
+        tail = "".join((
+            _element("ItemListaServico", prestador.item_lista_servico),
+            _element("CodigoMunicipio", prestador.municipio),
+            _element("Discriminacao", discriminacao),
+            "</Servico><PrestadorServico><IdentificacaoPrestador>",
+            _element("Cnpj", prestador.cnpj),
+            _element("InscricaoMunicipal", prestador.inscricao_municipal),
+            "</IdentificacaoPrestador>",
+            _element("RazaoSocial", prestador.razao_social),
+            "<Endereco>",
+            _element("Endereco", prestador.endereco),
+            _element("Numero", prestador.numero),
+            _element("Complemento", prestador.complemento),
+            _element("Bairro", prestador.bairro),
+            _element("CodigoMunicipio", prestador.municipio),
+            _element("Uf", prestador.uf),
+            _element("Cep", prestador.cep),
+            "</Endereco></PrestadorServico></InfNfse></Nfse></CompNfse>",
+        ))
+        return tail.encode("utf-8", "xmlcharrefreplace")
+
     def _fmt(self, value: float) -> str:
         return f"{value:.2f}"
+
+
+def _element(tag: str, text: str) -> str:
+    # Texto vazio vira elemento curto, como em ElementTree.
+    if not text:
+        return f"<{tag} />"
+    return f"<{tag}>{_escape_text(text)}</{tag}>"
+
+
+def _escape_text(text: str) -> str:
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+def _escape_attrib(text: str) -> str:
+    text = _escape_text(text)
+    if '"' in text:
+        text = text.replace('"', "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return text
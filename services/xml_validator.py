@@ -0,0 +1,115 @@
+"""Validação dos CompNfse gerados contra o XSD (requer o pacote opcional lxml).
+
+Sem validação, uma nota fora do leiaute só é recusada na importação, horas
+depois da conversão. O NFSeConverter valida cada nota no worker logo após o
+build, em paralelo com as demais; o processo principal não valida nada.
+
+Compilar o XSD custa bem mais que validar uma nota, por isso cada esquema é
+lido e compilado uma única vez por processo (load_schema) e reaproveitado.
+O esquema padrão está em services/schemas e é lido do disco, sem rede.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+import zlib
+
+from models.conversion import ValidationPolicy
+
+if TYPE_CHECKING:
+    from lxml import etree
+
+DEFAULT_SCHEMA = Path(__file__).resolve().parent / "schemas" / "nfse_abrasf.xsd"
+# Erros do XSD incluídos na mensagem da falha.
+MAX_REPORTED_ERRORS = 3
+
+_schemas: Dict[Path, "etree.XMLSchema"] = {}
+
+
+class SchemaValidationError(ValueError):
+    """CompNfse gerado não atende ao XSD."""
+
+
+def validate_validation_policy(policy: ValidationPolicy) -> None:
+    """Raises ValueError se o modo ou a taxa de amostragem forem inválidos."""
+    if policy.mode not in (ValidationPolicy.FULL, ValidationPolicy.SAMPLE):
+        raise ValueError(f"Modo de validacao invalido: {policy.mode}")
+    if policy.mode == ValidationPolicy.SAMPLE and not 0 < policy.sample_rate <= 1:
+        raise ValueError(f"Taxa de amostragem invalida: {policy.sample_rate}")
+
+
+def load_schema(path: Optional[Path] = None) -> "etree.XMLSchema":
+    """XSD compilado, lido na primeira chamada do processo para cada caminho.
+
+    Inclusões e importações do esquema só são resolvidas a partir de
+    arquivos locais.
+
+    Raises:
+        RuntimeError: Se o pacote lxml não estiver instalado
+        FileNotFoundError: Se o XSD não existir
+        ValueError: Se o arquivo não for um XSD válido
+    """
+    path = Path(path).resolve() if path is not None else DEFAULT_SCHEMA
+    schema = _schemas.get(path)
+    if schema is not None:
+        return schema
+    try:
+        from lxml import etree
+    except ImportError as exc:
+        raise RuntimeError("Validacao XSD requer o pacote lxml") from exc
+    if not path.is_file():
+        raise FileNotFoundError(f"XSD nao encontrado: {path}")
+    parser = etree.XMLParser(no_network=True, resolve_entities=False)
+    try:
+        schema = etree.XMLSchema(etree.parse(str(path), parser))
+    except (etree.XMLSyntaxError, etree.XMLSchemaParseError) as exc:
+        raise ValueError(f"XSD invalido: {path} ({exc})") from exc
+    _schemas[path] = schema
+    return schema
+
+
+class NoteValidator:
+    """Valida CompNfse serializados conforme uma ValidationPolicy.
+
+    Criado no processo que gera as notas (não é serializável); o esquema
+    vem do cache de load_schema.
+
+    Raises:
+        ValueError: Se a política for inválida, além dos casos de load_schema
+    """
+    def __init__(self, policy: ValidationPolicy) -> None:
+        validate_validation_policy(policy)
+        self.schema = load_schema(policy.schema_path)
+        from lxml import etree
+
+        self._parser = etree.XMLParser(no_network=True, resolve_entities=False)
+        # Sorteio pelo CRC32 da chave da nota: estável entre processos e
+        # execuções, sem estado compartilhado entre os workers.
+        rate = 1.0 if policy.mode == ValidationPolicy.FULL else policy.sample_rate
+        self._threshold = int(rate * 0x100000000)
+
+    def selects(self, key: Tuple[str, str, str]) -> bool:
+        """Se a nota com essa chave (CNPJ, número, código) entra na validação."""
+        if self._threshold > 0xFFFFFFFF:
+            return True
+        return zlib.crc32("\x1f".join(key).encode("utf-8")) < self._threshold
+
+    def validate(self, fragment: bytes) -> None:
+        """Valida um CompNfse em UTF-8.
+
+        Raises:
+            SchemaValidationError: Com os primeiros erros apontados pelo XSD
+        """
+        from lxml import etree
+
+        try:
+            element = etree.fromstring(fragment, self._parser)
+        except etree.XMLSyntaxError as exc:
+            raise SchemaValidationError(f"CompNfse mal formado: {exc}") from exc
+        if self.schema.validate(element):
+            return
+        # O fragmento tem uma linha só: a mensagem já cita o elemento.
+        errors = [error.message for error in self.schema.error_log]
+        message = "; ".join(errors[:MAX_REPORTED_ERRORS])
+        if len(errors) > MAX_REPORTED_ERRORS:
+            message += f" (+{len(errors) - MAX_REPORTED_ERRORS} erro(s))"
+        raise SchemaValidationError(f"CompNfse fora do XSD: {message}")
@@ -0,0 +1,221 @@
+"""Escrita incremental de XML ABRASF consolidado.
+
+Serializa cada CompNfse assim que é construído, em vez de acumular toda a
+ListaNfse em memória. O arquivo é gravado em um temporário na mesma pasta e
+renomeado ao final, de modo que uma falha nunca deixa XML truncado no destino.
+
+OutputSink é a interface dos destinos de saída do NFSeConverter;
+GroupedListaNfseWriter é o destino padrão do modo consolidado e
+services.output_sinks traz os demais (zip, ListaNfse em partes).
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import ExitStack
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
+
+XML_DECLARATION = b"<?xml version='1.0' encoding='utf-8'?>\n"
+
+
+class OutputSink(ABC):
+    """Destino das notas convertidas, usado como context manager.
+
+    O NFSeConverter entrega as notas no processo principal, na ordem dos PDFs
+    de entrada. A saída só deve aparecer no destino ao fim de um bloco sem
+    exceção, por isso __exit__ é abstrato como outputs e write_bytes: uma
+    subclasse incompleta falha já ao ser instanciada.
+
+    Attributes:
+        target: Caminho que identifica a saída (base dos relatórios de erros
+            e de duplicatas)
+        count: Notas gravadas
+    """
+    target: Path
+    count: int
+
+    @property
+    @abstractmethod
+    def outputs(self) -> List[Path]:
+        """Arquivos gerados, na ordem em que foram criados."""
+
+    def __enter__(self) -> "OutputSink":
+        return self
+
+    @abstractmethod
+    def __exit__(self, exc_type, exc, tb) -> Optional[bool]:
+        """Publica a saída se exc_type for None; senão descarta o que foi gravado."""
+
+    @abstractmethod
+    def write_bytes(self, fragment: bytes, group: Optional[str] = None, source: Optional[Path] = None) -> int:
+        """Grava um CompNfse já serializado em UTF-8.
+
+        Args:
+            fragment: Bytes do CompNfse
+            group: Grupo de saída da nota (ConvertedNote.group)
+            source: PDF de origem; notas seguidas do mesmo PDF chegam em sequência
+
+        Returns:
+            Quantidade de bytes gravados para a nota (antes de compressão)
+        """
+
+
+class ListaNfseWriter:
+    """Escreve um documento ListaNfse elemento a elemento.
+
+    A saída é idêntica byte a byte à de ElementTree.write com
+    encoding="utf-8" e xml_declaration=True sobre a árvore completa.
+
+    Com compresslevel o arquivo é gravado em gzip (sem data no cabeçalho,
+    para que a mesma entrada gere os mesmos bytes).
+
+    Uso:
+        with ListaNfseWriter(destino) as writer:
+            writer.write(comp_nfse)
+    """
+    def __init__(self, target: Path, compresslevel: Optional[int] = None) -> None:
+        self.target = Path(target)
+        self.compresslevel = compresslevel
+        self.count = 0
+        self._tmp_path = self.target.with_name(f".{self.target.name}.{os.getpid()}.tmp")
+        self._handle: Optional[BinaryIO] = None
+        self._raw: Optional[BinaryIO] = None
+
+    def __enter__(self) -> "ListaNfseWriter":
+        self._handle = open(self._tmp_path, "wb")
+        if self.compresslevel is not None:
+            import gzip
+
+            self._raw = self._handle
+            self._handle = gzip.GzipFile(
+                filename=self.target.name, mode="wb", compresslevel=self.compresslevel, fileobj=self._raw, mtime=0,
+            )
+        self._handle.write(XML_DECLARATION + b"<ListaNfse")
+        return self
+
+    def write(self, comp_nfse: "ET.Element") -> int:
+        """Serializa um CompNfse imediatamente no arquivo temporário.
+
+        Returns:
+            Quantidade de bytes gravados para o elemento
+        """
+        import xml.etree.ElementTree as ET
+
+        self._open_root()
+        position = self._handle.tell()
+        ET.ElementTree(comp_nfse).write(self._handle, encoding="utf-8")
+        self.count += 1
+        return self._handle.tell() - position
+
+    def write_bytes(self, fragment: bytes) -> int:
+        """Anexa um CompNfse já serializado em UTF-8.
+
+        Returns:
+            Quantidade de bytes gravados para o elemento
+        """
+        self._open_root()
+        self._handle.write(fragment)
+        self.count += 1
+        return len(fragment)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.discard()
+            return
+        try:
+            self.close()
+            self.commit()
+        except BaseException:
+            self.discard()
+            raise
+
+    def close(self) -> None:
+        """Termina o documento no temporário, sem publicá-lo no destino.
+
+        Usado por quem grava vários arquivos e só publica todos ao final
+        (ver commit e discard); o context manager faz as duas etapas.
+        """
+        handle, self._handle = self._handle, None
+        if handle is None:
+            return
+        try:
+            handle.write(b"</ListaNfse>" if self.count else b" />")
+        finally:
+            self._close(handle)
+
+    def commit(self) -> None:
+        """Publica o documento já fechado no destino (rename atômico)."""
+        os.replace(self._tmp_path, self.target)
+
+    def discard(self) -> None:
+        """Descarta o temporário; o destino fica como estava."""
+        handle, self._handle = self._handle, None
+        if handle is not None:
+            self._close(handle)
+        self._tmp_path.unlink(missing_ok=True)
+
+    def _close(self, handle: BinaryIO) -> None:
+        # O GzipFile não fecha o arquivo que recebeu.
+        raw, self._raw = self._raw, None
+        try:
+            handle.close()
+        finally:
+            if raw is not None:
+                raw.close()
+
+    def _open_root(self) -> None:
+        if self._handle is None:
+            raise RuntimeError("ListaNfseWriter deve ser usado como context manager")
+        if self.count == 0:
+            self._handle.write(b">")
+
+
+class GroupedListaNfseWriter(OutputSink):
+    """Distribui os CompNfse em um ListaNfse por grupo (ex.: CNPJ do prestador).
+
+    Sem grupo, o fragmento vai para target; com grupo, para
+    "<target.stem>_<grupo><target.suffix>" na mesma pasta. Cada arquivo é
+    aberto no primeiro fragmento do grupo. Se nada for gravado, target
+    recebe um ListaNfse vazio, como ListaNfseWriter.
+    """
+    def __init__(self, target: Path) -> None:
+        self.target = Path(target)
+        self.count = 0
+        self._writers: Dict[Optional[str], ListaNfseWriter] = {}
+        self._stack: Optional[ExitStack] = None
+
+    @property
+    def outputs(self) -> List[Path]:
+        """Arquivos gerados, na ordem em que cada grupo apareceu."""
+        return [writer.target for writer in self._writers.values()]
+
+    def __enter__(self) -> "GroupedListaNfseWriter":
+        self._stack = ExitStack()
+        return self
+
+    def write_bytes(self, fragment: bytes, group: Optional[str] = None, source: Optional[Path] = None) -> int:
+        """Anexa um CompNfse já serializado ao ListaNfse do grupo."""
+        writer = self._writers.get(group)
+        if writer is None:
+            writer = self._open(group)
+        self.count += 1
+        return writer.write_bytes(fragment)
+
+    def __exit__(self, exc_type, exc, tb) -> Optional[bool]:
+        if exc_type is None and not self._writers:
+            self._open(None)
+        stack, self._stack = self._stack, None
+        return stack.__exit__(exc_type, exc, tb)
+
+    def _open(self, group: Optional[str]) -> ListaNfseWriter:
+        if self._stack is None:
+            raise RuntimeError("GroupedListaNfseWriter deve ser usado como context manager")
+        target = self.target
+        if group is not None:
+            target = target.with_name(f"{target.stem}_{group}{target.suffix}")
+        writer = self._stack.enter_context(ListaNfseWriter(target))
+        self._writers[group] = writer
+        return writer
@@ -0,0 +1,75 @@
+"""Conversor de teste cujo comportamento vem do conteúdo do "PDF".
+
+O arquivo traz só um comando em ASCII, de modo que falhas, tempo limite e
+morte do worker podem ser provocados em PDFs escolhidos, inclusive dentro
+dos processos do pool:
+
+    ok      gera uma nota (número tirado dos dígitos do nome do arquivo)
+    raise   levanta ValueError na etapa parse
+    sleep   dorme 5 segundos (para o tempo limite)
+    exit    encerra o processo com os._exit (simula falha de segmentação)
+    flaky   falha na primeira tentativa e converte na segunda
+"""
+
+from dataclasses import replace
+from datetime import datetime
+import os
+from pathlib import Path
+import re
+import time
+from typing import Dict, List
+
+from controllers.converter import NFSeConverter
+from models.nfse import DEFAULT_PRESTADOR, NFSeData, ValoresServico
+from services.parser import ServimaxParser
+from services.pdf_reader import PDFInvoiceReader
+from services.pdf_source import PDFSource, open_pdf, source_path
+from services.xml_builder import AbrasfXmlBuilder
+
+NOTE = NFSeData(
+    numero="0",
+    codigo_verificacao="ABC123",
+    data_emissao=datetime(2024, 1, 31, 10, 0, 0),
+    valores=ValoresServico(100.0, 0.65, 3.0, 1.0, 1.5, 0.0, 5.0),
+    prestador=DEFAULT_PRESTADOR,
+)
+
+
+class ScriptedConverter(NFSeConverter):
+    """NFSeConverter que executa o comando gravado em cada PDF.
+
+    Só a leitura e o parse são simulados; build, validação e gravação são
+    os do conversor. Um número após o comando ("ok 500") substitui o
+    número tirado do nome do arquivo.
+    """
+    def __init__(self) -> None:
+        super().__init__(PDFInvoiceReader(), ServimaxParser(DEFAULT_PRESTADOR), AbrasfXmlBuilder())
+        # Tentativas por PDF, contadas no processo que converte.
+        self.attempts: Dict[str, int] = {}
+
+    def _parse_note(self, pdf_path: PDFSource) -> NFSeData:
+        name = source_path(pdf_path).name
+        self.attempts[name] = self.attempts.get(name, 0) + 1
+        with self._stage("read"):
+            with open_pdf(pdf_path) as handle:
+                command, _, numero = handle.read().decode("ascii").strip().partition(" ")
+        with self._stage("parse"):
+            if command == "raise":
+                raise ValueError("PDF ilegivel")
+            if command == "sleep":
+                time.sleep(5)
+            if command == "exit":
+                os._exit(1)
+            if command == "flaky" and self.attempts[name] == 1:
+                raise ValueError("Falha transitoria")
+            return replace(NOTE, numero=numero or re.sub(r"\D", "", Path(name).stem) or "0")
+
+
+def write_pdfs(directory: Path, commands: List[str]) -> List[Path]:
+    """Grava um "PDF" por comando (nota_001.pdf, nota_002.pdf, ...)."""
+    paths = []
+    for index, command in enumerate(commands, 1):
+        path = directory / f"nota_{index:03d}.pdf"
+        path.write_bytes(command.encode("ascii"))
+        paths.append(path)
+    return paths
@@ -0,0 +1,115 @@
+"""Lote colunar: totais por competência e exportação CSV/Parquet."""
+
+import csv
+from dataclasses import replace
+from datetime import datetime
+import importlib.util
+import math
+from pathlib import Path
+import tempfile
+import unittest
+
+from models.nfse import Prestador, ValoresServico
+from models.nfse_batch import VALUE_FIELDS, NFSeBatch
+from services.batch_export import NOTE_COLUMNS, export_batch, write_totals_csv
+from tests.doubles import NOTE
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+OTHER_PRESTADOR = replace(NOTE.prestador, cnpj="11222333000181")
+
+
+def notes():
+    emissoes = [datetime(2024, 1, 31, 10), datetime(2024, 2, 1, 8, 30), datetime(2024, 1, 2, 23, 59, 59),
+                datetime(2024, 2, 1, 9), datetime(2023, 12, 15)]
+    return [
+        replace(
+            NOTE, numero=str(100 + index), data_emissao=emitted,
+            valores=ValoresServico(*(0.1 * (index + 1) + position for position in range(len(VALUE_FIELDS)))),
+            prestador=OTHER_PRESTADOR if index % 2 else NOTE.prestador,
+        )
+        for index, emitted in enumerate(emissoes)
+    ]
+
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="nfse_batch_")
+        self.dir = Path(self._tmp.name)
+        self.notes = notes()
+        self.batch = NFSeBatch.from_notes(self.notes)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def expected_totals(self, key):
+        groups = {}
+        for note in self.notes:
+            groups.setdefault(key(note.data_emissao), []).append(note)
+        return {
+            label: dict(
+                {"notas": len(group)},
+                **{name: round(math.fsum(getattr(note.valores, name) for note in group), 2) for name in VALUE_FIELDS},
+            )
+            for label, group in sorted(groups.items())
+        }
+
+    def test_totals_by_competencia(self) -> None:
+        totals = self.batch.totals_by_competencia()
+        self.assertEqual(list(totals), ["2023-12", "2024-01", "2024-02"])
+        self.assertEqual(totals, self.expected_totals(lambda moment: moment.strftime("%Y-%m")))
+        daily = self.batch.totals_by_competencia("day")
+        self.assertEqual(daily, self.expected_totals(lambda moment: moment.strftime("%Y-%m-%d")))
+        self.assertEqual(NFSeBatch().totals_by_competencia(), {})
+        with self.assertRaises(ValueError):
+            self.batch.totals_by_competencia("year")
+
+    def test_prestadores_are_shared(self) -> None:
+        self.assertEqual(self.batch.prestadores, [NOTE.prestador, OTHER_PRESTADOR])
+        self.assertIsInstance(self.batch.prestadores[0], Prestador)
+        self.assertEqual(list(self.batch.prestador_index), [0, 1, 0, 1, 0])
+
+    def test_csv_export(self) -> None:
+        path = export_batch(self.batch, self.dir / "notas.csv")
+        with open(path, encoding="utf-8", newline="") as handle:
+            rows = list(csv.reader(handle, delimiter=";"))
+        self.assertEqual(tuple(rows[0]), NOTE_COLUMNS)
+        self.assertEqual([row[0] for row in rows[1:]], [note.numero for note in self.notes])
+        self.assertEqual(rows[3][2:5], ["2024-01-02T23:59:59", "2024-01-02", NOTE.prestador.cnpj])
+        self.assertEqual(rows[1][5], "0.10")
+        self.assertEqual([p.name for p in self.dir.iterdir()], ["notas.csv"])
+
+    def test_totals_csv(self) -> None:
+        path = self.dir / "totais.csv"
+        write_totals_csv(self.batch.totals_by_competencia(), path)
+        with open(path, encoding="utf-8", newline="") as handle:
+            rows = list(csv.reader(handle, delimiter=";"))
+        self.assertEqual(rows[0], ["competencia", "notas", *VALUE_FIELDS])
+        self.assertEqual([row[:2] for row in rows[1:]], [["2023-12", "1"], ["2024-01", "2"], ["2024-02", "2"]])
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow nao instalado")
+    def test_parquet_export(self) -> None:
+        import pyarrow.parquet as pq
+
+        path = export_batch(self.batch, self.dir / "notas.parquet")
+        table = pq.read_table(str(path))
+        self.assertEqual(tuple(table.column_names), NOTE_COLUMNS)
+        self.assertEqual(table.num_rows, len(self.notes))
+        data = table.to_pydict()
+        self.assertEqual(data["numero"], [note.numero for note in self.notes])
+        self.assertEqual(data["data_emissao"], [note.data_emissao for note in self.notes])
+        self.assertEqual(data["competencia"], [note.data_emissao.date() for note in self.notes])
+        self.assertEqual(data["prestador_cnpj"], [note.prestador.cnpj for note in self.notes])
+        for name in VALUE_FIELDS:
+            self.assertEqual(data[name], [getattr(note.valores, name) for note in self.notes])
+        self.assertEqual([p.name for p in self.dir.iterdir()], ["notas.parquet"])
+
+    @unittest.skipIf(HAS_PYARROW, "pyarrow instalado")
+    def test_parquet_requires_pyarrow(self) -> None:
+        with self.assertRaisesRegex(RuntimeError, "pyarrow"):
+            export_batch(self.batch, self.dir / "notas.parquet")
+        self.assertEqual(list(self.dir.iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
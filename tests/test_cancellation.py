@@ -0,0 +1,70 @@
+"""Cancelamento: a saída consolidada parcial é descartada."""
+
+from pathlib import Path
+import tempfile
+import threading
+import unittest
+
+from models.conversion import FaultPolicy
+from services.metrics import MetricsHook
+from services.output_sinks import RollingListaNfseWriter
+from tests.doubles import ScriptedConverter, write_pdfs
+
+
+class CancelAfterFirstFile(MetricsHook):
+    def __init__(self, event: threading.Event) -> None:
+        self.event = event
+
+    def on_file(self, metrics) -> None:
+        self.event.set()
+
+
+class CancellationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="nfse_cancel_")
+        self.tmp = Path(self._tmp.name)
+        self.pdfs = write_pdfs(self.tmp, ["ok"] * 6)
+        self.output = self.tmp / "saida" / "lote.xml"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def convert(self, workers=1, **options):
+        converter = ScriptedConverter()
+        event = threading.Event()
+        converter.add_metrics_hook(CancelAfterFirstFile(event))
+        outputs = converter.convert_files(self.pdfs, workers=workers, cancel_event=event, **options)
+        return outputs, converter.last_summary
+
+    def test_consolidated_output_is_not_written(self) -> None:
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                outputs, summary = self.convert(workers, output_path=self.output, fault_policy=FaultPolicy())
+                self.assertTrue(summary.cancelled)
+                self.assertEqual((outputs, summary.converted), ([], 0))
+                self.assertFalse(self.output.exists())
+                # Nem o temporário nem o relatório de erros ficam para trás.
+                self.assertEqual(list(self.output.parent.iterdir()), [])
+
+    def test_previous_consolidated_output_is_kept(self) -> None:
+        self.output.parent.mkdir()
+        self.output.write_bytes(b"<ListaNfse />")
+        self.convert(output_path=self.output)
+        self.assertEqual(self.output.read_bytes(), b"<ListaNfse />")
+
+    def test_rolling_parts_are_not_written(self) -> None:
+        sink = RollingListaNfseWriter(self.output, max_notes=1)
+        outputs, summary = self.convert(output_sink=sink)
+        self.assertTrue(summary.cancelled)
+        self.assertEqual(outputs, [])
+        self.assertEqual(list(self.output.parent.iterdir()), [])
+
+    def test_per_file_keeps_written_xmls(self) -> None:
+        outputs, summary = self.convert(target_dir=self.output.parent)
+        self.assertTrue(summary.cancelled)
+        self.assertEqual(outputs, [self.output.parent / "nota_001.xml"])
+        self.assertTrue(outputs[0].exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
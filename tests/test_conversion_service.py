@@ -0,0 +1,38 @@
+"""ConversionService: recuperação do pool depois da morte de um worker."""
+
+import asyncio
+import unittest
+
+from controllers.conversion_service import ConversionFailedError, ConversionService
+from tests.doubles import ScriptedConverter
+
+
+class WorkerCrashTest(unittest.TestCase):
+    def test_pool_is_rebuilt_and_only_the_crashing_request_fails(self) -> None:
+        async def scenario():
+            service = ConversionService(ScriptedConverter(), workers=2, max_batch=4, batch_window=0.05)
+            await service.start()
+            try:
+                first = await asyncio.gather(
+                    service.convert(b"ok"), service.convert(b"exit"), service.convert(b"ok"),
+                    return_exceptions=True,
+                )
+                # O serviço continua atendendo depois da troca do pool.
+                later = await service.convert(b"ok")
+                return first, later, dict(service.stats)
+            finally:
+                await service.close()
+
+        (ok_before, crashed, ok_after), later, stats = asyncio.run(scenario())
+        self.assertEqual(len(ok_before), 1)
+        self.assertEqual(len(ok_after), 1)
+        self.assertIsInstance(crashed, ConversionFailedError)
+        self.assertEqual(crashed.failure.stage, "worker")
+        self.assertEqual(crashed.failure.exception, "BrokenProcessPool")
+        self.assertEqual(len(later), 1)
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["requests"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
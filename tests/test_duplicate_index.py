@@ -0,0 +1,118 @@
+"""Índice de duplicatas: ações dedupe, skip e report e o commit do índice."""
+
+import json
+from pathlib import Path
+import tempfile
+import unittest
+
+from controllers.converter import DUPLICATE_REPORT_NAME
+from models.conversion import DuplicatePolicy
+from models.nfse import DEFAULT_PRESTADOR
+from services.duplicate_index import DuplicateIndex
+from tests.doubles import NOTE, ScriptedConverter, write_pdfs
+
+
+def key(numero: str) -> tuple:
+    return (DEFAULT_PRESTADOR.cnpj, numero, NOTE.codigo_verificacao)
+
+
+class DuplicateFilterTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="nfse_dup_")
+        self.tmp = Path(self._tmp.name)
+        self.index_path = self.tmp / "indice.sqlite"
+        self.output = self.tmp / "saida"
+        self.converter = ScriptedConverter()
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def convert(self, pdfs, action=DuplicatePolicy.DEDUPE, **options):
+        policy = DuplicatePolicy(self.index_path, action=action)
+        if "output_path" not in options:
+            options["target_dir"] = self.output
+        self.converter.convert_files(pdfs, duplicate_policy=policy, **options)
+        return self.converter.last_summary
+
+    def indexed(self, numero: str):
+        index = DuplicateIndex(self.index_path)
+        try:
+            return index.note_source(key(numero))
+        finally:
+            index.close()
+
+    def test_second_run_over_same_pdf(self) -> None:
+        pdfs = write_pdfs(self.tmp, ["ok 1", "ok 2"])
+        first = self.convert(pdfs)
+        self.assertEqual((first.converted, first.skipped, first.duplicates), (2, 0, []))
+
+        for action, converted, expected in (
+            (DuplicatePolicy.DEDUPE, 0, [("skipped", None)] * 2),
+            (DuplicatePolicy.SKIP, 0, [("skipped", None)] * 2),
+            # REPORT converte tudo: relata o PDF pelo hash e depois cada nota.
+            (DuplicatePolicy.REPORT, 2, [("reported", None)] * 2 + [("reported", key("1")), ("reported", key("2"))]),
+        ):
+            with self.subTest(action):
+                summary = self.convert(pdfs, action=action)
+                self.assertEqual(summary.converted, converted)
+                self.assertEqual([(entry.action, entry.key) for entry in summary.duplicates], expected)
+                # Os PDFs são reconhecidos pelo hash, antes da extração.
+                self.assertTrue(all(entry.sha256 for entry in summary.duplicates if entry.key is None))
+                report = json.loads((self.output / DUPLICATE_REPORT_NAME).read_text(encoding="utf-8"))
+                self.assertEqual(len(report["duplicates"]), len(expected))
+
+    def test_note_repeated_across_pdfs_in_same_run(self) -> None:
+        # Conteúdos diferentes (hashes distintos) com a mesma nota 500.
+        for action, kept, outcome in (
+            (DuplicatePolicy.DEDUPE, 1, "dropped"),
+            (DuplicatePolicy.SKIP, 1, "skipped"),
+            (DuplicatePolicy.REPORT, 2, "reported"),
+        ):
+            with self.subTest(action):
+                self.index_path.unlink(missing_ok=True)
+                pdfs = write_pdfs(self.tmp, ["ok 500", "ok 500\n", "ok 501"])
+                output = self.tmp / f"{action}.xml"
+                summary = self.convert(pdfs, action=action, output_path=output)
+                xml = output.read_text(encoding="utf-8")
+                self.assertEqual(xml.count('Id="NFS500"'), kept)
+                self.assertEqual(summary.converted, kept + 1)
+                [entry] = summary.duplicates
+                self.assertEqual(entry.action, outcome)
+                self.assertEqual(entry.key, key("500"))
+                # O primeiro PDF da entrada é sempre o mantido.
+                self.assertEqual(entry.pdf_path, pdfs[1])
+                self.assertEqual(entry.first_source, str(pdfs[0]))
+                self.assertEqual(self.indexed("500"), str(pdfs[0]))
+
+    def test_failed_run_leaves_index_untouched(self) -> None:
+        pdfs = write_pdfs(self.tmp, ["ok 500", "raise"])
+        with self.assertRaises(ValueError):
+            self.convert(pdfs)
+        self.assertIsNone(self.indexed("500"))
+        # A nova execução converte de novo a nota que ficou sem registro.
+        summary = self.convert(pdfs[:1])
+        self.assertEqual((summary.converted, summary.duplicates), (1, []))
+        self.assertEqual(self.indexed("500"), str(pdfs[0]))
+
+    def test_incremental_records_pdf_whose_notes_are_all_known(self) -> None:
+        [pdf] = write_pdfs(self.tmp, ["ok 500"])
+        self.convert([pdf], incremental=True)
+        xml = self.output / "nota_001.xml"
+        self.assertTrue(xml.exists())
+
+        # Novo conteúdo (novo hash) com a mesma nota: extraído uma vez,
+        # nota omitida e o PDF registrado com o XML anterior.
+        pdf.write_bytes(b"ok 500\n")
+        summary = self.convert([pdf], incremental=True)
+        self.assertEqual((summary.converted, summary.skipped), (0, 1))
+        self.assertEqual([entry.action for entry in summary.duplicates], ["dropped"])
+        attempts = self.converter.attempts[pdf.name]
+
+        summary = self.convert([pdf], incremental=True)
+        self.assertEqual((summary.converted, summary.skipped, summary.duplicates), (0, 1, []))
+        self.assertEqual(self.converter.attempts[pdf.name], attempts)
+        self.assertEqual(summary.outputs, [xml])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Modo tolerante a falhas: novas tentativas, tempo limite e morte do worker.
+
+Em todos os casos o restante do lote termina, as notas dos PDFs bons vão
+para o ListaNfse e cada PDF com problema aparece no relatório de erros.
+"""
+
+import json
+from pathlib import Path
+import tempfile
+import unittest
+
+from models.conversion import FaultPolicy
+from tests.doubles import ScriptedConverter, write_pdfs
+
+
+class FaultToleranceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="nfse_fault_")
+        self.tmp = Path(self._tmp.name)
+        self.output = self.tmp / "saida" / "lote.xml"
+        self.report = self.tmp / "saida" / "lote_erros.json"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def convert(self, commands, workers=1, **policy):
+        converter = ScriptedConverter()
+        pdfs = write_pdfs(self.tmp, commands)
+        converter.convert_files(pdfs, output_path=self.output, workers=workers, fault_policy=FaultPolicy(**policy))
+        return converter.last_summary
+
+    def report_entries(self) -> dict:
+        failures = json.loads(self.report.read_text(encoding="utf-8"))["failures"]
+        return {Path(entry["file"]).name: entry for entry in failures}
+
+    def assertConverted(self, numeros) -> None:
+        xml = self.output.read_text(encoding="utf-8")
+        self.assertEqual(xml.count("<CompNfse>"), len(numeros))
+        for numero in numeros:
+            self.assertIn(f'Id="NFS{numero}"', xml)
+
+    def test_failing_pdf_is_reported_and_batch_continues(self) -> None:
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                summary = self.convert(["ok", "raise", "ok", "ok"], workers=workers, retries=1)
+                self.assertEqual(summary.converted, 3)
+                self.assertConverted(["001", "003", "004"])
+                entry = self.report_entries()["nota_002.pdf"]
+                self.assertEqual(entry["stage"], "parse")
+                self.assertEqual(entry["exception"], "ValueError")
+                self.assertEqual(entry["attempts"], 2)
+
+    def test_retry_recovers_transient_failure(self) -> None:
+        summary = self.convert(["ok", "flaky"], retries=1)
+        self.assertEqual(summary.converted, 2)
+        self.assertEqual(summary.failures, [])
+        self.assertFalse(self.report.exists())
+
+    def test_timeout(self) -> None:
+        summary = self.convert(["ok", "sleep", "ok"], timeout=0.5)
+        self.assertEqual(summary.converted, 2)
+        self.assertConverted(["001", "003"])
+        entry = self.report_entries()["nota_002.pdf"]
+        self.assertEqual(entry["exception"], "FileTimeoutError")
+        self.assertLess(entry["elapsed"], 5)
+
+    def test_worker_crash(self) -> None:
+        summary = self.convert(["ok", "ok", "exit", "ok", "ok", "ok"], workers=2)
+        self.assertEqual(summary.converted, 5)
+        self.assertConverted(["001", "002", "004", "005", "006"])
+        self.assertEqual(list(self.report_entries()), ["nota_003.pdf"])
+        entry = self.report_entries()["nota_003.pdf"]
+        self.assertEqual(entry["stage"], "worker")
+        self.assertEqual(entry["exception"], "BrokenProcessPool")
+
+    def test_report_of_previous_run_is_removed(self) -> None:
+        self.convert(["raise", "ok"])
+        self.assertTrue(self.report.exists())
+        self.convert(["ok", "ok"])
+        self.assertFalse(self.report.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Pré-seleção pelo nome: partes, filtros e ordem por tamanho."""
+
+from pathlib import Path
+import tempfile
+import unittest
+
+from models.conversion import PreScanPolicy
+from services.file_prescan import compile_patterns, parse_file_name, prescan, shard_of
+from services.pdf_source import MemoryPDF
+
+
+def servimax_name(numero: int, retencao: bool) -> str:
+    return f"NFS {numero} - SERVIMEX ({'COM' if retencao else 'SEM'} RETENÇÃO).pdf"
+
+
+class PreScanTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="nfse_prescan_")
+        self.dir = Path(self._tmp.name)
+        self.pdfs = []
+        for index in range(40):
+            path = self.dir / servimax_name(298000 + index, index % 3 == 0)
+            # Tamanhos distintos e fora da ordem dos nomes.
+            path.write_bytes(b"%" * ((index * 37) % 40 + 1))
+            self.pdfs.append(path)
+        self.others = [self.dir / "recibo.pdf", self.dir / "NFS sem numero.pdf"]
+        for path in self.others:
+            path.write_bytes(b"%")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_every_file_lands_in_exactly_one_shard(self) -> None:
+        files = self.pdfs + self.others
+        for count in (1, 2, 3, 7):
+            with self.subTest(shard_count=count):
+                shards = [prescan(files, PreScanPolicy(shard_index=i, shard_count=count)) for i in range(count)]
+                selected = [pdf for shard in shards for pdf in shard]
+                self.assertEqual(sorted(selected), sorted(files))
+                self.assertEqual(len(selected), len(set(selected)))
+
+    def test_shard_is_stable_for_the_same_name(self) -> None:
+        for path in self.pdfs:
+            other_folder = Path("/outra/maquina") / path.name
+            self.assertEqual(shard_of(path, 5), shard_of(path, 5))
+            self.assertEqual(shard_of(path, 5), shard_of(other_folder, 5))
+            self.assertEqual(shard_of(path, 5), shard_of(MemoryPDF(path.name, b"").path, 5))
+        # Nova varredura da mesma pasta, em outra ordem: mesma divisão.
+        policy = PreScanPolicy(shard_index=1, shard_count=3)
+        self.assertEqual(set(prescan(self.pdfs, policy)), set(prescan(self.pdfs[::-1], policy)))
+
+    def test_parse_file_name(self) -> None:
+        patterns = compile_patterns(())
+        info = parse_file_name(Path(servimax_name(298292, True)), patterns)
+        self.assertEqual((info.numero, info.retencao), (298292, True))
+        info = parse_file_name(Path("nfs 42 - outro (sem retencao).PDF"), patterns)
+        self.assertEqual((info.numero, info.retencao), (42, False))
+        info = parse_file_name(Path("NFS 7.pdf"), patterns)
+        self.assertEqual((info.numero, info.retencao), (7, None))
+        info = parse_file_name(Path("recibo.pdf"), patterns)
+        self.assertEqual((info.numero, info.retencao), (None, None))
+        custom = compile_patterns((r"nota_(?P<numero>\d+)",))
+        self.assertEqual(parse_file_name(Path("nota_015.pdf"), custom).numero, 15)
+
+    def test_non_matching_names_are_filtered_out(self) -> None:
+        files = self.others + self.pdfs
+        selected = prescan(files, PreScanPolicy(numero_min=298010, numero_max=298019))
+        self.assertEqual(selected, self.pdfs[10:20])
+        selected = prescan(files, PreScanPolicy(retencao=True))
+        self.assertEqual(selected, [pdf for index, pdf in enumerate(self.pdfs) if index % 3 == 0])
+        # Sem filtros, nomes fora do padrão continuam na seleção.
+        self.assertEqual(prescan(files, PreScanPolicy()), files)
+
+    def test_largest_first(self) -> None:
+        selected = prescan(self.pdfs, PreScanPolicy(largest_first=True))
+        sizes = [path.stat().st_size for path in selected]
+        self.assertEqual(sorted(selected), sorted(self.pdfs))
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+        memory = [MemoryPDF("a.pdf", b"1"), MemoryPDF("b.pdf", b"333"), MemoryPDF("c.pdf", b"22")]
+        self.assertEqual([pdf.name for pdf in prescan(memory, PreScanPolicy(largest_first=True))],
+                         ["b.pdf", "c.pdf", "a.pdf"])
+
+    def test_invalid_policy(self) -> None:
+        for policy in (PreScanPolicy(shard_index=2, shard_count=2),
+                       PreScanPolicy(shard_count=0),
+                       PreScanPolicy(numero_min=10, numero_max=9),
+                       PreScanPolicy(patterns=("(",), numero_min=1)):
+            with self.subTest(policy=policy), self.assertRaises(ValueError):
+                prescan(self.pdfs, policy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Conversão incremental: ConversionManifest.plan e prune via convert_files."""
+
+import os
+from pathlib import Path
+import tempfile
+import unittest
+
+from services.manifest import MANIFEST_NAME, ConversionManifest
+from tests.doubles import ScriptedConverter, write_pdfs
+
+
+class IncrementalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="nfse_manifest_")
+        self.tmp = Path(self._tmp.name)
+        self.output = self.tmp / "saida"
+        self.pdfs = write_pdfs(self.tmp, ["ok", "ok", "ok"])
+        self.converter = ScriptedConverter()
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def convert(self, pdfs=None):
+        self.converter.convert_files(pdfs or self.pdfs, target_dir=self.output, incremental=True)
+        return self.converter.last_summary
+
+    def xml(self, pdf: Path) -> Path:
+        return self.output / f"{pdf.stem}.xml"
+
+    def test_unchanged_files_are_skipped(self) -> None:
+        first = self.convert()
+        self.assertEqual((first.converted, first.skipped), (3, 0))
+        mtimes = [self.xml(pdf).stat().st_mtime_ns for pdf in self.pdfs]
+
+        second = self.convert()
+        self.assertEqual((second.converted, second.skipped), (0, 3))
+        self.assertEqual(second.outputs, [self.xml(pdf) for pdf in self.pdfs])
+        self.assertEqual([self.xml(pdf).stat().st_mtime_ns for pdf in self.pdfs], mtimes)
+
+    def test_changed_size_or_content_is_reconverted(self) -> None:
+        self.convert()
+        self.pdfs[0].write_bytes(b"ok 700")  # outro tamanho
+        stat = self.pdfs[1].stat()
+        self.pdfs[1].write_bytes(b"ok")  # mesmo tamanho, mtime novo...
+        os.utime(self.pdfs[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        summary = self.convert()
+        # ...mas o mesmo conteúdo: o hash confirma que está atualizado.
+        self.assertEqual((summary.converted, summary.skipped), (1, 2))
+        self.assertIn('Id="NFS700"', self.xml(self.pdfs[0]).read_text(encoding="utf-8"))
+
+        # Mesmo tamanho e conteúdo diferente: o hash não confere.
+        self.pdfs[1].write_bytes(b"OK")
+        os.utime(self.pdfs[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+        self.assertEqual(self.convert().converted, 1)
+
+    def test_pipeline_version_change_invalidates_entries(self) -> None:
+        self.convert()
+        self.converter.parser.VERSION = "versao-nova"
+        summary = self.convert()
+        self.assertEqual((summary.converted, summary.skipped), (3, 0))
+        entries = ConversionManifest.load(self.output).entries
+        self.assertTrue(all("versao-nova" in entry["pipeline"] for entry in entries.values()))
+
+    def test_xml_of_deleted_pdf_is_pruned(self) -> None:
+        self.convert()
+        other = self.output / "anotacoes.xml"
+        other.write_text("<nota/>", encoding="utf-8")
+        removed = self.pdfs.pop(1)
+        removed.unlink()
+
+        summary = self.convert()
+        self.assertEqual(summary.pruned, 1)
+        self.assertFalse(self.xml(removed).exists())
+        self.assertTrue(all(self.xml(pdf).exists() for pdf in self.pdfs))
+        # Só XMLs registrados no manifesto são removidos.
+        self.assertTrue(other.exists())
+        self.assertNotIn(removed.name, ConversionManifest.load(self.output).entries)
+
+    def test_missing_xml_is_reconverted(self) -> None:
+        self.convert()
+        self.xml(self.pdfs[2]).unlink()
+        summary = self.convert()
+        self.assertEqual((summary.converted, summary.skipped), (1, 2))
+        self.assertTrue(self.xml(self.pdfs[2]).exists())
+
+    def test_unreadable_manifest_starts_over(self) -> None:
+        self.convert()
+        (self.output / MANIFEST_NAME).write_text("{", encoding="utf-8")
+        self.assertEqual(self.convert().converted, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""Destinos de saída: zip por PDF e ListaNfse em partes."""
+
+from dataclasses import replace
+import gzip
+from pathlib import Path
+import tempfile
+import unittest
+import zipfile
+
+from services.output_sinks import ZIP_DATE_TIME, RollingListaNfseWriter, ZipArchiveSink
+from services.xml_builder import AbrasfXmlBuilder
+from services.xml_writer import XML_DECLARATION
+from tests.doubles import NOTE
+
+BUILDER = AbrasfXmlBuilder()
+FRAGMENTS = [BUILDER.build_comp_nfse_bytes(replace(NOTE, numero=str(100 + i))) for i in range(5)]
+
+
+def document(fragments) -> bytes:
+    if not fragments:
+        return XML_DECLARATION + b"<ListaNfse />"
+    return XML_DECLARATION + b"<ListaNfse>" + b"".join(fragments) + b"</ListaNfse>"
+
+
+class SinkTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="nfse_sink_")
+        self.dir = Path(self._tmp.name)
+        self.target = self.dir / "lote.xml"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def names(self) -> list:
+        return sorted(path.name for path in self.dir.iterdir())
+
+
+class ZipArchiveSinkTest(SinkTestCase):
+    def write(self, target: Path) -> None:
+        with ZipArchiveSink(target) as sink:
+            sink.write_bytes(FRAGMENTS[0], source=Path("a.pdf"))
+            sink.write_bytes(FRAGMENTS[1], source=Path("a.pdf"))
+            sink.write_bytes(FRAGMENTS[2], source=Path("b.pdf"), group="11222333000181")
+            sink.write_bytes(FRAGMENTS[3], source=Path("a.pdf"))
+
+    def test_members(self) -> None:
+        self.write(self.dir / "lote.zip")
+        with zipfile.ZipFile(self.dir / "lote.zip") as archive:
+            self.assertEqual(archive.namelist(), ["a.xml", "11222333000181/b.xml", "a_2.xml"])
+            self.assertEqual(archive.read("a.xml"), document(FRAGMENTS[:2]))
+            self.assertEqual(archive.read("a_2.xml"), document(FRAGMENTS[3:4]))
+            self.assertTrue(all(info.date_time == ZIP_DATE_TIME for info in archive.infolist()))
+
+    def test_identical_runs_produce_identical_archives(self) -> None:
+        self.write(self.dir / "um.zip")
+        self.write(self.dir / "dois.zip")
+        self.assertEqual((self.dir / "um.zip").read_bytes(), (self.dir / "dois.zip").read_bytes())
+
+
+class RollingListaNfseWriterTest(SinkTestCase):
+    def write(self, fragments, group=None, **limits) -> RollingListaNfseWriter:
+        with RollingListaNfseWriter(self.target, **limits) as sink:
+            for fragment in fragments:
+                sink.write_bytes(fragment, group)
+        return sink
+
+    def test_part_naming(self) -> None:
+        sink = self.write(FRAGMENTS, max_notes=2)
+        self.assertEqual(self.names(), ["lote_0001.xml", "lote_0002.xml", "lote_0003.xml"])
+        self.assertEqual(sink.outputs, [self.dir / name for name in self.names()])
+        self.assertEqual((self.dir / "lote_0003.xml").read_bytes(), document(FRAGMENTS[4:]))
+        self.assertEqual(sink.part_path("11222333000181", 2), self.dir / "lote_11222333000181_0002.xml")
+
+    def test_without_limits_writes_target(self) -> None:
+        self.write(FRAGMENTS)
+        self.assertEqual(self.names(), ["lote.xml"])
+        self.assertEqual(self.target.read_bytes(), document(FRAGMENTS))
+
+    def test_byte_limit_and_gzip(self) -> None:
+        limit = len(document(FRAGMENTS[:2]))
+        first = self.write(FRAGMENTS, max_bytes=limit, compresslevel=6)
+        self.assertEqual(self.names(), ["lote_0001.xml.gz", "lote_0002.xml.gz", "lote_0003.xml.gz"])
+        contents = [gzip.decompress(path.read_bytes()) for path in first.outputs]
+        self.assertEqual(contents, [document(FRAGMENTS[:2]), document(FRAGMENTS[2:4]), document(FRAGMENTS[4:])])
+        before = [path.read_bytes() for path in first.outputs]
+        self.write(FRAGMENTS, max_bytes=limit, compresslevel=6)
+        self.assertEqual([path.read_bytes() for path in first.outputs], before)
+
+    def test_stale_parts_are_removed_only_after_commit(self) -> None:
+        self.write(FRAGMENTS, max_notes=2)
+        with RollingListaNfseWriter(self.target, max_notes=2) as sink:
+            sink.write_bytes(FRAGMENTS[0])
+            # Antes do commit a execução anterior continua inteira.
+            published = [name for name in self.names() if not name.startswith(".")]
+            self.assertEqual(published, ["lote_0001.xml", "lote_0002.xml", "lote_0003.xml"])
+            self.assertEqual((self.dir / "lote_0001.xml").read_bytes(), document(FRAGMENTS[:2]))
+        self.assertEqual(self.names(), ["lote_0001.xml"])
+        self.assertEqual((self.dir / "lote_0001.xml").read_bytes(), document(FRAGMENTS[:1]))
+
+    def test_failed_run_keeps_previous_parts(self) -> None:
+        self.write(FRAGMENTS, max_notes=2)
+        before = {name: (self.dir / name).read_bytes() for name in self.names()}
+        with self.assertRaises(RuntimeError):
+            with RollingListaNfseWriter(self.target, max_notes=1) as sink:
+                for fragment in FRAGMENTS:
+                    sink.write_bytes(fragment)
+                raise RuntimeError("falha no meio do lote")
+        self.assertEqual({name: (self.dir / name).read_bytes() for name in self.names()}, before)
+
+    def test_switching_rolling_on_and_off(self) -> None:
+        self.write(FRAGMENTS, max_notes=2)
+        self.write(FRAGMENTS)
+        self.assertEqual(self.names(), ["lote.xml"])
+        self.write(FRAGMENTS, max_notes=4)
+        self.assertEqual(self.names(), ["lote_0001.xml", "lote_0002.xml"])
+
+
+if __name__ == "__main__":
+    unittest.main()
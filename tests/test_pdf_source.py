@@ -0,0 +1,104 @@
+"""Origens de PDF: arquivos mapeados em memória e membros de zip."""
+
+from dataclasses import replace
+import hashlib
+import mmap
+from pathlib import Path
+import tempfile
+import unittest
+import zipfile
+
+from services.pdf_source import BufferReader, list_zip_pdfs, open_pdf, source_sha256
+
+STORED = b"%PDF-1.4\n" + bytes(range(256)) * 64 + b"\n%%EOF\n"
+DEFLATED = b"%PDF-1.4\n" + b"conteudo comprimido " * 2000 + b"\n%%EOF\n"
+
+
+class PDFSourceTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory(prefix="nfse_source_")
+        self.dir = Path(self._tmp.name)
+        self.archive = self.dir / "lote.zip"
+        with zipfile.ZipFile(self.archive, "w") as archive:
+            archive.writestr("armazenado.pdf", STORED, compress_type=zipfile.ZIP_STORED)
+            archive.writestr("sub/comprimido.PDF", DEFLATED, compress_type=zipfile.ZIP_DEFLATED)
+            archive.writestr("leia-me.txt", b"ignorado")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def members(self):
+        return {member.member: member for member in list_zip_pdfs(self.archive)}
+
+    def test_lists_only_pdf_members(self) -> None:
+        self.assertEqual(set(self.members()), {"armazenado.pdf", "sub/comprimido.PDF"})
+
+    def test_stored_member_is_read_from_the_mapped_archive(self) -> None:
+        member = self.members()["armazenado.pdf"]
+        self.assertEqual(member.compress_type, zipfile.ZIP_STORED)
+        with open_pdf(member) as fp:
+            self.assertIsInstance(fp, BufferReader)
+            self.assertEqual(fp.read(8), STORED[:8])
+            fp.seek(-7, 2)
+            self.assertEqual(fp.read(), STORED[-7:])
+            fp.seek(0)
+            self.assertEqual(fp.read(), STORED)
+        self.assertEqual(source_sha256(member), hashlib.sha256(STORED).hexdigest())
+
+    def test_deflated_member_is_decompressed(self) -> None:
+        member = self.members()["sub/comprimido.PDF"]
+        self.assertEqual(member.compress_type, zipfile.ZIP_DEFLATED)
+        with open_pdf(member) as fp:
+            self.assertEqual(fp.read(), DEFLATED)
+        self.assertEqual(source_sha256(member), hashlib.sha256(DEFLATED).hexdigest())
+
+    def test_bad_crc_is_rejected(self) -> None:
+        for member in self.members().values():
+            with self.subTest(member=member.member):
+                with self.assertRaisesRegex(zipfile.BadZipFile, "CRC invalido"):
+                    with open_pdf(replace(member, crc=member.crc ^ 1)):
+                        self.fail("o membro corrompido nao deveria ser aberto")
+
+    def test_corrupted_stored_data_is_rejected(self) -> None:
+        data = bytearray(self.archive.read_bytes())
+        data[data.index(STORED) + 100] ^= 0xFF
+        self.archive.write_bytes(bytes(data))
+        member = self.members()["armazenado.pdf"]
+        with self.assertRaises(zipfile.BadZipFile):
+            with open_pdf(member):
+                pass
+
+    def test_bad_local_header_is_rejected(self) -> None:
+        member = self.members()["armazenado.pdf"]
+        with self.assertRaisesRegex(zipfile.BadZipFile, "Cabecalho local invalido"):
+            with open_pdf(replace(member, offset=member.offset + 1)):
+                pass
+
+    def test_path_is_read_through_mmap(self) -> None:
+        path = self.dir / "nota.pdf"
+        path.write_bytes(STORED)
+        with open_pdf(path) as fp:
+            self.assertIsInstance(fp, BufferReader)
+            self.assertEqual(fp.read(), STORED)
+        self.assertEqual(source_sha256(path), hashlib.sha256(STORED).hexdigest())
+
+    def test_mmap_can_be_closed_after_reader_close(self) -> None:
+        path = self.dir / "nota.pdf"
+        path.write_bytes(STORED)
+        for name, view in (("mmap", lambda mapped: mapped),
+                           ("fatia", lambda mapped: memoryview(mapped)[10:200])):
+            with self.subTest(buffer=name), open(path, "rb") as handle:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                reader = BufferReader(view(mapped))
+                reader.read(16)
+                buffer = bytearray(8)
+                reader.readinto(buffer)
+                hashlib.sha256(reader.getbuffer()).hexdigest()
+                reader.close()
+                mapped.close()  # BufferError se alguma visão continuasse exportada
+                self.assertTrue(mapped.closed)
+                self.assertTrue(reader.closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
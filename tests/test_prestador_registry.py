@@ -0,0 +1,66 @@
+"""Cadastro de prestadores: detecção do emissor e substituição no cadastro."""
+
+from dataclasses import replace
+import unittest
+
+from models.nfse import DEFAULT_PRESTADOR
+from services.prestador_registry import PrestadorRegistry, RegistryParser
+
+OTHER = replace(DEFAULT_PRESTADOR, cnpj="11222333000181", inscricao_municipal="99887", razao_social="ACME LTDA")
+
+
+def document(cnpj: str = "", inscricao: str = "", prefix: str = "") -> str:
+    return (
+        f"{prefix}Dados do Prestador de Serviços\nCNPJ: {cnpj}\nInscrição Municipal: {inscricao}\n"
+        "Dados do Tomador de Serviços\nCNPJ: 58.149.782/0001-05\n"
+    )
+
+
+class DetectTest(unittest.TestCase):
+    def test_detects_by_cnpj_then_inscricao(self) -> None:
+        registry = PrestadorRegistry([OTHER], default=DEFAULT_PRESTADOR)
+        self.assertIs(registry.detect(document(cnpj="11.222.333/0001-81")), OTHER)
+        self.assertIs(registry.detect(document(inscricao="99.887")), OTHER)
+        # O CNPJ do tomador não conta: sem emissor reconhecido vale o padrão.
+        self.assertIs(registry.detect(document(cnpj="00.000.000/0000-00")), DEFAULT_PRESTADOR)
+        self.assertIsNone(PrestadorRegistry([OTHER]).detect(document()))
+
+    def test_lowercase_changing_length_before_section(self) -> None:
+        # "İ" vira dois caracteres em minúsculas e deslocaria o trecho.
+        registry = PrestadorRegistry([OTHER], default=DEFAULT_PRESTADOR)
+        self.assertIs(registry.detect(document(cnpj="11.222.333/0001-81", prefix="İ" * 20)), OTHER)
+
+    def test_replace_with_new_inscricao(self) -> None:
+        registry = PrestadorRegistry([OTHER])
+        updated = replace(OTHER, inscricao_municipal="55555", razao_social="ACME NOVA LTDA")
+        registry.register(updated)
+        self.assertIs(registry.detect(document(inscricao="55555")), updated)
+        self.assertIs(registry.detect(document(cnpj="11222333000181")), updated)
+        # A inscrição antiga não leva mais ao cadastro substituído.
+        self.assertIsNone(registry.detect(document(inscricao="99887")))
+        self.assertEqual(registry.prestadores, [updated])
+
+    def test_replace_keeps_inscricao_of_other_prestador(self) -> None:
+        # Outro CNPJ com a mesma inscrição ficou com ela no índice.
+        sibling = replace(OTHER, cnpj="44555666000199", razao_social="ACME FILIAL")
+        registry = PrestadorRegistry([OTHER, sibling])
+        registry.register(replace(OTHER, inscricao_municipal="55555"))
+        self.assertIs(registry.detect(document(inscricao="99887")), sibling)
+
+
+class RegistryParserTest(unittest.TestCase):
+    def test_replaced_prestador_gets_new_parser(self) -> None:
+        registry = PrestadorRegistry([OTHER])
+        parser = RegistryParser(registry)
+        content = document(cnpj="11.222.333/0001-81")
+        first = parser._parser_for(registry.detect(content))
+        version = parser.VERSION
+        registry.register(replace(OTHER, razao_social="ACME NOVA LTDA"))
+        second = parser._parser_for(registry.detect(content))
+        self.assertIsNot(first, second)
+        self.assertEqual(second.prestador.razao_social, "ACME NOVA LTDA")
+        self.assertNotEqual(parser.VERSION, version)
+
+
+if __name__ == "__main__":
+    unittest.main()
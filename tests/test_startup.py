@@ -0,0 +1,64 @@
+"""Inicialização leve do ponto de entrada (ver benchmarks/startup.py).
+
+Importar extrator_pdf não pode carregar as dependências pesadas; elas só
+entram no primeiro uso. O import roda em um interpretador novo para que os
+módulos já carregados pelos outros testes não interfiram.
+"""
+
+from pathlib import Path
+import subprocess
+import sys
+import unittest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_MODULE = "extrator_pdf"
+DEFERRED_MODULES = (
+    "tkinter",
+    "pdfminer",
+    "lxml",
+    "pyarrow",
+    "asyncio",
+    "sqlite3",
+    "concurrent.futures",
+    "xml.etree.ElementTree",
+    "argparse",
+)
+# Bem acima dos ~60 ms medidos: pega regressões grosseiras sem depender da
+# máquina. O limite fino (150 ms) fica em benchmarks/startup.py.
+BUDGET_MS = 500.0
+
+
+def import_in_subprocess(module: str) -> subprocess.CompletedProcess:
+    code = (
+        f"import sys, {module}\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+
+
+def cumulative_ms(stderr: str, module: str) -> float:
+    for line in stderr.splitlines():
+        # Formato: "import time:  self [us] | cumulative | imported package"
+        fields = [field.strip() for field in line[len("import time:"):].split("|")]
+        if line.startswith("import time:") and len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise AssertionError(f"Tempo de importacao de {module} nao encontrado")
+
+
+class StartupTest(unittest.TestCase):
+    def test_heavy_modules_are_deferred(self) -> None:
+        result = import_in_subprocess(ENTRY_MODULE)
+        loaded = [name for name in result.stdout.strip().split(",") if name]
+        self.assertEqual(loaded, [], f"Importados antes do primeiro uso: {', '.join(loaded)}")
+
+    def test_import_time_budget(self) -> None:
+        best = min(cumulative_ms(import_in_subprocess(ENTRY_MODULE).stderr, ENTRY_MODULE) for _ in range(3))
+        self.assertLess(best, BUDGET_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
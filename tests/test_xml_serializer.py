@@ -0,0 +1,119 @@
+"""Equivalência entre build_comp_nfse_bytes e a serialização por ElementTree.
+
+O caminho por bytes monta o CompNfse direto de templates; a referência é o
+ElementTree de build_comp_nfse. Os dois precisam produzir exatamente os
+mesmos bytes, no fragmento isolado e no ListaNfse completo.
+"""
+
+from dataclasses import replace
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from models.nfse import DEFAULT_PRESTADOR, NFSeData, ValoresServico
+from services.xml_builder import AbrasfXmlBuilder
+from services.xml_writer import ListaNfseWriter
+
+CORPUS = Path(__file__).resolve().parent.parent / "pdf"
+
+BASE = NFSeData(
+    numero="298292",
+    codigo_verificacao="AbC123",
+    data_emissao=datetime(2024, 1, 31, 23, 59, 58),
+    valores=ValoresServico(1347.42, 8.76, 40.42, 13.47, 20.21, 0.0, 67.37),
+    prestador=DEFAULT_PRESTADOR,
+)
+OTHER_PRESTADOR = replace(
+    DEFAULT_PRESTADOR,
+    cnpj="11222333000181",
+    razao_social='ACME & FILHOS <"LTDA">',
+    complemento="",
+    bairro="SÃO JOSÉ\tCENTRO",
+)
+
+# Nome do caso -> nota; cada uma exercita um detalhe do serializador.
+EDGE_CASES = {
+    "base": BASE,
+    "outro prestador": replace(BASE, prestador=OTHER_PRESTADOR),
+    "escape no texto": replace(BASE, discriminacao='a & b < c > d "e" \'f\''),
+    "escape no atributo Id": replace(BASE, numero='1"2\r\n3\t<&>'),
+    "campos opcionais vazios": replace(BASE, codigo_verificacao="", discriminacao="", serie_rps=""),
+    "prestador com campos vazios": replace(
+        BASE, prestador=replace(DEFAULT_PRESTADOR, inscricao_municipal="", complemento="", numero="")
+    ),
+    "nao ASCII": replace(BASE, discriminacao="Serviços de logística — São Paulo ç ã é ü 😀"),
+    "valores zerados": replace(BASE, valores=ValoresServico(), natureza_operacao="2"),
+    "valores com arredondamento": replace(
+        BASE, valores=ValoresServico(0.005, 1.015, 2.675, 1e9, 0.1 + 0.2, 99999.995, 3.0)
+    ),
+}
+
+
+def element_bytes(builder: AbrasfXmlBuilder, note: NFSeData) -> bytes:
+    buffer = BytesIO()
+    ET.ElementTree(builder.build_comp_nfse(note)).write(buffer, encoding="utf-8")
+    return buffer.getvalue()
+
+
+def load_corpus() -> list:
+    try:
+        from services.parser import ServimaxParser
+        from services.pdf_reader import PDFInvoiceReader
+    except ImportError:
+        return []
+    reader = PDFInvoiceReader()
+    parser = ServimaxParser(DEFAULT_PRESTADOR)
+    return [parser.parse(reader.read_text(pdf)) for pdf in sorted(CORPUS.glob("*.pdf"))]
+
+
+class BytesSerializerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.builder = AbrasfXmlBuilder()
+        cls.corpus = load_corpus()
+
+    def assertSameBytes(self, note: NFSeData) -> None:
+        self.assertEqual(self.builder.build_comp_nfse_bytes(note), element_bytes(self.builder, note))
+
+    def test_edge_cases(self) -> None:
+        for name, note in EDGE_CASES.items():
+            with self.subTest(name):
+                self.assertSameBytes(note)
+
+    def test_corpus(self) -> None:
+        if not self.corpus:
+            self.skipTest(f"Nenhum PDF legivel em {CORPUS}")
+        for note in self.corpus:
+            with self.subTest(note.numero):
+                self.assertSameBytes(note)
+
+    def test_cached_prestador_tail_follows_prestador(self) -> None:
+        # O trecho final (prestador e discriminação) é reaproveitado entre notas; alternar
+        # prestadores não pode vazar o trecho de um para o outro.
+        notes = [BASE, EDGE_CASES["outro prestador"], BASE, EDGE_CASES["outro prestador"]]
+        for note in notes:
+            self.assertSameBytes(note)
+
+    def test_lista_nfse_document(self) -> None:
+        notes = self.corpus + list(EDGE_CASES.values())
+        with tempfile.TemporaryDirectory(prefix="nfse_xml_") as tmp:
+            by_element, by_bytes = Path(tmp) / "a.xml", Path(tmp) / "b.xml"
+            with ListaNfseWriter(by_element) as writer:
+                for note in notes:
+                    writer.write(self.builder.build_comp_nfse(note))
+            with ListaNfseWriter(by_bytes) as writer:
+                for note in notes:
+                    writer.write_bytes(self.builder.build_comp_nfse_bytes(note))
+            root = ET.Element("ListaNfse")
+            root.extend(self.builder.build_comp_nfse(note) for note in notes)
+            buffer = BytesIO()
+            ET.ElementTree(root).write(buffer, encoding="utf-8", xml_declaration=True)
+            self.assertEqual(by_bytes.read_bytes(), buffer.getvalue())
+            self.assertEqual(by_element.read_bytes(), buffer.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
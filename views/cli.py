@@ -1,5 +1,19 @@
+import argparse
 from pathlib import Path
-from typing import Optional
+import signal
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+from controllers.converter import NFSeConverter
+from models.conversion import DuplicatePolicy, FaultPolicy, PreScanPolicy, ProfilePolicy, ValidationPolicy
+from services.batch_export import export_batch, write_totals_csv
+from services.metrics import MetricsCollector
+from services.output_sinks import RollingListaNfseWriter, ZipArchiveSink
+from services.pdf_source import PDFSource
+from services.spool_watcher import FAILED_DIR, SpoolWatcher
+from services.text_cache import DEFAULT_MAX_BYTES
+from services.xml_writer import OutputSink
 
 
 class DirectorySelector:
@@ -30,3 +44,327 @@ class ConsoleView:
 
     def error(self, message: str) -> None:
         print(f"ERRO: {message}")
+
+
+class CommandLineInterface:
+    """Interface de linha de comando não interativa para servidores.
+
+    Recebe uma fábrica de conversores (mesma assinatura de
+    extrator_pdf.create_converter) para não depender da montagem do pipeline.
+    """
+    def __init__(self, converter_factory: Callable[..., NFSeConverter], console: Optional[ConsoleView] = None) -> None:
+        self.converter_factory = converter_factory
+        self.console = console or ConsoleView()
+
+    def build_parser(self) -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(
+            prog="extrator_pdf.py",
+            description="Converte PDFs de NFSe ServiMax para XML ABRASF.",
+        )
+        parser.add_argument("input", type=Path,
+                            help="Pasta com os PDFs, arquivo .zip com PDFs (ou pasta spool com --watch)")
+        parser.add_argument("-o", "--output", type=Path,
+                            help="Pasta dos XMLs (por arquivo) ou arquivo/pasta do XML consolidado")
+        parser.add_argument("-c", "--consolidated", action="store_true",
+                            help="Gera um único ListaNfse em vez de um XML por PDF")
+        parser.add_argument("-w", "--workers", type=int, default=1, help="Processos paralelos")
+        parser.add_argument("--cache", help="Arquivo SQLite do cache de texto extraído")
+        parser.add_argument("--cache-max-bytes", type=int, default=DEFAULT_MAX_BYTES,
+                            help="Tamanho máximo do cache de texto; os itens menos usados são descartados")
+        parser.add_argument("--incremental", action="store_true",
+                            help="Reconverte apenas PDFs novos ou alterados (modo por arquivo)")
+        parser.add_argument("--fast", action="store_true", help="Leitura rápida da primeira página")
+        parser.add_argument("--fault-tolerant", action="store_true",
+                            help="Continua após falhas e grava relatório de erros")
+        parser.add_argument("--retries", type=int, default=0, help="Novas tentativas por PDF com falha")
+        parser.add_argument("--timeout", type=float, help="Limite em segundos por tentativa")
+        parser.add_argument("--metrics", help="Arquivo de métricas (.prom = Prometheus, senão JSON)")
+        parser.add_argument("--prestadores",
+                            help="JSON com os prestadores emissores (identificados pelo CNPJ no PDF)")
+        parser.add_argument("--group-by-prestador", action="store_true",
+                            help="Separa a saída por CNPJ do prestador")
+        parser.add_argument("--multi-note", action="store_true",
+                            help="PDFs com várias notas concatenadas, lidos página a página")
+        parser.add_argument("--duplicate-index", type=Path,
+                            help="Arquivo SQLite com os PDFs e notas já convertidos")
+        parser.add_argument("--duplicates", choices=("dedupe", "skip", "report"), default="dedupe",
+                            help="Com --duplicate-index: remove as notas repetidas (dedupe), "
+                                 "ignora o PDF inteiro (skip) ou só relata (report)")
+        sink = parser.add_argument_group("formato da saída")
+        sink.add_argument("--zip", action="store_true",
+                          help="Grava os XMLs por PDF dentro de um único zip (-o: arquivo .zip ou PASTA -> PASTA.zip)")
+        sink.add_argument("--split-notes", type=int, help="Com -c: inicia um novo ListaNfse a cada N notas")
+        sink.add_argument("--split-mb", type=float, help="Com -c: inicia um novo ListaNfse antes de passar de M MB")
+        sink.add_argument("--gzip", action="store_true", help="Com -c: grava o consolidado (ou as partes) em gzip")
+        prescan = parser.add_argument_group("pré-seleção pelo nome do arquivo (sem ler os PDFs)")
+        prescan.add_argument("--name-pattern", action="append", default=[],
+                             help="Regex do nome com os grupos numero e retencao (COM/SEM); pode repetir")
+        prescan.add_argument("--numero-min", type=int, help="Menor número de nota")
+        prescan.add_argument("--numero-max", type=int, help="Maior número de nota")
+        prescan.add_argument("--retencao", choices=("com", "sem"), help="Só notas com ou sem retenção")
+        prescan.add_argument("--shard", help="Converte só a parte I de N da pasta (formato I/N, I a partir de 0)")
+        prescan.add_argument("--largest-first", action="store_true", help="Agenda primeiro os PDFs maiores")
+        profile = parser.add_argument_group("perfilamento (diagnóstico de lentidão)")
+        profile.add_argument("--profile", type=Path,
+                             help="Pasta dos relatórios cProfile por PDF e etapa e do outliers.json")
+        profile.add_argument("--profile-top", type=int, default=20, help="Funções listadas por etapa")
+        profile.add_argument("--outlier-factor", type=float, default=3.0,
+                             help="Destaca PDFs com leitura acima de K vezes a mediana do lote")
+        validation = parser.add_argument_group("validação XSD (requer lxml)")
+        validation.add_argument("--validate", choices=("full", "sample"),
+                                help="Valida as notas geradas contra o XSD: todas (full) ou uma amostra (sample)")
+        validation.add_argument("--sample-rate", type=float,
+                                help="Com --validate sample: fração das notas validadas (padrão 0.05)")
+        validation.add_argument("--schema", type=Path, help="XSD usado no lugar do esquema incluído")
+        report = parser.add_argument_group("relatórios (sem gerar XML)")
+        report.add_argument("--export", type=Path,
+                            help="Grava uma linha por nota em CSV (ou Parquet se terminar em .parquet)")
+        report.add_argument("--totals", type=Path, help="Grava os totais por competência (mês) em CSV")
+        watch = parser.add_argument_group("modo --watch")
+        watch.add_argument("--watch", action="store_true",
+                           help="Monitora a pasta de entrada e converte PDFs à medida que chegam")
+        watch.add_argument("--batch-size", type=int, default=100, help="Máximo de PDFs por lote")
+        watch.add_argument("--max-latency", type=float, default=5.0,
+                           help="Segundos máximos de espera de um PDF pronto antes do lote sair")
+        watch.add_argument("--poll-interval", type=float, default=1.0, help="Intervalo entre varreduras")
+        return parser
+
+    def run(self, argv: Sequence[str]) -> int:
+        """Executa a CLI e retorna o código de saída do processo."""
+        args = self.build_parser().parse_args(argv)
+        try:
+            converter = self.converter_factory(
+                args.cache, cache_max_bytes=args.cache_max_bytes, fast_extraction=args.fast,
+                prestadores_path=args.prestadores, group_by_prestador=args.group_by_prestador,
+                multi_note=args.multi_note,
+            )
+        except (OSError, ValueError) as exc:
+            self.console.error(str(exc))
+            return 2
+        if args.metrics:
+            export_format = "prometheus" if args.metrics.endswith(".prom") else "json"
+            converter.add_metrics_hook(MetricsCollector(Path(args.metrics), export_format))
+        try:
+            profile_hook = None
+            if args.profile:
+                profile_hook = converter.enable_profiling(ProfilePolicy(
+                    report_dir=args.profile, top=args.profile_top, outlier_factor=args.outlier_factor,
+                ))
+            validation_policy = self._validation_policy(args)
+            if validation_policy is not None:
+                if args.export or args.totals:
+                    raise ValueError("--validate nao pode ser combinado com --export ou --totals")
+                converter.enable_validation(validation_policy)
+            if args.zip and (args.consolidated or args.incremental):
+                raise ValueError("--zip nao pode ser combinado com --consolidated ou --incremental")
+            if (args.split_notes is not None or args.split_mb is not None or args.gzip) and not args.consolidated:
+                raise ValueError("--split-notes, --split-mb e --gzip exigem --consolidated")
+            if args.watch:
+                if args.export or args.totals:
+                    raise ValueError("--export e --totals nao podem ser combinados com --watch")
+                if self._prescan_policy(args) is not None:
+                    raise ValueError("Opcoes de pre-selecao nao podem ser combinadas com --watch")
+                if args.incremental:
+                    # Cada PDF sai do spool ao ser processado; não há o que reaproveitar.
+                    raise ValueError("--incremental nao pode ser combinado com --watch")
+                return self._watch(converter, args)
+            if args.export or args.totals:
+                code = self._export(converter, args)
+            else:
+                code = self._convert_once(converter, args)
+            if profile_hook is not None:
+                for outlier in profile_hook.outliers:
+                    self.console.info(
+                        f"Outlier: {Path(outlier['file']).name} leitura {outlier['read']:.3f}s "
+                        f"({outlier['ratio']:.1f}x a mediana)"
+                    )
+            return code
+        except (FileNotFoundError, ValueError) as exc:
+            self.console.error(str(exc))
+            return 2
+        except Exception as exc:
+            self.console.error(f"{type(exc).__name__}: {exc}")
+            return 1
+
+    def _fault_policy(self, args: argparse.Namespace, report_path: Optional[Path] = None) -> Optional[FaultPolicy]:
+        if not (args.fault_tolerant or args.watch):
+            return None
+        return FaultPolicy(retries=args.retries, timeout=args.timeout, report_path=report_path)
+
+    def _validation_policy(self, args: argparse.Namespace) -> Optional[ValidationPolicy]:
+        if args.validate is None:
+            if args.sample_rate is not None or args.schema is not None:
+                raise ValueError("--sample-rate e --schema exigem --validate")
+            return None
+        if args.sample_rate is not None and args.validate != ValidationPolicy.SAMPLE:
+            raise ValueError("--sample-rate exige --validate sample")
+        options = {"sample_rate": args.sample_rate} if args.sample_rate is not None else {}
+        return ValidationPolicy(mode=args.validate, schema_path=args.schema, **options)
+
+    def _prescan_policy(self, args: argparse.Namespace) -> Optional[PreScanPolicy]:
+        shard_index, shard_count = 0, 1
+        if args.shard:
+            try:
+                shard_index, shard_count = (int(part) for part in args.shard.split("/"))
+            except ValueError:
+                raise ValueError(f"Parte invalida: {args.shard} (use I/N)") from None
+        policy = PreScanPolicy(
+            patterns=tuple(args.name_pattern),
+            numero_min=args.numero_min,
+            numero_max=args.numero_max,
+            retencao=None if args.retencao is None else args.retencao == "com",
+            shard_index=shard_index,
+            shard_count=shard_count,
+            largest_first=args.largest_first,
+        )
+        return policy if policy.filters or policy.largest_first or policy.patterns else None
+
+    def _list_pdfs(self, converter: NFSeConverter, args: argparse.Namespace) -> List[PDFSource]:
+        pdf_files = converter.list_pdfs(args.input, args.incremental)
+        policy = self._prescan_policy(args)
+        if policy is None:
+            return pdf_files
+        selected = converter.select_pdfs(pdf_files, policy, args.incremental)
+        self.console.info(f"Pre-selecao: {len(selected)} de {len(pdf_files)} PDF(s)")
+        return selected
+
+    def _duplicate_policy(
+        self, args: argparse.Namespace, report_path: Optional[Path] = None
+    ) -> Optional[DuplicatePolicy]:
+        if args.duplicate_index is None:
+            return None
+        return DuplicatePolicy(index_path=args.duplicate_index, action=args.duplicates, report_path=report_path)
+
+    def _output_sink(self, args: argparse.Namespace, target: Path) -> Optional[OutputSink]:
+        """Destino de --zip ou de --split-notes/--split-mb/--gzip; None = saída padrão."""
+        if args.zip:
+            return ZipArchiveSink(target)
+        if args.split_notes is None and args.split_mb is None and not args.gzip:
+            return None
+        return RollingListaNfseWriter(
+            target, max_notes=args.split_notes,
+            max_bytes=None if args.split_mb is None else int(args.split_mb * 1024 * 1024),
+            compresslevel=6 if args.gzip else None,
+        )
+
+    def _convert_once(self, converter: NFSeConverter, args: argparse.Namespace) -> int:
+        pdf_files = self._list_pdfs(converter, args)
+        start = time.perf_counter()
+        fault_policy = self._fault_policy(args)
+        duplicate_policy = self._duplicate_policy(args)
+        if args.consolidated:
+            output = args.output
+            if output is None:
+                output = converter.default_target_dir(args.input)
+                output.mkdir(exist_ok=True)
+            sink = self._output_sink(args, converter.resolve_output_path(output))
+            destination = {"output_path": output} if sink is None else {"output_sink": sink}
+            outputs = converter.convert_files(
+                pdf_files, workers=args.workers,
+                fault_policy=fault_policy, duplicate_policy=duplicate_policy, **destination,
+            )
+        elif args.zip:
+            target = args.output
+            if target is None or target.suffix.lower() != ".zip":
+                target = (target or converter.default_target_dir(args.input)).with_suffix(".zip")
+            outputs = converter.convert_files(
+                pdf_files, output_sink=self._output_sink(args, target), workers=args.workers,
+                fault_policy=fault_policy, duplicate_policy=duplicate_policy,
+            )
+        else:
+            outputs = converter.convert_files(
+                pdf_files, target_dir=args.output or converter.default_target_dir(args.input),
+                workers=args.workers, incremental=args.incremental,
+                fault_policy=fault_policy, duplicate_policy=duplicate_policy,
+            )
+        summary = converter.last_summary
+        elapsed = time.perf_counter() - start
+        self.console.info(
+            f"{summary.converted} convertido(s), {summary.skipped} atualizado(s), "
+            f"{len(summary.failures)} falha(s) em {elapsed:.2f}s; saida: {len(outputs)} XML(s)"
+        )
+        if summary.duplicates:
+            self.console.info(f"{len(summary.duplicates)} duplicata(s) encontrada(s)")
+        if converter.validation_policy is not None:
+            self.console.info(f"{summary.validated} nota(s) validada(s) no XSD")
+        for failure in summary.failures:
+            self.console.error(f"{failure.pdf_path.name} [{failure.stage}] {failure.exception}: {failure.message}")
+        return 1 if summary.failures else 0
+
+    def _export(self, converter: NFSeConverter, args: argparse.Namespace) -> int:
+        pdf_files = self._list_pdfs(converter, args)
+        start = time.perf_counter()
+        batch = converter.extract_batch(pdf_files, workers=args.workers, fault_policy=self._fault_policy(args))
+        if args.export:
+            export_batch(batch, args.export)
+        if args.totals:
+            write_totals_csv(batch.totals_by_competencia(), args.totals)
+        summary = converter.last_summary
+        self.console.info(
+            f"{len(batch)} nota(s) de {len(pdf_files) - len(summary.failures)} PDF(s), "
+            f"{len(summary.failures)} falha(s) em {time.perf_counter() - start:.2f}s"
+        )
+        for failure in summary.failures:
+            self.console.error(f"{failure.pdf_path.name} [{failure.stage}] {failure.exception}: {failure.message}")
+        return 1 if summary.failures else 0
+
+    def _watch(self, converter: NFSeConverter, args: argparse.Namespace) -> int:
+        spool = args.input
+        if not spool.is_dir():
+            raise FileNotFoundError(f"Pasta de spool nao encontrada: {spool}")
+        output_dir = args.output or spool / "PDF_Convertido"
+        batch_number = 0
+
+        def handle(batch: List[Path]) -> List[Path]:
+            nonlocal batch_number
+            batch_number += 1
+            name = f"lote_{time.strftime('%Y%m%d_%H%M%S')}_{batch_number:05d}"
+            fault_policy = self._fault_policy(args, report_path=spool / FAILED_DIR / f"{name}_erros.json")
+            duplicate_policy = self._duplicate_policy(args, report_path=spool / FAILED_DIR / f"{name}_duplicadas.json")
+            start = time.perf_counter()
+            try:
+                if args.consolidated or args.zip:
+                    target = output_dir / (f"{name}.zip" if args.zip else f"{name}.xml")
+                    sink = self._output_sink(args, target)
+                    destination = {"output_path": target} if sink is None else {"output_sink": sink}
+                    converter.convert_files(
+                        batch, workers=args.workers,
+                        fault_policy=fault_policy, duplicate_policy=duplicate_policy, **destination,
+                    )
+                else:
+                    converter.convert_files(
+                        batch, target_dir=output_dir, workers=args.workers,
+                        fault_policy=fault_policy, duplicate_policy=duplicate_policy,
+                    )
+            except Exception as exc:
+                # Erro fora do isolamento por arquivo (ex.: disco cheio): o
+                # lote inteiro vai para a pasta de erros e o monitoramento segue.
+                self.console.error(f"{name}: {type(exc).__name__}: {exc}")
+                return batch
+            failures = converter.last_summary.failures
+            self.console.info(
+                f"{name}: {len(batch) - len(failures)}/{len(batch)} PDF(s) em "
+                f"{time.perf_counter() - start:.2f}s"
+            )
+            for failure in failures:
+                self.console.error(f"{failure.pdf_path.name} [{failure.stage}] {failure.exception}: {failure.message}")
+            return [failure.pdf_path for failure in failures]
+
+        watcher = SpoolWatcher(
+            spool, handle, batch_size=args.batch_size,
+            max_latency=args.max_latency, poll_interval=args.poll_interval,
+        )
+        stop = threading.Event()
+        previous = signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        self.console.info(f"Monitorando {spool} (Ctrl+C para encerrar)")
+        try:
+            with converter.warm_pool(args.workers):
+                try:
+                    watcher.run(stop)
+                except KeyboardInterrupt:
+                    stop.set()
+                    watcher.poll(flush=True)
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+        return 0
+
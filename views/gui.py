@@ -1,31 +1,64 @@
 """Interface gráfica Tkinter para conversão de NFSe PDF para XML.
 
 Fornece UI simples com seleção de pasta, feedback de progresso em tempo real
-e mensagens de conclusão.
+e mensagens de conclusão. A conversão roda em uma thread auxiliar; o
+progresso de cada PDF chega por uma fila consultada periodicamente com
+window.after, de modo que o Tkinter só é acessado pela thread principal.
 """
 
+import os
+import queue
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
 from pathlib import Path
 from typing import Callable, Optional
 import time
-from threading import Thread
+from threading import Event, Thread
+
+from models.conversion import ConversionSummary, FileMetrics
+from services.metrics import MetricsHook
+
+# Intervalo de consulta da fila de progresso.
+POLL_INTERVAL_MS = 100
+
+
+class _ProgressQueueHook(MetricsHook):
+    """Repassa os eventos da conversão para a fila lida pela interface."""
+    def __init__(self, events: "queue.Queue[tuple]") -> None:
+        self.events = events
+
+    def on_run_start(self, total_files: int) -> None:
+        self.events.put(("start", total_files))
+
+    def on_file(self, metrics: FileMetrics) -> None:
+        self.events.put(("file", metrics))
+
+    def on_run_end(self, summary: ConversionSummary, elapsed: float) -> None:
+        self.events.put(("end", summary))
 
 
 class ConverterGUI:
     """Janela principal da aplicação de conversão de NFSe.
     
     Gerencia interface Tkinter com campo de pasta, botão de seleção,
-    botão de conversão e feedback de tempo/status.
+    opções de processos e de XML consolidado, botões de conversão e de
+    cancelamento, barra de progresso e feedback de tempo/status.
     """
     def __init__(self) -> None:
         self.window = tk.Tk()
         self.window.title("Conversor NFSe - PDF para XML")
-        self.window.geometry("600x300")
+        self.window.geometry("600x420")
         self.window.resizable(False, False)
         
         self.directory_path: Optional[Path] = None
-        self.converter_callback: Optional[Callable[[str], int]] = None
+        self.converter_callback: Optional[Callable[..., int]] = None
+        self._events: "queue.Queue[tuple]" = queue.Queue()
+        self._cancel_event = Event()
+        self._summary: Optional[ConversionSummary] = None
+        self._total = 0
+        self._done = 0
+        self._failed = 0
+        self._start_time = 0.0
         
         self._setup_ui()
         
@@ -61,9 +94,37 @@ class ConverterGUI:
         )
         browse_btn.pack(side=tk.LEFT)
         
-        # Botão converter
+        # Frame de opções
+        options_frame = tk.Frame(main_frame)
+        options_frame.pack(fill=tk.X, pady=5)
+        
+        workers_label = tk.Label(options_frame, text="Processos:", font=("Arial", 10))
+        workers_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.workers_spin = tk.Spinbox(
+            options_frame,
+            from_=1,
+            to=os.cpu_count() or 1,
+            width=4,
+            font=("Arial", 10)
+        )
+        self.workers_spin.pack(side=tk.LEFT, padx=(0, 20))
+        
+        self.consolidated_var = tk.BooleanVar(value=False)
+        self.consolidated_check = tk.Checkbutton(
+            options_frame,
+            text="Gerar um único XML consolidado",
+            variable=self.consolidated_var,
+            font=("Arial", 10)
+        )
+        self.consolidated_check.pack(side=tk.LEFT)
+        
+        # Botões converter e cancelar
+        buttons_frame = tk.Frame(main_frame)
+        buttons_frame.pack(pady=15)
+        
         self.convert_btn = tk.Button(
-            main_frame,
+            buttons_frame,
             text="Converter PDFs para XML",
             command=self._start_conversion,
             font=("Arial", 12, "bold"),
@@ -72,7 +133,22 @@ class ConverterGUI:
             height=2,
             width=25
         )
-        self.convert_btn.pack(pady=20)
+        self.convert_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.cancel_btn = tk.Button(
+            buttons_frame,
+            text="Cancelar",
+            command=self._cancel_conversion,
+            font=("Arial", 12),
+            height=2,
+            width=10,
+            state=tk.DISABLED
+        )
+        self.cancel_btn.pack(side=tk.LEFT)
+        
+        # Barra de progresso
+        self.progress_bar = ttk.Progressbar(main_frame, orient=tk.HORIZONTAL, mode="determinate", length=540)
+        self.progress_bar.pack(pady=(0, 10))
         
         # Label de status
         self.status_label = tk.Label(
@@ -111,61 +187,153 @@ class ConverterGUI:
             messagebox.showerror("Erro", "Callback de conversão não configurado.")
             return
         
-        # Desabilita o botão durante a conversão
-        self.convert_btn.config(state=tk.DISABLED)
+        try:
+            workers = int(self.workers_spin.get())
+        except ValueError:
+            workers = 0
+        if workers < 1:
+            messagebox.showerror("Erro", "Número de processos inválido.")
+            return
+        
+        # Desabilita os controles durante a conversão
+        self._set_running(True)
         self.status_label.config(text="Processando...", fg="orange")
         self.time_label.config(text="")
+        self.progress_bar.config(value=0, maximum=1)
+        self._events = queue.Queue()
+        self._cancel_event = Event()
+        self._summary = None
+        self._total = self._done = self._failed = 0
+        self._start_time = time.perf_counter()
         
         # Executa conversão em thread separada para não travar a UI
-        thread = Thread(target=self._run_conversion)
+        thread = Thread(
+            target=self._run_conversion,
+            args=(self.directory_path, workers, self.consolidated_var.get()),
+        )
         thread.daemon = True
         thread.start()
+        self.window.after(POLL_INTERVAL_MS, self._poll_progress)
     
-    def _run_conversion(self) -> None:
-        start_time = time.time()
-        
+    def _cancel_conversion(self) -> None:
+        # Os PDFs já iniciados terminam; nenhum novo é agendado.
+        self._cancel_event.set()
+        self.cancel_btn.config(state=tk.DISABLED)
+        self.status_label.config(text="Cancelando...", fg="orange")
+    
+    def _run_conversion(self, directory: Path, workers: int, consolidated: bool) -> None:
+        # Roda fora da thread principal: só se comunica pela fila de eventos.
+        options = {
+            "workers": workers,
+            "progress_hook": _ProgressQueueHook(self._events),
+            "cancel_event": self._cancel_event,
+        }
         try:
-            # Chama o callback de conversão
-            count = self.converter_callback(str(self.directory_path))
-            
-            elapsed_time = time.time() - start_time
-            
-            # Atualiza UI na thread principal
-            self.window.after(0, self._show_success, count, elapsed_time)
-            
+            if consolidated:
+                output_dir = directory / "PDF_Convertido"
+                output_dir.mkdir(exist_ok=True)
+                options["saida_xml"] = str(output_dir)
+            count = self.converter_callback(str(directory), **options)
+            self._events.put(("done", count))
         except Exception as exc:
-            elapsed_time = time.time() - start_time
-            self.window.after(0, self._show_error, str(exc), elapsed_time)
+            self._events.put(("error", str(exc)))
+    
+    def _poll_progress(self) -> None:
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            kind = event[0]
+            if kind == "start":
+                self._total = event[1]
+                self.progress_bar.config(maximum=max(1, self._total))
+            elif kind == "file":
+                self._done += 1
+                self._failed += not event[1].ok
+                self._update_progress()
+            elif kind == "end":
+                self._summary = event[1]
+            elif kind == "done":
+                self._show_success(event[1], time.perf_counter() - self._start_time)
+                return
+            else:
+                self._show_error(event[1], time.perf_counter() - self._start_time)
+                return
+        self.window.after(POLL_INTERVAL_MS, self._poll_progress)
+    
+    def _update_progress(self) -> None:
+        elapsed = time.perf_counter() - self._start_time
+        rate = self._done / elapsed if elapsed > 0 else 0.0
+        self.progress_bar.config(value=self._done)
+        text = f"{self._done}/{self._total} PDF(s)"
+        if self._failed:
+            text += f", {self._failed} falha(s)"
+        if not self._cancel_event.is_set():
+            self.status_label.config(text=text, fg="orange")
+        if rate > 0:
+            remaining = max(0, self._total - self._done) / rate
+            minutes, seconds = divmod(int(remaining + 0.5), 60)
+            self.time_label.config(text=f"{rate:.1f} arquivos/s - restante: {minutes:02d}:{seconds:02d}")
+    
+    def _set_running(self, running: bool) -> None:
+        state = tk.DISABLED if running else tk.NORMAL
+        self.convert_btn.config(state=state)
+        self.workers_spin.config(state=state)
+        self.consolidated_check.config(state=state)
+        self.cancel_btn.config(state=tk.NORMAL if running else tk.DISABLED)
+    
+    def _output_location(self) -> Optional[Path]:
+        """Arquivo (um único XML) ou pasta comum dos XMLs gerados."""
+        outputs = self._summary.outputs if self._summary is not None else []
+        if not outputs:
+            return None
+        if len(outputs) == 1:
+            return Path(outputs[0])
+        return Path(os.path.commonpath([str(Path(output).parent) for output in outputs]))
     
     def _show_success(self, count: int, elapsed_time: float) -> None:
-        self.convert_btn.config(state=tk.NORMAL)
+        self._set_running(False)
+        cancelled = self._summary is not None and self._summary.cancelled
         self.status_label.config(
-            text=f"✓ Conversão concluída com sucesso!",
-            fg="green"
+            text="Conversão cancelada" if cancelled else "✓ Conversão concluída com sucesso!",
+            fg="orange" if cancelled else "green"
         )
         self.time_label.config(
             text=f"Tempo de processamento: {elapsed_time:.2f} segundos"
         )
         
-        output_dir = self.directory_path / "PDF_Convertido"
+        location = self._output_location()
+        details = f"XMLs gerados: {count}\nTempo: {elapsed_time:.2f}s"
+        if self._failed:
+            details += f"\nFalhas: {self._failed}"
+        if cancelled:
+            details += f"\nPDFs processados: {self._done} de {self._total}"
+        details += f"\n\nXMLs salvos em:\n{location}" if location else "\n\nNenhum XML gerado."
         messagebox.showinfo(
-            "Conversão Concluída",
-            f"Sucesso!\n\n"
-            f"Arquivos convertidos: {count}\n"
-            f"Tempo: {elapsed_time:.2f}s\n\n"
-            f"XMLs salvos em:\n{output_dir}"
+            "Conversão Cancelada" if cancelled else "Conversão Concluída",
+            details if cancelled else f"Sucesso!\n\n{details}"
         )
     
     def _show_error(self, error_msg: str, elapsed_time: float) -> None:
-        self.convert_btn.config(state=tk.NORMAL)
+        self._set_running(False)
         self.status_label.config(text="✗ Erro na conversão", fg="red")
         self.time_label.config(
             text=f"Tempo até erro: {elapsed_time:.2f} segundos"
         )
         messagebox.showerror("Erro", f"Erro durante a conversão:\n\n{error_msg}")
     
-    def set_converter_callback(self, callback: Callable[[str], int]) -> None:
-        """Define o callback que será executado para converter os PDFs."""
+    def set_converter_callback(self, callback: Callable[..., int]) -> None:
+        """Define o callback que será executado para converter os PDFs.
+
+        O callback é chamado fora da thread principal como
+        callback(pasta, workers=n, progress_hook=hook, cancel_event=evento)
+        e, no modo consolidado, também com saida_xml=pasta de saída. Deve
+        registrar progress_hook (um MetricsHook) no conversor, parar de
+        iniciar PDFs quando cancel_event for sinalizado e retornar a
+        quantidade de XMLs gerados; converter_nfse_servimax segue esse
+        contrato.
+        """
         self.converter_callback = callback
     
     def run(self) -> None:
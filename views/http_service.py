@@ -0,0 +1,278 @@
+"""Serviço HTTP local de conversão de PDFs de NFSe.
+
+Servidor HTTP/1.1 mínimo sobre asyncio (somente biblioteca padrão) que
+atende apenas endereços locais. Rotas:
+
+    POST /convert[?format=xml|json]
+        Corpo: o PDF. Resposta: o CompNfse em XML (ListaNfse quando o PDF
+        tem várias notas) ou a lista de NFSeData em JSON.
+    GET /health
+        Estado do serviço: workers, fila e contadores.
+
+Códigos de erro: 400 (requisição inválida), 404, 405, 411 (sem
+Content-Length), 413 (PDF acima do limite), 422 (PDF não convertido) e 503
+com Retry-After quando a fila está cheia.
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import signal
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from controllers.conversion_service import ConversionFailedError, ConversionService, ServiceBusyError
+from controllers.converter import NFSeConverter
+from services.text_cache import DEFAULT_MAX_BYTES
+from services.xml_writer import XML_DECLARATION
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BODY = 20 * 1024 * 1024
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def check_local_host(host: str) -> None:
+    """Raises ValueError se host não for um endereço de loopback."""
+    if host == "localhost":
+        return
+    try:
+        local = ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        local = False
+    if not local:
+        raise ValueError(f"O servico aceita apenas enderecos locais: {host}")
+
+
+class ConversionHTTPServer:
+    """Atende requisições HTTP e as repassa ao ConversionService.
+
+    Args:
+        service: Serviço de conversão já iniciado
+        host: Endereço local de escuta
+        port: Porta (0 = escolhida pelo sistema)
+        max_body: Tamanho máximo do PDF em bytes
+    """
+    def __init__(
+        self,
+        service: ConversionService,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        max_body: int = DEFAULT_MAX_BODY,
+    ) -> None:
+        check_local_host(host)
+        self.service = service
+        self.host = host
+        self.port = port
+        self.max_body = max_body
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> int:
+        """Começa a aceitar conexões e retorna a porta efetiva."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as exc:
+                    await self._send(writer, exc.status, _error_body(str(exc)), "application/json", False)
+                    return
+                if request is None:
+                    return
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload, content_type, extra = await self._route(method, target, headers, body)
+                await self._send(writer, status, payload, content_type, keep_alive, extra)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "Linha de requisicao invalida") from None
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = b""
+        if method == "POST":
+            if "content-length" not in headers:
+                raise HttpError(411, "Content-Length obrigatorio")
+            try:
+                length = int(headers["content-length"])
+            except ValueError:
+                raise HttpError(400, "Content-Length invalido") from None
+            if length > self.max_body:
+                raise HttpError(413, f"PDF acima de {self.max_body} bytes")
+            body = await reader.readexactly(length)
+        return method, target, headers, body
+
+    async def _route(
+        self, method: str, target: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[int, bytes, str, Dict[str, str]]:
+        url = urlsplit(target)
+        if url.path == "/health":
+            if method != "GET":
+                return 405, _error_body("Use GET"), "application/json", {}
+            stats = dict(self.service.stats, workers=self.service.workers, queued=self.service.queued)
+            return 200, json.dumps(stats).encode(), "application/json", {}
+        if url.path != "/convert":
+            return 404, _error_body("Rota inexistente"), "application/json", {}
+        if method != "POST":
+            return 405, _error_body("Use POST"), "application/json", {}
+        query = parse_qs(url.query)
+        response_format = query.get("format", [""])[0]
+        if not response_format:
+            response_format = "json" if "application/json" in headers.get("accept", "") else "xml"
+        if not body:
+            return 400, _error_body("Corpo vazio: envie o PDF"), "application/json", {}
+        try:
+            result = await self.service.convert(body, response_format)
+        except ServiceBusyError as exc:
+            return 503, _error_body(str(exc)), "application/json", {"Retry-After": "1"}
+        except ConversionFailedError as exc:
+            failure = exc.failure
+            payload = json.dumps({"error": failure.message, "exception": failure.exception, "stage": failure.stage})
+            return 422, payload.encode(), "application/json", {}
+        except ValueError as exc:
+            return 400, _error_body(str(exc)), "application/json", {}
+        except Exception as exc:
+            return 500, _error_body(f"{type(exc).__name__}: {exc}"), "application/json", {}
+        if response_format == "json":
+            payload = json.dumps([note.to_dict() for note in result], ensure_ascii=False).encode("utf-8")
+            return 200, payload, "application/json; charset=utf-8", {}
+        if len(result) == 1:
+            payload = XML_DECLARATION + result[0].fragment
+        else:
+            payload = XML_DECLARATION + b"<ListaNfse>" + b"".join(note.fragment for note in result) + b"</ListaNfse>"
+        return 200, payload, "application/xml; charset=utf-8", {}
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: bytes,
+        content_type: str,
+        keep_alive: bool,
+        extra: Optional[Dict[str, str]] = None,
+    ) -> None:
+        lines = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(payload)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines += [f"{name}: {value}" for name, value in (extra or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+
+
+def _error_body(message: str) -> bytes:
+    return json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="extrator_pdf.py serve",
+        description="Serviço HTTP local de conversão de PDFs de NFSe ServiMax.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço local de escuta")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Porta")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="Processos do pool")
+    parser.add_argument("--max-batch", type=int, default=8, help="Máximo de requisições por lote")
+    parser.add_argument("--batch-window", type=float, default=0.0,
+                        help="Segundos de espera por mais requisições antes de enviar um lote")
+    parser.add_argument("--queue-size", type=int, default=64,
+                        help="Requisições em espera antes de responder 503")
+    parser.add_argument("--timeout", type=float, help="Limite em segundos por PDF")
+    parser.add_argument("--max-body", type=int, default=DEFAULT_MAX_BODY, help="Tamanho máximo do PDF em bytes")
+    parser.add_argument("--cache", help="Arquivo SQLite do cache de texto extraído")
+    parser.add_argument("--cache-max-bytes", type=int, default=DEFAULT_MAX_BYTES,
+                        help="Tamanho máximo do cache de texto; os itens menos usados são descartados")
+    parser.add_argument("--fast", action="store_true", help="Leitura rápida da primeira página")
+    parser.add_argument("--prestadores",
+                        help="JSON com os prestadores emissores (identificados pelo CNPJ no PDF)")
+    parser.add_argument("--multi-note", action="store_true",
+                        help="PDFs com várias notas concatenadas, lidos página a página")
+    return parser
+
+
+def serve(argv: Sequence[str], converter_factory: Callable[..., NFSeConverter]) -> int:
+    """Executa o serviço até Ctrl+C e retorna o código de saída do processo."""
+    args = build_parser().parse_args(argv)
+    try:
+        check_local_host(args.host)
+        converter = converter_factory(
+            args.cache, cache_max_bytes=args.cache_max_bytes, fast_extraction=args.fast,
+            prestadores_path=args.prestadores, multi_note=args.multi_note,
+        )
+        service = ConversionService(
+            converter, workers=args.workers, max_batch=args.max_batch,
+            batch_window=args.batch_window, queue_size=args.queue_size, timeout=args.timeout,
+        )
+    except (OSError, ValueError) as exc:
+        print(f"ERRO: {exc}")
+        return 2
+
+    async def run() -> None:
+        # SIGTERM encerra como Ctrl+C: sem isso os workers do pool ficariam órfãos.
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, AttributeError):
+            pass
+        await service.start()
+        server = ConversionHTTPServer(service, args.host, args.port, args.max_body)
+        try:
+            port = await server.start()
+            print(f"Servico em http://{args.host}:{port}/convert ({args.workers} worker(s)); Ctrl+C encerra",
+                  flush=True)
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await server.close()
+            await service.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0